@@ -0,0 +1,44 @@
+import io, os, sys
+from contextlib import redirect_stdout
+from statistics import mean, median
+from time import perf_counter_ns
+from typing import Callable
+
+bench_path = os.path.dirname(os.path.realpath(__file__))
+src_dir = os.path.abspath(os.path.join(bench_path, os.pardir, "src"))
+sys.path.insert(1, src_dir) # add src directory at runtime
+
+
+def bench(name: str, func: Callable, rounds: int=1000, warmup: int=10) -> dict:
+    """Time a function and print a one-line summary (times in microseconds).
+
+    Args:
+        name (str): name printed in the summary
+        func (Callable): function without arguments to time
+        rounds (int, optional): number of timed calls. Defaults to 1000.
+        warmup (int, optional): number of untimed calls before timing. Defaults to 10.
+
+    Returns:
+        dict: min, median, mean and p95 in microseconds
+    """
+    samples = []
+    # output of the timed function is discarded
+    with redirect_stdout(io.StringIO()):
+        for _ in range(warmup):
+            func()
+
+        for _ in range(rounds):
+            start = perf_counter_ns()
+            func()
+            samples.append(perf_counter_ns() - start)
+    samples.sort()
+
+    result = {
+        "min": samples[0] / 1000,
+        "median": median(samples) / 1000,
+        "mean": mean(samples) / 1000,
+        "p95": samples[int(0.95 * (len(samples) - 1))] / 1000,
+    }
+    print(f"{name:<48} min {result['min']:>10.2f}us  median {result['median']:>10.2f}us  "
+          f"mean {result['mean']:>10.2f}us  p95 {result['p95']:>10.2f}us")
+    return result
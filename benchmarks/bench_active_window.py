@@ -0,0 +1,49 @@
+"""ActiveWindow_VolCtrl against the fake pycaw/pywin32 backend.
+
+Run: python benchmarks/bench_active_window.py [call latency in microseconds]
+"""
+import io, sys
+from contextlib import redirect_stdout
+from _harness import bench
+from fakes.modules import install_fake_backend
+
+CALL_LATENCY = float(sys.argv[1])/1e6 if len(sys.argv) > 1 else 5e-6
+audio, desktop = install_fake_backend(call_latency=CALL_LATENCY, win32_latency=CALL_LATENCY)
+
+from process_volume_control import ActiveWindow_VolCtrl
+from utils.rate_limit import Unlimited
+
+
+def unlimited_policies():
+    return {action: Unlimited() for action in ActiveWindow_VolCtrl.default_rate_policies()}
+
+
+def com_calls_per_op(func, rounds: int=100) -> float:
+    audio.stats.reset()
+    with redirect_stdout(io.StringIO()):
+        for _ in range(rounds):
+            func()
+    return audio.stats.total / rounds
+
+
+if __name__ == '__main__':
+    print(f"call latency: {CALL_LATENCY*1e6:.0f}us")
+    for count in (10, 60, 500):
+        audio, desktop = install_fake_backend(count, CALL_LATENCY, win32_latency=CALL_LATENCY)
+        pids = [pid for pid in audio.pids() if pid]
+        ctrl = ActiveWindow_VolCtrl(rate_policies=unlimited_policies())
+        desktop.focus(pids[-1])
+
+        bench(f"volume_up ({count} sessions)", ctrl.volume_up)
+        print(f"  COM calls per volume_up: {com_calls_per_op(ctrl.volume_up):.1f}")
+        bench(f"toggle_mute ({count} sessions)", ctrl.toggle_mute)
+
+        switch = iter(range(10**9))
+        def volume_up_switching_window():
+            desktop.focus(pids[next(switch) % 2 - 1])
+            ctrl.volume_up()
+        bench(f"volume_up, switching window ({count} sessions)", volume_up_switching_window)
+        print(f"  COM calls per switching volume_up: {com_calls_per_op(volume_up_switching_window):.1f}")
+
+        bench(f"session lookup ({count} sessions)",
+              lambda: ctrl._get_audio_session_active_window(pids[-1]))
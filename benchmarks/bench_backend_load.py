@@ -0,0 +1,83 @@
+"""Load test of ActiveWindow_VolCtrl on the simulated audio backend: thousands
+of sessions, jittered call latencies, and other applications changing volumes
+and creating/removing sessions while hotkeys are pressed. Compares session
+caching strategies (how long the session of the active window is reused).
+
+Run: python benchmarks/bench_backend_load.py [sessions] [presses]
+"""
+import io, random, sys, threading
+from contextlib import redirect_stdout
+from time import perf_counter
+import _harness # adds src to sys.path
+from fakes.modules import install_fake_backend
+
+# only the foreground window and process name functions are used from the fakes
+_, desktop = install_fake_backend(session_count=1)
+
+from audio.simulated_backend import SimulatedBackend
+from process_volume_control import ActiveWindow_VolCtrl
+from utils.rate_limit import Unlimited
+
+
+def racer(backend: SimulatedBackend, pids, stop: threading.Event, seed: int):
+    """Other applications: change volumes, and restart (new session) now and then"""
+    rnd = random.Random(seed)
+    while not stop.wait(0.0005):
+        session = backend.session_by_pid(rnd.choice(pids))
+        if session is None:
+            continue
+        if rnd.random() < 0.2:
+            backend.remove_session(session.pid)
+            backend.add_session(session.pid, session.name)
+        else:
+            backend.change_volume(session, rnd.random())
+
+
+def run(session_count: int, presses: int, session_ttl: float, racers: int=2, switch_every: int=40) -> dict:
+    backend = SimulatedBackend(session_count, seed=1)
+    for session in backend.sessions():
+        desktop.add_process(session.pid, session.name)
+    backend.stats.reset()
+
+    ctrl = ActiveWindow_VolCtrl(backend=backend, session_ttl=session_ttl,
+                                rate_policies={action: Unlimited() for action in ActiveWindow_VolCtrl.default_rate_policies()})
+    pids = [s.pid for s in backend.sessions()]
+    # the active window switches between a few applications
+    pids = random.Random(0).sample(pids, 20)
+    rnd = random.Random(0)
+
+    stop = threading.Event()
+    threads = [threading.Thread(target=racer, args=(backend, pids, stop, i), daemon=True) for i in range(racers)]
+    for t in threads:
+        t.start()
+
+    latencies = []
+    start = perf_counter()
+    with redirect_stdout(io.StringIO()):
+        for i in range(presses):
+            if i % switch_every == 0:
+                desktop.focus(rnd.choice(pids))
+            t0 = perf_counter()
+            ctrl.volume_up() if rnd.random() < 0.5 else ctrl.volume_down()
+            latencies.append(perf_counter() - t0)
+    duration = perf_counter() - start
+    stop.set()
+    for t in threads:
+        t.join()
+
+    latencies.sort()
+    counts = backend.stats.counts
+    return {
+        "presses/s": round(presses / duration),
+        "p50_us": round(latencies[len(latencies)//2]*1e6, 1),
+        "p95_us": round(latencies[int(0.95*(len(latencies)-1))]*1e6, 1),
+        "set_volume": counts.get('set_volume', 0),
+        "stale_writes": counts.get('stale_write', 0),
+    }
+
+
+if __name__ == '__main__':
+    session_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    presses = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    for ttl in (0.0, 0.5, 2.0):
+        print(f"session ttl {ttl}s, {session_count} sessions:", run(session_count, presses, ttl))
@@ -0,0 +1,17 @@
+"""Event fan-out to a growing number of subscribers.
+
+Run: python benchmarks/bench_event.py
+"""
+from _harness import bench
+from utils.event import Event
+
+
+if __name__ == '__main__':
+    for count in (1, 10, 100):
+        event = Event()
+        received = []
+        for _ in range(count):
+            event.append(lambda session, volume, icon=None: received.append(volume))
+
+        bench(f"Event fan-out ({count} subscribers)", lambda: event(None, 50, icon=None))
+        received.clear()
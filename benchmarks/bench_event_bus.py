@@ -0,0 +1,73 @@
+"""Held volume key: a burst of volume events from the audio thread, and how
+many of them reach the gui thread through VolumeController's event bus.
+
+Run: python benchmarks/bench_event_bus.py
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import threading, time
+import _harness # adds src to sys.path
+from _harness import bench
+from fakes.modules import install_fake_backend
+
+install_fake_backend(session_count=1)
+
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QApplication
+from utils.event import Event
+from utils.event_bus import EventBus
+from volume_controller import VolumeController
+
+EVENTS = 2000
+
+
+class BurstVolCtrl:
+    """Volume control that only fires events"""
+    backend = None
+
+    def __init__(self) -> None:
+        self.volume_changed_event = Event()
+        self.volume_muted_event = Event()
+        self.volume_unmuted_event = Event()
+
+    def burst(self, count: int, interval: float):
+        for i in range(count):
+            self.volume_changed_event(None, i % 101, icon=None)
+            if interval:
+                time.sleep(interval)
+
+
+if __name__ == '__main__':
+    app = QApplication([])
+    volume_ctrl = BurstVolCtrl()
+    controller = VolumeController([volume_ctrl])
+    received = []
+    controller.volume_changed.connect(lambda volume, icon: received.append(volume))
+
+    # quit when the burst is sent and delivered
+    threads = []
+    def wait():
+        if threads[-1].is_alive() or controller.event_bus.stats()['pending']:
+            return
+        timer.stop()
+        QTimer.singleShot(50, app.quit)
+    timer = QTimer()
+    timer.timeout.connect(wait)
+
+    for interval in (0.0, 0.0005):
+        received.clear()
+        start = time.perf_counter()
+        threads.append(threading.Thread(target=volume_ctrl.burst, args=(EVENTS, interval)))
+        threads[-1].start()
+        timer.start(1)
+        app.exec()
+        duration = time.perf_counter() - start
+        print(f"{EVENTS} events, {interval*1000:.1f}ms apart: {len(received)} slot calls in "
+              f"{duration*1000:.0f}ms, last value {received[-1]} (sent {(EVENTS-1) % 101}), "
+              f"{controller.event_bus.stats()}")
+
+    bus = EventBus()
+    bus.subscribe('volume_changed', lambda volume, icon: None, weak=False)
+    bench("publish (coalesced)", lambda: bus.publish('volume_changed', 50, None))
+    bench("publish + drain", lambda: (bus.publish('volume_changed', 50, None), bus.drain()))
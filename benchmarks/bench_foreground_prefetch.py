@@ -0,0 +1,66 @@
+"""First key press after switching to another application, with the session
+looked up on the key press vs. prefetched on the focus change.
+
+Half of the applications play audio from another process than the one owning
+the window (like browsers), so their lookup needs the process name.
+
+Run: python benchmarks/bench_foreground_prefetch.py [win32 call latency in microseconds]
+"""
+import io, sys
+from contextlib import redirect_stdout
+from random import Random
+from time import perf_counter_ns
+import _harness # adds src to sys.path
+from fakes.modules import install_fake_backend
+
+WIN32_LATENCY = float(sys.argv[1])/1e6 if len(sys.argv) > 1 else 50e-6
+_, desktop = install_fake_backend(session_count=1, win32_latency=WIN32_LATENCY)
+
+from audio.simulated_backend import SimulatedBackend
+from process_volume_control import ActiveWindow_VolCtrl
+from utils.foreground import SimulatedForegroundSource
+
+APPS = 40
+SWITCHES = 500
+
+
+def window_pids(backend: SimulatedBackend):
+    pids = []
+    for i, session in enumerate(backend.sessions()):
+        pid = session.pid + 1 if i % 2 else session.pid
+        desktop.add_process(pid, session.name)
+        pids.append(pid)
+    return pids
+
+
+def first_presses(ctrl: ActiveWindow_VolCtrl, focus, pids) -> list:
+    rng = Random(1)
+    times = []
+    with redirect_stdout(io.StringIO()):
+        for _ in range(SWITCHES):
+            focus(rng.choice(pids))
+            start = perf_counter_ns()
+            ctrl._volume_delta(0.0)
+            times.append((perf_counter_ns() - start) / 1000)
+    times.sort()
+    return times
+
+
+def report(name: str, ctrl: ActiveWindow_VolCtrl, times: list):
+    print(f"{name:<24} first press median {times[len(times)//2]:8.1f}us  "
+          f"p95 {times[int(0.95*(len(times)-1))]:8.1f}us  {ctrl.session_cache_stats}")
+
+
+if __name__ == '__main__':
+    print(f"win32 call latency: {WIN32_LATENCY*1e6:.0f}us, {APPS} apps, {SWITCHES} switches")
+    backend = SimulatedBackend(APPS, seed=1)
+    pids = window_pids(backend)
+
+    # switches are seconds apart in practice, so the session of the last visit has expired
+    ctrl = ActiveWindow_VolCtrl(backend=backend, session_ttl=0.0)
+    report("lookup on key press", ctrl, first_presses(ctrl, desktop.focus, pids))
+
+    # prefetch runs inline on the focus change here, on the audio thread in the app
+    foreground = SimulatedForegroundSource()
+    ctrl = ActiveWindow_VolCtrl(backend=backend, foreground=foreground)
+    report("prefetch on focus", ctrl, first_presses(ctrl, foreground.focus, pids))
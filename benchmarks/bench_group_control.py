@@ -0,0 +1,48 @@
+"""Ducking all but the foreground application: one batched pass vs. a
+lookup-and-write round trip per session, on the simulated backend.
+
+Run: python benchmarks/bench_group_control.py
+"""
+import _harness # adds src to sys.path
+from fakes.modules import install_fake_backend
+
+_, desktop = install_fake_backend(session_count=1)
+
+from audio.simulated_backend import SimulatedBackend
+from group_volume_control import GroupVolCtrl, AllExceptForeground
+from utils.rate_limit import Unlimited
+
+
+def duck_one_by_one(backend: SimulatedBackend, foreground_pid: int, factor: float):
+    """Previous way: one full lookup and write per session"""
+    for pid in [backend.session_pid(s) for s in backend.sessions()]:
+        if pid == foreground_pid:
+            continue
+        session = next(s for s in backend.sessions() if backend.session_pid(s) == pid)
+        backend.set_volume(session, backend.get_volume(session)*factor)
+
+
+if __name__ == '__main__':
+    for count in (10, 40, 200):
+        backend = SimulatedBackend(count, seed=1)
+        for s in backend.sessions():
+            desktop.add_process(s.pid, s.name)
+        foreground = backend.sessions()[0].pid
+        desktop.focus(foreground)
+
+        group = GroupVolCtrl(AllExceptForeground(), backend,
+                             rate_policies={'toggle_duck': Unlimited()})
+        results = []
+        group.batch_completed_event.append(results.append)
+        for _ in range(10):
+            group.toggle_duck()
+        total = sorted(r.total_ms for r in results)
+        print(f"batched duck/unduck ({count} sessions): median {total[len(total)//2]:.2f}ms, "
+              f"max {total[-1]:.2f}ms, last {results[-1]}")
+
+        backend.stats.reset()
+        from time import perf_counter
+        start = perf_counter()
+        duck_one_by_one(backend, foreground, 0.2)
+        print(f"one-by-one duck ({count} sessions): {(perf_counter()-start)*1000:.2f}ms, "
+              f"enumerations {backend.stats.counts.get('enumerate', 0)}")
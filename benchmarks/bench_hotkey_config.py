@@ -0,0 +1,67 @@
+"""Hotkey config: cost of a reload (read, validate and compile the config file)
+for configs of 10 to 400 bindings, and of the dispatch of key events with a
+compiled table. A reload swaps the table while another thread keeps dispatching,
+no key event may fail or see a half built table.
+
+Run: python benchmarks/bench_hotkey_config.py
+"""
+import json
+import os
+import tempfile
+import threading
+import _harness # adds src to sys.path
+from _harness import bench
+from bench_hotkey_dispatch import bindings, feed, key_stream
+from hotkey.config import Action, Param, load_bindings
+from hotkey.pyhotkey import HotkeySet
+
+activations = [0]
+
+
+def actions():
+    def make(step, target):
+        def callback():
+            activations[0] += 1
+        return callback
+    return {'volume_up': Action(make, step=Param((int, float), 2), target=Param(str, 'active'))}
+
+
+def write_config(path: str, combos):
+    config = {"bindings": [{"keys": list(combo), "action": "volume_up", "step": 2} for combo in combos]}
+    with open(path, 'w') as f:
+        json.dump(config, f)
+
+
+def swap_while_dispatching(hk: HotkeySet, path: str, acts, events) -> int:
+    """Reload 200 times while a thread dispatches, returns the errors of the dispatching thread"""
+    errors = [0]
+    done = threading.Event()
+    def dispatch():
+        while not done.is_set():
+            try:
+                feed(hk._on_press, hk._on_release, events)
+            except Exception:
+                errors[0] += 1
+    thread = threading.Thread(target=dispatch)
+    thread.start()
+    for _ in range(200):
+        hk.swap(load_bindings(path, acts))
+    done.set()
+    thread.join()
+    return errors[0]
+
+
+if __name__ == '__main__':
+    acts = actions()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'hotkeys.json')
+        for count in (10, 100, 400):
+            combos = bindings(count)
+            write_config(path, combos)
+            events = key_stream(combos, 1000)
+            hk = HotkeySet()
+            bench(f"reload, {count} bindings", lambda: hk.swap(load_bindings(path, acts)), rounds=50)
+            bench(f"dispatch 1000 events, {count} bindings", lambda: feed(hk._on_press, hk._on_release, events),
+                  rounds=200)
+            errors = swap_while_dispatching(hk, path, acts, events)
+            print(f"{'':<48} 200 reloads while dispatching: {errors} errors")
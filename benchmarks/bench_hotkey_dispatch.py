@@ -0,0 +1,66 @@
+"""Hotkey dispatch: HotkeySet with hundreds of bindings, fed synthetic key streams.
+The old dispatch (every hotkey sees every key event) is timed for comparison.
+
+Run: python benchmarks/bench_hotkey_dispatch.py
+"""
+import random
+from itertools import combinations
+from string import ascii_lowercase, digits
+from _harness import bench
+from hotkey.pyhotkey import HotkeySet, Hotkey
+
+MODIFIERS = ('ctrl', 'alt', 'shift', 'cmd', 'alt_gr')
+
+
+def bindings(count: int):
+    """Unique key combinations: one or two modifiers + a character"""
+    modifier_sets = [c for n in (1, 2) for c in combinations(MODIFIERS, n)]
+    chars = ascii_lowercase + digits
+    combos = [mods + (c,) for c in chars for mods in modifier_sets]
+    return combos[:count]
+
+
+def key_stream(combos, length: int, seed: int=0):
+    """(press: bool, key) events: mostly unbound typing, some hotkey presses"""
+    rnd = random.Random(seed)
+    events = []
+    while len(events) < length:
+        if rnd.random() < 0.2:
+            keys = [Hotkey.parse(f"<{k}>" if len(k) > 1 else k)[0] for k in rnd.choice(combos)]
+        else:
+            keys = [Hotkey.parse(rnd.choice(ascii_lowercase))[0]]
+        events += [(True, k) for k in keys] + [(False, k) for k in reversed(keys)]
+    return events
+
+
+def feed(on_press, on_release, events):
+    for press, key in events:
+        if press:
+            on_press(key)
+        else:
+            on_release(key)
+
+
+if __name__ == '__main__':
+    for count in (10, 100, 400):
+        combos = bindings(count)
+        activations = [0]
+        def callback():
+            activations[0] += 1
+
+        hk = HotkeySet()
+        for combo in combos:
+            hk.register(combo, callback)
+        events = key_stream(combos, 1000)
+
+        def linear_press(key):
+            for hotkey in hk.table.hotkeys:
+                hotkey.press(key)
+        def linear_release(key):
+            for hotkey in hk.table.hotkeys:
+                hotkey.release(key)
+
+        bench(f"linear dispatch, 1000 events ({count} bindings)",
+              lambda: feed(linear_press, linear_release, events), rounds=20)
+        bench(f"HotkeySet dispatch, 1000 events ({count} bindings)",
+              lambda: feed(hk._on_press, hk._on_release, events), rounds=200)
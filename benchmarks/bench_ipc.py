@@ -0,0 +1,68 @@
+"""Load test of the control server: round trip of single requests, one
+request line adjusting 50 applications, and pipelined throughput with
+several connections.
+
+Run: python benchmarks/bench_ipc.py [address] (default: a temporary unix socket,
+     "127.0.0.1:<port>" on Windows)
+"""
+import os, sys, tempfile, threading
+from time import perf_counter
+import _harness # adds src to sys.path
+from _harness import bench
+from fakes.modules import install_fake_backend
+
+install_fake_backend(session_count=1)
+
+from audio.command_executor import AudioCommandExecutor
+from audio.simulated_backend import SimulatedBackend
+from ipc.client import ControlClient
+from ipc.server import ControlServer, DEFAULT_PORT
+
+APPS = 50
+REQUESTS = 20000
+
+
+def address() -> str:
+    if len(sys.argv) > 1:
+        return sys.argv[1]
+    if sys.platform == 'win32':
+        return f"127.0.0.1:{DEFAULT_PORT + 1}"
+    return os.path.join(tempfile.mkdtemp(), 'bench.sock')
+
+
+def throughput(addr: str, connections: int) -> float:
+    pids = [4*i for i in range(1, APPS+1)]
+    per_connection = REQUESTS // connections
+    def run():
+        with ControlClient(addr) as client:
+            answers = client.pipeline([f"set {i % 101} pid:{pids[i % APPS]}" for i in range(per_connection)])
+            assert all(a.startswith('ok') for a in answers), answers[:3]
+    threads = [threading.Thread(target=run) for _ in range(connections)]
+    start = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return per_connection * connections / (perf_counter() - start)
+
+
+if __name__ == '__main__':
+    for name, backend in (("no audio latency", SimulatedBackend.without_latency(APPS)),
+                          ("simulated COM latency", SimulatedBackend(APPS, seed=1))):
+        executor = AudioCommandExecutor()
+        executor.start()
+        addr = address()
+        server = ControlServer(backend, executor, address=addr)
+        server.start()
+        print(f"{name}, {addr}")
+
+        with ControlClient(addr) as client:
+            bench("ping round trip", lambda: client.request("ping"))
+            bench("set round trip", lambda: client.request("set 50 pid:4"))
+            batch = ";".join(f"set 40 pid:{4*i}" for i in range(1, APPS+1))
+            bench(f"one line setting {APPS} apps", lambda: client.request(batch), rounds=200)
+        for connections in (1, 4):
+            print(f"  pipelined sets, {connections} connection(s): {throughput(addr, connections):,.0f} requests/s")
+
+        server.stop()
+        executor.stop()
@@ -0,0 +1,47 @@
+"""Cost of a log call on the hotkey path when the console is slow (1 ms per
+write, like a busy terminal): print, a synchronous logging handler, and the
+queued LogService, which formats and writes on a background thread.
+
+Run: python benchmarks/bench_logging.py
+"""
+import io
+import logging
+import time
+import _harness # adds src to sys.path
+from _harness import bench
+from utils.log import LogService, get_logger
+from utils.rate_limit import Unlimited
+
+WRITE_LATENCY = 0.001
+
+
+class SlowStream(io.StringIO):
+    def write(self, text):
+        time.sleep(WRITE_LATENCY)
+        return len(text)
+
+
+def main():
+    stream = SlowStream()
+    log = get_logger('bench')
+
+    bench("print", lambda: print("process name", 4, "app1.exe", file=stream), rounds=200)
+
+    root = logging.getLogger()
+    handler = logging.StreamHandler(stream)
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    bench("logging, synchronous handler", lambda: log.info("process name", pid=4, name="app1.exe"), rounds=200)
+    root.removeHandler(handler)
+
+    service = LogService(level=logging.INFO, policies={"process name": Unlimited()}, stream=stream)
+    service.start()
+    bench("LogService, queued", lambda: log.info("process name", pid=4, name="app1.exe"), rounds=200)
+    bench("LogService, debug (ring buffer only)", lambda: log.debug("process name", pid=4, name="app1.exe"))
+    started = time.perf_counter()
+    service.stop()
+    print(f"background thread wrote the backlog in {(time.perf_counter() - started)*1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Mixer with hundreds of sessions while other applications change volumes
+and open and close sessions: frame times of the gui thread and how the
+changes reach the model.
+
+Run: python benchmarks/bench_mixer.py
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import threading, time
+from random import Random
+from statistics import median
+import _harness # adds src to sys.path
+from fakes.modules import install_fake_backend
+
+install_fake_backend(session_count=1)
+
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QApplication
+from audio.command_executor import AudioCommandExecutor
+from audio.simulated_backend import SimulatedBackend
+from gui.mixer_view import MixerView
+from volume_controller import VolumeController
+
+SESSIONS = 500
+DURATION = 2.0 # seconds
+CHANGES_PER_SECOND = 5000
+
+
+def churn(backend: SimulatedBackend, stop: threading.Event, counts: dict):
+    rng = Random(1)
+    next_pid = 10**6
+    interval = 1.0 / CHANGES_PER_SECOND
+    while not stop.is_set():
+        sessions = backend.sessions()
+        kind = rng.random()
+        if kind < 0.9:
+            backend.change_volume(rng.choice(sessions), volume=rng.random())
+            counts['volume'] += 1
+        elif kind < 0.95 or len(sessions) < SESSIONS // 2:
+            next_pid += 4
+            backend.add_session(next_pid, f"new{next_pid}.exe")
+            counts['created'] += 1
+        else:
+            backend.remove_session(rng.choice(sessions).pid)
+            counts['expired'] += 1
+        time.sleep(interval)
+
+
+if __name__ == '__main__':
+    app = QApplication([])
+    backend = SimulatedBackend.without_latency(SESSIONS)
+    executor = AudioCommandExecutor()
+    executor.start()
+    controller = VolumeController([], executor)
+    mixer = MixerView(controller, backend, executor)
+
+    applies = [0]
+    original_apply = mixer._apply_changes
+    def counted_apply():
+        applies[0] += 1
+        original_apply()
+    mixer._apply_timer.timeout.disconnect()
+    mixer._apply_timer.timeout.connect(counted_apply)
+
+    start = time.perf_counter()
+    mixer.show()
+    while mixer.model.rowCount() < SESSIONS:
+        app.processEvents()
+    print(f"initial sync of {SESSIONS} sessions: {(time.perf_counter()-start)*1000:.1f}ms")
+
+    frame_times = []
+    prev = [time.perf_counter()]
+    def on_frame():
+        now = time.perf_counter()
+        frame_times.append((now - prev[0])*1000)
+        prev[0] = now
+    frame_timer = QTimer()
+    frame_timer.timeout.connect(on_frame)
+    frame_timer.start(16)
+
+    stop = threading.Event()
+    counts = {'volume': 0, 'created': 0, 'expired': 0}
+    thread = threading.Thread(target=churn, args=(backend, stop, counts))
+    applies[0] = 0
+    thread.start()
+    QTimer.singleShot(int(DURATION*1000), app.quit)
+    app.exec()
+    stop.set()
+    thread.join()
+    frame_timer.stop()
+
+    frame_times.sort()
+    print(f"churn {counts} over {DURATION:.0f}s: {applies[0]} model updates, rows {mixer.model.rowCount()}, "
+          f"frame median {median(frame_times):.1f}ms, p95 {frame_times[int(0.95*(len(frame_times)-1))]:.1f}ms, "
+          f"max {frame_times[-1]:.1f}ms")
+    executor.stop()
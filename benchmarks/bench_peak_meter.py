@@ -0,0 +1,58 @@
+"""Peak meter cost while the popup is visible and while it is hidden, and the
+cost of one batched sampling pass over many sessions.
+
+Run: python benchmarks/bench_peak_meter.py
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import time
+import _harness # adds src to sys.path
+from _harness import bench
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QApplication, QWidget
+from audio.command_executor import AudioCommandExecutor
+from audio.peak_sampler import PeakSampler
+from audio.simulated_backend import SimulatedBackend
+from gui.peak_meter import PeakMeter
+
+PHASE = 1.0 # seconds
+
+
+def run_for(app, seconds: float):
+    QTimer.singleShot(int(seconds * 1000), app.quit)
+    app.exec()
+
+
+if __name__ == '__main__':
+    app = QApplication([])
+    backend = SimulatedBackend(10, seed=1)
+    session = backend.sessions()[0]
+    executor = AudioCommandExecutor()
+    executor.start()
+    sampler = PeakSampler(backend, lambda: [session], executor)
+    sampler.start()
+
+    popup = QWidget()
+    popup.resize(65, 140)
+    meter = PeakMeter(sampler, parent=popup)
+    meter.setGeometry(50, 20, 4, 100)
+
+    for name, visible in (("visible", True), ("hidden", False)):
+        popup.setVisible(visible)
+        samples, repaints = sampler.samples, meter.repaints
+        backend.stats.reset()
+        wall, cpu = time.perf_counter(), time.process_time()
+        run_for(app, PHASE)
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        print(f"popup {name:<8} samples {sampler.samples - samples:4d}  repaints {meter.repaints - repaints:4d}  "
+              f"peak reads {backend.stats.counts.get('get_peak', 0):4d}  cpu {cpu/wall*100:5.1f}%")
+
+    sampler.stop()
+    executor.stop()
+
+    for count in (1, 10, 60):
+        backend = SimulatedBackend(count, seed=1)
+        sessions = backend.sessions()
+        sampler = PeakSampler(backend, lambda: sessions, max_meters=count)
+        bench(f"one sampling pass ({count} sessions)", sampler._sample)
@@ -0,0 +1,59 @@
+"""Paints and frame times of the volume popup while a volume key is held,
+with and without the cached chrome, on the offscreen platform.
+
+Run: python benchmarks/bench_popup_render.py
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import _harness # adds src to sys.path
+from fakes.modules import install_fake_backend
+
+install_fake_backend(session_count=1)
+
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QApplication
+from gui.render_profile import RenderProfiler
+from gui.volume_view import VolumeView
+from main import load_stylesheet
+from volume_controller import VolumeController
+
+STEPS = 60 # volume updates of one held key
+STEP_INTERVAL_MS = 30 # keyboard auto-repeat
+
+
+class ShortPopup(VolumeView):
+    _popup_display_duration = 200
+    _fade_out_duration = 300
+
+
+def held_key(app, cached_chrome: bool) -> dict:
+    profiler = RenderProfiler()
+    view = ShortPopup(VolumeController([]), render_profiler=profiler, cached_chrome=cached_chrome)
+    view.prerender()
+
+    step = [0]
+    def press():
+        step[0] += 1
+        if step[0] > STEPS:
+            timer.stop()
+            # popup display and fade out
+            QTimer.singleShot(800, app.quit)
+            return
+        view.set_volume(50 + step[0] % 40)
+    timer = QTimer()
+    timer.timeout.connect(press)
+    timer.start(STEP_INTERVAL_MS)
+    app.exec()
+    summary = profiler.summary()
+    view.deleteLater()
+    return summary
+
+
+if __name__ == '__main__':
+    app = QApplication([])
+    load_stylesheet(app)
+    for cached_chrome in (False, True):
+        print(f"cached chrome: {cached_chrome}")
+        for name, value in held_key(app, cached_chrome).items():
+            print(f"  {name:<20} {value}")
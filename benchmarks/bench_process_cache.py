@@ -0,0 +1,72 @@
+"""Process name lookup: uncached Win32-like calls vs. ProcessNameCache.
+
+Run: python benchmarks/bench_process_cache.py
+"""
+import time
+from _harness import bench
+from utils.process_cache import ProcessNameCache
+
+WIN32_CALL_LATENCY = 20e-6 # seconds per OpenProcess/GetModuleFileNameEx call
+
+
+class FakeProcessTable:
+    """pid -> (creation time, path), with a fixed latency per OS call"""
+
+    def __init__(self, count: int, latency: float=WIN32_CALL_LATENCY) -> None:
+        self.latency = latency
+        self.processes = {pid: (pid, f"C:\\Program Files\\app{pid}\\app{pid}.exe")
+                          for pid in range(4, 4*(count+1), 4)}
+        self.open_handles = 0
+
+    def _wait(self):
+        end = time.perf_counter() + self.latency
+        while time.perf_counter() < end:
+            pass
+
+    def open_process(self, pid):
+        self._wait()
+        if pid not in self.processes:
+            raise OSError(f"no process {pid}")
+        self.open_handles += 1
+        return pid
+
+    def close_handle(self, handle):
+        self.open_handles -= 1
+
+    def get_creation_time(self, handle):
+        return self.processes[handle][0]
+
+    def get_image_path(self, handle):
+        self._wait()
+        return self.processes[handle][1]
+
+    def restart(self, pid):
+        """Simulate pid reuse: a new process with the same pid"""
+        creation_time, path = self.processes[pid]
+        self.processes[pid] = (creation_time + 1, path.replace(".exe", "_new.exe"))
+
+
+def uncached(table, pid):
+    handle = table.open_process(pid)
+    name = table.get_image_path(handle)
+    table.close_handle(handle)
+    return name
+
+
+if __name__ == '__main__':
+    table = FakeProcessTable(200)
+    cache = ProcessNameCache(table.open_process, table.close_handle,
+                             table.get_creation_time, table.get_image_path, maxsize=64)
+    pids = list(table.processes)[:32]
+    it = iter(range(10**9))
+
+    bench("uncached (32 pids)", lambda: uncached(table, pids[next(it) % 32]))
+    bench("cached, hot (32 pids)", lambda: cache.get(pids[next(it) % 32]))
+
+    table.restart(pids[0])
+    assert cache.get(pids[0]) == "app4_new.exe", "stale name returned after pid reuse"
+
+    all_pids = list(table.processes)
+    bench("cached, thrashing (200 pids, maxsize 64)", lambda: cache.get(all_pids[next(it) % 200]))
+    print(cache.stats())
+    assert table.open_handles == 0, "leaked process handles"
@@ -0,0 +1,100 @@
+"""Session of the foreground window on a simulated process table: browser
+instances and an Electron app playing their audio from child processes, next
+to single process apps. Compares the lookup by exe name with the lookup
+through the process tree: sessions found, wrong and missed, the cost of a
+lookup, and the OS calls of a full and an incremental refresh of the tree.
+
+Run: python benchmarks/bench_process_tree.py
+"""
+from _harness import bench
+from fakes.modules import install_fake_backend
+
+audio, desktop = install_fake_backend(session_count=0)
+
+from audio.simulated_backend import SimulatedBackend
+from process_volume_control import ActiveWindow_VolCtrl
+from utils.foreground import SimulatedForegroundSource
+from utils.process_tree import ProcessTree
+from utils.win_utils import get_process_creation_time
+
+EXPLORER = 4
+APPS = 40 # single process apps with a session
+CHILDREN = 12 # child processes per multi-process app
+
+
+def build_desktop(backend: SimulatedBackend) -> dict:
+    """Processes and sessions of the desktop, returns window pid -> pid of the expected session (None: no audio)"""
+    desktop.add_process(EXPLORER, "explorer.exe")
+    expected = {EXPLORER: None}
+    next_pid = 1000
+    # browser instances, one without audio, and an electron app
+    for name, audio_child in (("chrome.exe", 7), ("chrome.exe", 2), ("chrome.exe", None), ("discord.exe", 3)):
+        main, next_pid = next_pid, next_pid + 4
+        desktop.add_process(main, name, EXPLORER)
+        expected[main] = None
+        for i in range(CHILDREN):
+            child, next_pid = next_pid, next_pid + 4
+            desktop.add_process(child, name, main)
+            if i == audio_child:
+                backend.add_session(child, name)
+                expected[main] = child
+    for i in range(APPS):
+        pid, next_pid = next_pid, next_pid + 4
+        desktop.add_process(pid, f"app{i}.exe", EXPLORER)
+        backend.add_session(pid, f"app{i}.exe")
+        expected[pid] = pid
+    return expected
+
+
+def accuracy(ctrl: ActiveWindow_VolCtrl, expected: dict) -> dict:
+    result = {"right": 0, "wrong": 0, "missed": 0}
+    for window, session_pid in expected.items():
+        session = ctrl._get_audio_session_active_window(window)
+        found = session.pid if session is not None else None
+        if found == session_pid:
+            result["right"] += 1
+        elif found is None:
+            result["missed"] += 1
+        else:
+            result["wrong"] += 1
+    return result
+
+
+def os_calls(func) -> int:
+    desktop.stats.reset()
+    func()
+    return desktop.stats.total
+
+
+if __name__ == '__main__':
+    backend = SimulatedBackend.without_latency()
+    expected = build_desktop(backend)
+    tree = ProcessTree(desktop.list_processes, get_process_creation_time)
+    # cached sessions stay valid until a session is created, like in the app
+    by_name = ActiveWindow_VolCtrl(backend=backend, foreground=SimulatedForegroundSource())
+    by_tree = ActiveWindow_VolCtrl(backend=backend, foreground=SimulatedForegroundSource(), process_tree=tree)
+    print(f"{len(desktop.list_processes())} processes, {len(backend.sessions())} sessions, {len(expected)} windows")
+
+    calls = os_calls(tree.refresh)
+    print(f"full refresh: {calls} OS calls")
+    print(f"by exe name:  {accuracy(by_name, expected)}")
+    print(f"by tree:      {accuracy(by_tree, expected)}")
+
+    browser = next(pid for pid, session_pid in expected.items() if session_pid and session_pid != pid)
+    bench("lookup by exe name, browser window", lambda: by_name._get_audio_session_active_window(browser))
+    bench("lookup by tree, browser window (cached)", lambda: by_tree._get_audio_session_active_window(browser))
+    def uncached():
+        by_tree._affinity._sessions.clear()
+        by_tree._get_audio_session_active_window(browser)
+    bench("lookup by tree, browser window (tree walk)", uncached)
+
+    # the session created by a new tab process refreshes the tree
+    for window in expected:
+        by_tree._lookup(window)
+        by_name._lookup(window)
+    desktop.add_process(5000, "chrome.exe", browser)
+    calls = os_calls(lambda: backend.add_session(5000, "chrome.exe"))
+    print(f"incremental refresh for a new process: {calls} OS calls, tree {tree.stats()}")
+    # only the windows of the application of a new session are looked up again
+    print(f"cached windows after a session of a browser: by exe name {len(by_name._session_cache)}, "
+          f"by tree {len(by_tree._session_cache)} of {len(expected)}")
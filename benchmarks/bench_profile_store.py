@@ -0,0 +1,38 @@
+"""Volume profile store: cost of a record (on the audio thread, per key
+press), first-use load of a large log, and log size after long churn.
+
+Run: python benchmarks/bench_profile_store.py
+"""
+import _harness # adds src to sys.path
+import os, tempfile
+from time import perf_counter
+from _harness import bench
+from utils.profile_store import ProfileStore
+
+APPS = 5000
+
+
+if __name__ == '__main__':
+    path = os.path.join(tempfile.mkdtemp(), 'volume_profiles.log')
+    store = ProfileStore(path)
+
+    # years of churn: every app changed many times, flushed in small batches
+    start = perf_counter()
+    for day in range(200):
+        for i in range(0, APPS, 7):
+            store.record(f"app{(i + day) % APPS}.exe", day % 101)
+        store.flush()
+    print(f"churn: {store.records} records in {perf_counter()-start:.2f}s, {store.stats()}, "
+          f"log {os.path.getsize(path)/1024:.0f} KiB")
+
+    i = 0
+    def record():
+        global i
+        i += 1
+        store.record(f"app{i % APPS}.exe", i % 101)
+    bench("record (store loaded)", record, rounds=10000)
+    store.flush()
+
+    def load():
+        ProfileStore(path).get("app1.exe")
+    bench(f"first get, load log ({store.stats()['log_lines']} lines)", load, rounds=50)
@@ -0,0 +1,49 @@
+"""50 concurrent volume fades driven by one shared tick, on the simulated
+backend with COM-like latencies: CPU time, tick cost and writes skipped
+because the volume did not change enough to be heard.
+
+Run: python benchmarks/bench_ramp.py
+"""
+import _harness # adds src to sys.path
+import time
+from _harness import bench
+from audio.command_executor import AudioCommandExecutor
+from audio.ramp import RampScheduler
+from audio.simulated_backend import SimulatedBackend
+
+FADES = 50
+DURATION = 0.5
+
+
+def run_fades(backend: SimulatedBackend, target: float) -> RampScheduler:
+    executor = AudioCommandExecutor()
+    executor.start()
+    ramp = RampScheduler(backend, executor)
+    ramp.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    executor.submit(ramp.start_ramps, [(s, target) for s in backend.sessions()], DURATION)
+    time.sleep(0.05)
+    while len(ramp):
+        time.sleep(0.01)
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    ramp.stop()
+    executor.stop()
+    print(f"{FADES} fades over {DURATION*1000:.0f}ms: wall {wall*1000:.0f}ms, "
+          f"cpu {cpu*1000:.0f}ms ({cpu/wall*100:.0f}% of one core), {ramp.stats()}")
+    return ramp
+
+
+if __name__ == '__main__':
+    backend = SimulatedBackend(FADES, seed=1)
+    ramp = run_fades(backend, 0.2)
+    print(f"  writes without skipping: {ramp.ticks * FADES}")
+    run_fades(backend, 1.0)
+
+    # cost of computing one tick, without audio latency
+    backend = SimulatedBackend.without_latency(FADES)
+    ramp = RampScheduler(backend)
+    sessions = backend.sessions()
+    def tick():
+        ramp.start_ramps([(s, 0.0 if s.volume > 0.5 else 1.0) for s in sessions], 1.0)
+        ramp._tick()
+    bench(f"retarget + tick ({FADES} ramps)", tick)
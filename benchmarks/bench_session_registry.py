@@ -0,0 +1,44 @@
+"""Session lookup: linear scan over all sessions vs. SessionRegistry.
+
+Run: python benchmarks/bench_session_registry.py
+"""
+from _harness import bench
+from audio.session_registry import SessionRegistry
+
+
+class _Process:
+    def __init__(self, name: str) -> None:
+        self._name = name
+
+    def name(self) -> str:
+        return self._name
+
+
+class _Session:
+    def __init__(self, pid: int) -> None:
+        self.ProcessId = pid
+        self.Process = _Process(f"app{pid}.exe")
+
+
+def fake_session_provider(count: int):
+    sessions = [_Session(pid) for pid in range(1, count+1)]
+    return lambda: sessions
+
+
+def linear_lookup(provider, pname: str):
+    for s in provider():
+        if s.Process and s.Process.name() == pname:
+            return s
+
+
+if __name__ == '__main__':
+    for count in (10, 100, 1000, 5000):
+        provider = fake_session_provider(count)
+        registry = SessionRegistry(provider)
+        registry.refresh()
+        pname = f"app{count}.exe" # worst case for the linear scan
+
+        bench(f"linear scan ({count} sessions)", lambda: linear_lookup(provider, pname))
+        bench(f"registry by name ({count} sessions)", lambda: registry.get_by_name(pname))
+        bench(f"registry by pid ({count} sessions)", lambda: registry.get_by_pid(count))
+        bench(f"registry refresh, no change ({count} sessions)", registry.refresh, rounds=100)
@@ -0,0 +1,127 @@
+"""Slider drag against a slow ISimpleAudioVolume: frame times of the GUI thread
+with writes on the GUI thread (old behaviour) vs. FrameThrottle + executor.
+
+Run: python benchmarks/bench_slider_throttle.py
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import time
+from statistics import median
+import _harness # adds src to sys.path
+from PySide6.QtCore import QTimer, Qt
+from PySide6.QtWidgets import QApplication, QSlider
+from audio.command_executor import AudioCommandExecutor
+from gui.throttle import FrameThrottle
+
+COM_CALL_LATENCY = 0.004 # seconds per call
+DRAG_STEPS = 400
+
+
+class SlowSimpleAudioVolume:
+    """ISimpleAudioVolume with a fixed latency per call"""
+
+    def __init__(self, latency: float=COM_CALL_LATENCY) -> None:
+        self._latency = latency
+        self._volume = 0.0
+        self._mute = 0
+        self.calls = 0
+
+    def _call(self):
+        self.calls += 1
+        time.sleep(self._latency)
+
+    def GetMute(self):
+        self._call()
+        return self._mute
+
+    def SetMute(self, mute, context):
+        self._call()
+        self._mute = mute
+
+    def GetMasterVolume(self):
+        self._call()
+        return self._volume
+
+    def SetMasterVolume(self, volume, context):
+        self._call()
+        self._volume = volume
+
+
+def write_volume(interface, volume: int):
+    # same calls as VolumeController.set_volume_of_last_session
+    if interface.GetMute():
+        interface.SetMute(0, None)
+    interface.SetMasterVolume(volume/100, None)
+
+
+def drag(app, connect) -> dict:
+    """Drag a slider one step per millisecond, and measure the time between
+    frames (16 ms timer ticks) on the gui thread.
+    """
+    interface = SlowSimpleAudioVolume()
+    slider = QSlider(Qt.Vertical)
+    slider.setRange(0, 100)
+    release = connect(slider, interface)
+
+    frame_times = []
+    prev = [time.perf_counter()]
+    def on_frame():
+        now = time.perf_counter()
+        frame_times.append((now - prev[0])*1000)
+        prev[0] = now
+    frame_timer = QTimer()
+    frame_timer.setInterval(16)
+    frame_timer.timeout.connect(on_frame)
+
+    step = [0]
+    def on_drag():
+        step[0] += 1
+        if step[0] > DRAG_STEPS:
+            drag_timer.stop()
+            release()
+            QTimer.singleShot(100, app.quit)
+            return
+        slider.setValue(step[0] % 101 if (step[0]//101) % 2 == 0 else 100 - step[0] % 101)
+    drag_timer = QTimer()
+    drag_timer.setInterval(1)
+    drag_timer.timeout.connect(on_drag)
+
+    start = time.perf_counter()
+    frame_timer.start()
+    drag_timer.start()
+    app.exec()
+    duration = time.perf_counter() - start
+    frame_timer.stop()
+
+    frame_times.sort()
+    return {
+        "duration_ms": round(duration*1000),
+        "frames": len(frame_times),
+        "median_ms": round(median(frame_times), 1),
+        "p95_ms": round(frame_times[int(0.95*(len(frame_times)-1))], 1),
+        "max_ms": round(frame_times[-1], 1),
+        "com_calls": interface.calls,
+        "final_volume": round(interface._volume*100),
+        "slider_value": slider.value(),
+    }
+
+
+if __name__ == '__main__':
+    app = QApplication([])
+
+    def direct(slider, interface):
+        slider.valueChanged.connect(lambda v: write_volume(interface, v))
+        return lambda: None
+
+    executor = AudioCommandExecutor()
+    executor.start()
+    def throttled(slider, interface):
+        throttle = FrameThrottle(parent=slider)
+        throttle.value_ready.connect(lambda v: executor.submit(write_volume, interface, v, key='slider'))
+        slider.valueChanged.connect(throttle.push)
+        return throttle.flush
+
+    print("writes on gui thread:   ", drag(app, direct))
+    print("frame throttle+executor:", drag(app, throttled))
+    executor.stop()
@@ -0,0 +1,157 @@
+"""Fake pycaw objects: audio sessions with configurable count and per-call latency."""
+import threading
+import weakref
+from time import perf_counter
+from typing import Dict, List
+from audio.simulated_backend import CallStats, spin
+
+
+class FakeProcess:
+    """The part of psutil.Process used by pycaw sessions"""
+
+    def __init__(self, pid: int, name: str) -> None:
+        self.pid = pid
+        self._name = name
+
+    def name(self) -> str:
+        return self._name
+
+
+class FakeSessionState:
+    """Volume and mute of a session in the audio service, shared by all its wrappers"""
+    __slots__ = ('volume', 'mute')
+
+    def __init__(self, volume: float = 1.0) -> None:
+        self.volume = volume
+        self.mute = 0
+
+
+class FakeSessionControl:
+    """IAudioSessionControl2, a COM interface held by a session wrapper"""
+
+
+class FakeSimpleAudioVolume:
+    """ISimpleAudioVolume with a fixed latency per call"""
+
+    def __init__(self, stats: CallStats, latency: float = 0.0, state: FakeSessionState = None) -> None:
+        self._stats = stats
+        self._latency = latency
+        self._state = state if state is not None else FakeSessionState()
+
+    def _call(self, name: str) -> None:
+        self._stats.count(name)
+        spin(self._latency)
+
+    def GetMasterVolume(self) -> float:
+        self._call('GetMasterVolume')
+        return self._state.volume
+
+    def SetMasterVolume(self, volume: float, context) -> None:
+        self._call('SetMasterVolume')
+        self._state.volume = volume
+
+    def GetMute(self) -> int:
+        self._call('GetMute')
+        return self._state.mute
+
+    def SetMute(self, mute: int, context) -> None:
+        self._call('SetMute')
+        self._state.mute = mute
+
+
+class FakeAudioSession:
+    """pycaw AudioSession: a wrapper holding the COM interfaces and the process of a session"""
+
+    def __init__(self, pid: int, name: str, stats: CallStats, latency: float = 0.0,
+                 state: FakeSessionState = None, interfaces: weakref.WeakSet = None) -> None:
+        self.ProcessId = pid
+        self._ctl = FakeSessionControl()
+        self._volume = FakeSimpleAudioVolume(stats, latency, state)
+        self._process = FakeProcess(pid, name) if pid else None
+        self._callback = None
+        if interfaces is not None:
+            interfaces.add(self._ctl)
+            interfaces.add(self._volume)
+
+    @property
+    def Process(self):
+        return self._process
+
+    @property
+    def SimpleAudioVolume(self) -> FakeSimpleAudioVolume:
+        return self._volume
+
+    def register_notification(self, callback) -> None:
+        self._callback = callback
+
+    def unregister_notification(self) -> None:
+        self._callback = None
+
+
+class FakeAudioSystem:
+    """Sessions of a fake audio endpoint.
+
+    Session i has process id 4*(i+1) and process name "app{i}.exe"; the
+    first session is the system sounds session without a process, like on
+    Windows.
+
+    Every COM interface held by a wrapper is tracked until it is released,
+    see open_interfaces.
+    """
+
+    def __init__(self, session_count: int = 60, call_latency: float = 0.0,
+                 enumerate_latency: float = 0.0, fresh_wrappers: bool = False) -> None:
+        """
+        Args:
+            session_count (int, optional): number of sessions. Defaults to 60.
+            call_latency (float, optional): seconds per ISimpleAudioVolume call. Defaults to 0.0.
+            enumerate_latency (float, optional): seconds per enumerated session. Defaults to 0.0.
+            fresh_wrappers (bool, optional): GetAllSessions returns new wrappers of the sessions
+                on every call, like pycaw. Defaults to False.
+        """
+        self.stats = CallStats()
+        self.call_latency = call_latency
+        self.enumerate_latency = enumerate_latency
+        self.fresh_wrappers = fresh_wrappers
+        self._lock = threading.Lock()
+        self._sessions: Dict[int, FakeAudioSession] = {}
+        self._interfaces = weakref.WeakSet()
+        self.add_session(0, "")
+        for i in range(1, session_count):
+            self.add_session(4*i, f"app{i}.exe")
+
+    @property
+    def open_interfaces(self) -> int:
+        """COM interfaces of all session wrappers that are not released yet"""
+        return len(self._interfaces)
+
+    def _wrap(self, session: FakeAudioSession) -> FakeAudioSession:
+        name = session.Process.name() if session.Process else ""
+        return FakeAudioSession(session.ProcessId, name, self.stats, self.call_latency,
+                                session.SimpleAudioVolume._state, self._interfaces)
+
+    def add_session(self, pid: int, name: str) -> FakeAudioSession:
+        session = FakeAudioSession(pid, name, self.stats, self.call_latency, interfaces=self._interfaces)
+        with self._lock:
+            self._sessions[pid] = session
+        return session
+
+    def remove_session(self, pid: int) -> FakeAudioSession:
+        with self._lock:
+            return self._sessions.pop(pid, None)
+
+    def session(self, pid: int) -> FakeAudioSession:
+        return self._sessions.get(pid)
+
+    def pids(self) -> List[int]:
+        return list(self._sessions)
+
+    def GetAllSessions(self) -> List[FakeAudioSession]:
+        """AudioUtilities.GetAllSessions"""
+        self.stats.count('GetAllSessions')
+        with self._lock:
+            sessions = list(self._sessions.values())
+        if self.fresh_wrappers:
+            sessions = [self._wrap(session) for session in sessions]
+        spin(self.enumerate_latency * len(sessions))
+        return sessions
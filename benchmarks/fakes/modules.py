@@ -0,0 +1,90 @@
+"""Install the fakes as the Windows-only modules (pywin32, pycaw), so modules
+importing them, like process_volume_control, can run on any platform.
+
+Example Usage:
+>>> from fakes.modules import install_fake_backend
+>>> audio, desktop = install_fake_backend(session_count=100)
+>>> from process_volume_control import ActiveWindow_VolCtrl
+"""
+import sys
+import types
+from fakes.audio import FakeAudioSystem
+from fakes.win32 import FakeDesktop
+
+_FAKE_MODULES = ('win32gui', 'win32process', 'win32api', 'win32con', 'pycaw', 'pycaw.pycaw')
+
+
+class _Active:
+    """The fakes the module functions forward to, replaced on every install"""
+    audio: FakeAudioSystem = None
+    desktop: FakeDesktop = None
+
+
+def _module(name: str, **attrs) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+def install_fake_backend(session_count: int = 60, call_latency: float = 0.0,
+                         enumerate_latency: float = 0.0, win32_latency: float = 0.0,
+                         fresh_wrappers: bool = False):
+    """Register fake pywin32 and pycaw modules in sys.modules.
+    Every session of the fake audio system also gets a process on the fake desktop.
+    Must be called before importing modules that use them. Calling it again
+    replaces the fakes behind the already installed modules.
+
+    Args:
+        session_count (int, optional): number of audio sessions. Defaults to 60.
+        call_latency (float, optional): seconds per ISimpleAudioVolume call. Defaults to 0.0.
+        enumerate_latency (float, optional): seconds per session when enumerating. Defaults to 0.0.
+        win32_latency (float, optional): seconds per pywin32 call. Defaults to 0.0.
+        fresh_wrappers (bool, optional): enumerating returns new session wrappers, like pycaw. Defaults to False.
+
+    Returns:
+        Tuple[FakeAudioSystem, FakeDesktop]: the fakes behind the modules
+    """
+    for name in _FAKE_MODULES:
+        if name in sys.modules and not getattr(sys.modules[name], '__fake__', False):
+            raise RuntimeError(f"{name} is already imported, install the fakes before importing it")
+
+    audio = FakeAudioSystem(session_count, call_latency, enumerate_latency, fresh_wrappers)
+    desktop = FakeDesktop(win32_latency)
+    for pid in audio.pids():
+        if pid:
+            desktop.add_process(pid, audio.session(pid).Process.name())
+
+    _Active.audio = audio
+    _Active.desktop = desktop
+    if getattr(sys.modules.get('pycaw.pycaw'), '__fake__', False):
+        return audio, desktop
+
+    class AudioUtilities:
+        @staticmethod
+        def GetAllSessions():
+            return _Active.audio.GetAllSessions()
+
+    def forward(name):
+        return lambda *args: getattr(_Active.desktop, name)(*args)
+
+    sys.modules.update({
+        'win32gui': _module('win32gui', __fake__=True,
+                            GetForegroundWindow=forward('GetForegroundWindow')),
+        'win32process': _module('win32process', __fake__=True,
+                                GetWindowThreadProcessId=forward('GetWindowThreadProcessId'),
+                                GetModuleFileNameEx=forward('GetModuleFileNameEx'),
+                                GetProcessTimes=forward('GetProcessTimes')),
+        'win32api': _module('win32api', __fake__=True,
+                            OpenProcess=forward('OpenProcess'),
+                            CloseHandle=forward('CloseHandle'),
+                            GetAsyncKeyState=forward('GetAsyncKeyState')),
+        'win32con': _module('win32con', __fake__=True,
+                            PROCESS_QUERY_INFORMATION=0x0400,
+                            PROCESS_QUERY_LIMITED_INFORMATION=0x1000,
+                            PROCESS_VM_READ=0x0010),
+        'pycaw': _module('pycaw', __fake__=True, __path__=[]),
+        'pycaw.pycaw': _module('pycaw.pycaw', __fake__=True,
+                               AudioUtilities=AudioUtilities,
+                               ISimpleAudioVolume=object),
+    })
+    return audio, desktop
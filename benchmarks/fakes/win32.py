@@ -0,0 +1,78 @@
+"""Fake pywin32 functions: foreground window and process names, with per-call latency."""
+import ntpath
+import threading
+from typing import Dict, List, Tuple
+from fakes.audio import CallStats, spin
+
+
+class FakeDesktop:
+    """Processes and the foreground window of a fake desktop.
+
+    The foreground window handle is the process id of its process.
+    """
+    _created = 0 # creation time of the last process, shared so times are never reused
+
+    def __init__(self, call_latency: float = 0.0) -> None:
+        self.stats = CallStats()
+        self.call_latency = call_latency
+        self.foreground_pid = 0
+        self.keys_down = set() # virtual key codes
+        self._lock = threading.Lock()
+        self._processes: Dict[int, tuple] = {} # pid -> (creation time, path, parent pid)
+        self.open_handles = 0
+
+    def add_process(self, pid: int, name: str, parent: int = 0) -> None:
+        with self._lock:
+            FakeDesktop._created += 1
+            self._processes[pid] = (FakeDesktop._created, f"C:\\Program Files\\{name}", parent)
+
+    def remove_process(self, pid: int) -> None:
+        with self._lock:
+            self._processes.pop(pid, None)
+
+    def focus(self, pid: int) -> None:
+        self.foreground_pid = pid
+
+    def list_processes(self) -> List[Tuple[int, int, str]]:
+        """Process table like win_utils.list_processes(): (pid, parent pid, exe name)"""
+        self._call('CreateToolhelp32Snapshot')
+        with self._lock:
+            return [(pid, parent, ntpath.basename(path)) for pid, (_, path, parent) in self._processes.items()]
+
+    def _call(self, name: str) -> None:
+        self.stats.count(name)
+        spin(self.call_latency)
+
+    # win32gui / win32process / win32api
+    def GetForegroundWindow(self) -> int:
+        self._call('GetForegroundWindow')
+        return self.foreground_pid
+
+    def GetWindowThreadProcessId(self, hwnd: int):
+        self._call('GetWindowThreadProcessId')
+        return 1, hwnd
+
+    def OpenProcess(self, access: int, inherit: bool, pid: int) -> int:
+        self._call('OpenProcess')
+        if pid not in self._processes:
+            raise OSError(87, "OpenProcess", "The parameter is incorrect.")
+        with self._lock:
+            self.open_handles += 1
+        return pid
+
+    def CloseHandle(self, handle: int) -> None:
+        self._call('CloseHandle')
+        with self._lock:
+            self.open_handles -= 1
+
+    def GetModuleFileNameEx(self, handle: int, module: int) -> str:
+        self._call('GetModuleFileNameEx')
+        return self._processes[handle][1]
+
+    def GetProcessTimes(self, handle: int) -> dict:
+        self._call('GetProcessTimes')
+        return {'CreationTime': self._processes[handle][0]}
+
+    def GetAsyncKeyState(self, vk: int) -> int:
+        self._call('GetAsyncKeyState')
+        return 0x8000 if vk in self.keys_down else 0
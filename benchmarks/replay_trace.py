@@ -0,0 +1,288 @@
+"""Replay of an input trace (see utils/input_trace.py, recorded with
+VOLUME_CONTROL_RECORD) against the simulated backend. Key events go through a
+HotkeySet with the bindings of a hotkey config into ActiveWindow_VolCtrl and
+VolumeController, foreground changes through a SimulatedForegroundSource, and
+session snapshots add and remove sessions of a SimulatedBackend.
+
+Reports the COM calls, the hit rates of the session and process name caches,
+the latency of each action and the signals delivered to the gui. Replay the
+same trace on two builds and compare them with --report and --baseline.
+
+Without a trace, a synthetic one is replayed: key-repeat bursts, fast alt-tab
+switching, and applications starting and exiting.
+
+Not run by run_all.py.
+
+Run: python benchmarks/replay_trace.py [trace.jsonl.gz] [--realtime] [--config hotkeys.json]
+         [--report report.json] [--baseline report.json] [--write-synthetic trace.jsonl.gz]
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from random import Random
+from time import perf_counter, perf_counter_ns
+from typing import Dict, Iterable, List
+import _harness # adds src to sys.path
+from fakes.modules import install_fake_backend
+
+audio, desktop = install_fake_backend(session_count=0)
+
+from PySide6.QtCore import QCoreApplication
+from audio.simulated_backend import LatencyModel, SimulatedBackend, DEFAULT_LATENCIES
+from group_volume_control import AllExceptForeground, GroupVolCtrl
+from hotkey.config import DEFAULT_CONFIG, Action, load_bindings
+from hotkey.pyhotkey import HotkeySet, parse_key
+from hotkey_actions import HotkeyActions
+from process_volume_control import ActiveWindow_VolCtrl
+from utils.foreground import SimulatedForegroundSource
+from utils.input_trace import FOCUS, KEY, SESSIONS, TraceEvent, read_trace, write_trace
+from utils.tracing import Histogram
+from utils.win_utils import get_process_name_cache_stats
+from volume_controller import VolumeController
+
+FRAME_MS = 16
+
+
+def synthetic_trace(seconds: float = 60.0, apps: int = 30, seed: int = 1) -> List[TraceEvent]:
+    """Key-repeat bursts on the volume hotkeys, alt-tab switching between
+    applications, their child processes and windows without audio, and an
+    application exiting and another one starting every few seconds.
+    """
+    rng = Random(seed)
+    events = []
+    running = {4*i: f"app{i}.exe" for i in range(1, apps+1)}
+    windows = [9000, 9004] # explorer, no audio
+    def snapshot(t):
+        events.append((t, SESSIONS, [(pid, name, 0.8, False) for pid, name in running.items()]))
+    def us(t):
+        return int(t * 1e6)
+
+    snapshot(0)
+    t, next_app = 0.1, 4 * (apps+1)
+    next_churn = rng.uniform(3, 8)
+    while t < seconds:
+        # alt-tab, a few windows in quick succession
+        for _ in range(rng.choice((1, 2, 4, 8))):
+            pid = rng.choice(list(running) * 2 + windows)
+            child = pid in running and rng.random() < 0.3
+            name = running.get(pid, "explorer.exe")
+            events.append((us(t), FOCUS, pid + 1 if child else pid, name))
+            t += rng.uniform(0.03, 0.25)
+        # hotkeys of the focused window
+        for _ in range(rng.randint(0, 3)):
+            roll = rng.random()
+            events.append((us(t), KEY, True, '<alt_gr>'))
+            t += rng.uniform(0.05, 0.2)
+            if roll < 0.7:
+                # held volume key: auto-repeat after 500 ms, 30 per second
+                key = rng.choice(('<page_up>', '<page_down>'))
+                events.append((us(t), KEY, True, key))
+                t += 0.5
+                for _ in range(rng.choice((0, 5, 20, 60))):
+                    events.append((us(t), KEY, True, key))
+                    t += 1/30
+                events.append((us(t), KEY, False, key))
+            else:
+                key = '<shift>' if roll < 0.9 else '<end>'
+                events.append((us(t), KEY, True, key))
+                t += rng.uniform(0.05, 0.1)
+                events.append((us(t), KEY, False, key))
+            t += rng.uniform(0.02, 0.1)
+            events.append((us(t), KEY, False, '<alt_gr>'))
+            t += rng.uniform(0.1, 1.0)
+        if t >= next_churn:
+            del running[rng.choice(list(running))]
+            running[next_app] = f"app{next_app}.exe"
+            next_app += 4
+            snapshot(us(t))
+            next_churn = t + rng.uniform(3, 8)
+        t += rng.uniform(0.2, 2.0)
+    return events
+
+
+class TraceClock:
+    """Time of the replayed trace, in seconds: rate policies see the key events
+    as far apart as they were recorded, also when they are replayed faster.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class SessionReplay:
+    """Applies session snapshots to the simulated backend"""
+
+    def __init__(self, backend: SimulatedBackend) -> None:
+        self._backend = backend
+        self.names: Dict[int, str] = {} # pid -> name of the sessions
+
+    def apply(self, sessions) -> None:
+        # without the system sounds session, it has no process name
+        current = {pid: (name, volume, mute) for pid, name, volume, mute in sessions if name}
+        for pid, name in list(self.names.items()):
+            if current.get(pid, (None,))[0] != name:
+                self._backend.remove_session(pid)
+                desktop.remove_process(pid)
+                del self.names[pid]
+        for pid, (name, volume, mute) in current.items():
+            if pid not in self.names:
+                session = self._backend.add_session(pid, name, volume)
+                session.mute = mute
+                desktop.add_process(pid, name)
+                self.names[pid] = name
+
+
+def timed_actions(actions: Dict[str, Action], latencies: Dict[str, Histogram]) -> Dict[str, Action]:
+    """Actions whose callbacks add their duration to the histogram of the action"""
+    def timed(make, histogram):
+        def make_timed(**params):
+            callback = make(**params)
+            def run():
+                start = perf_counter_ns()
+                callback()
+                histogram.add(perf_counter_ns() - start)
+            return run
+        return make_timed
+    return {name: Action(timed(action.make, latencies.setdefault(name, Histogram())), **action.params)
+            for name, action in actions.items()}
+
+
+def replay(events: Iterable[TraceEvent], config: str, realtime: bool, com_latency: bool) -> dict:
+    # processes of the trace that could not be queried are not queried again quietly
+    logging.getLogger().setLevel(logging.ERROR)
+    app = QCoreApplication.instance() or QCoreApplication([])
+    if com_latency:
+        backend = SimulatedBackend(seed=1)
+    else:
+        backend = SimulatedBackend(latencies={op: LatencyModel(0.0) for op in DEFAULT_LATENCIES})
+    sessions = SessionReplay(backend)
+    foreground = SimulatedForegroundSource()
+    clock = perf_counter if realtime else TraceClock()
+    active_window = ActiveWindow_VolCtrl(backend=backend, foreground=foreground,
+                                         rate_policies=ActiveWindow_VolCtrl.default_rate_policies(clock))
+    background_apps = GroupVolCtrl(AllExceptForeground(foreground.current_pid), backend,
+                                   rate_policies=GroupVolCtrl.default_rate_policies(clock))
+    volume_controller = VolumeController([active_window], interval_ms=FRAME_MS)
+    signals = {'volume_changed': 0, 'volume_muted': 0, 'volume_unmuted': 0}
+    for name in signals:
+        getattr(volume_controller, name).connect(lambda *args, name=name: signals.__setitem__(name, signals[name]+1))
+
+    latencies: Dict[str, Histogram] = {}
+    commands = {name: (lambda: None) for name in ('toggle_mixer', 'quit', 'dump_trace', 'dump_log')}
+    actions = HotkeyActions(active_window, background_apps, backend, commands=commands).actions()
+    hk = HotkeySet()
+    hk.swap(load_bindings(config, timed_actions(actions, latencies)))
+
+    keys = {}
+    counts = {KEY: 0, FOCUS: 0, SESSIONS: 0}
+    start = perf_counter()
+    for event in events:
+        if realtime:
+            deadline = start + event[0] / 1e6
+            while perf_counter() < deadline:
+                app.processEvents()
+                time.sleep(min(0.001, max(0.0, deadline - perf_counter())))
+        else:
+            clock.now = event[0] / 1e6
+        kind = event[1]
+        counts[kind] += 1
+        if kind == KEY:
+            key = keys.get(event[3])
+            if key is None:
+                key = keys[event[3]] = parse_key(event[3])
+            (hk._on_press if event[2] else hk._on_release)(key)
+        elif kind == FOCUS:
+            pid, name = event[2], event[3]
+            if name and pid not in sessions.names:
+                desktop.add_process(pid, name)
+            foreground.focus(pid)
+        elif kind == SESSIONS:
+            sessions.apply(event[2])
+        app.processEvents()
+    elapsed = perf_counter() - start
+    # the last events of the bus are delivered after a frame
+    end = perf_counter() + 3 * FRAME_MS / 1000
+    while perf_counter() < end:
+        app.processEvents()
+        time.sleep(0.001)
+
+    names = get_process_name_cache_stats()
+    name_lookups = names['hits'] + names['misses']
+    return {
+        "events": counts,
+        "seconds": round(elapsed, 3),
+        "com_calls": dict(sorted(backend.stats.counts.items())),
+        "com_calls_total": backend.stats.total,
+        "session_cache": active_window.session_cache_stats,
+        "process_name_cache": dict(names, hit_rate=round(names['hits'] / name_lookups, 3) if name_lookups else 0.0),
+        "actions": {name: h.summary() for name, h in sorted(latencies.items()) if h.count},
+        "dropped": {action: s['dropped'] for action, s in active_window.rate_limit_stats.items() if s['dropped']},
+        "signals": signals,
+    }
+
+
+def print_report(report: dict) -> None:
+    counts = report['events']
+    print(f"{counts[KEY]} key events, {counts[FOCUS]} foreground changes, {counts[SESSIONS]} session snapshots "
+          f"in {report['seconds']:.2f}s")
+    print(f"COM calls: {report['com_calls_total']} " +
+          ", ".join(f"{op} {n}" for op, n in report['com_calls'].items()))
+    cache = report['session_cache']
+    print(f"session cache: hit rate {cache['hit_rate']:.3f} ({cache['hits']} hits, {cache['misses']} misses, "
+          f"{cache['prefetches']} prefetches)")
+    names = report['process_name_cache']
+    print(f"process name cache: hit rate {names['hit_rate']:.3f} ({names['hits']} hits, {names['misses']} misses)")
+    for name, s in report['actions'].items():
+        print(f"  {name:<16} {s['count']:>6}  p50 {s['p50_us']:>8.1f}us  p95 {s['p95_us']:>8.1f}us  "
+              f"p99 {s['p99_us']:>8.1f}us  max {s['max_us']:>8.1f}us")
+    if report['dropped']:
+        print("rate limited: " + ", ".join(f"{action} {n}" for action, n in report['dropped'].items()))
+    print("signals: " + ", ".join(f"{name} {n}" for name, n in report['signals'].items()))
+
+
+def compare(report: dict, baseline: dict) -> None:
+    """Print the metrics that differ from the baseline report"""
+    rows = [("COM calls", baseline['com_calls_total'], report['com_calls_total']),
+            ("session cache hit rate", baseline['session_cache']['hit_rate'], report['session_cache']['hit_rate']),
+            ("process name cache hit rate", baseline['process_name_cache']['hit_rate'],
+             report['process_name_cache']['hit_rate'])]
+    for name, s in report['actions'].items():
+        before = baseline['actions'].get(name)
+        if before:
+            rows.append((f"{name} p50 us", before['p50_us'], s['p50_us']))
+            rows.append((f"{name} p95 us", before['p95_us'], s['p95_us']))
+    print("\ncompared to the baseline:")
+    for name, before, after in rows:
+        change = f"{(after - before) / before * 100:+.1f}%" if before else ""
+        print(f"  {name:<32} {before:>10} -> {after:<10} {change}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('trace', nargs='?', help="trace file, a synthetic trace without it")
+    parser.add_argument('--realtime', action='store_true', help="replay at the speed of the recording")
+    parser.add_argument('--config', default=DEFAULT_CONFIG, help="hotkey config of the key events")
+    parser.add_argument('--no-com-latency', dest='com_latency', action='store_false',
+                        help="COM calls of the simulated backend return right away")
+    parser.add_argument('--report', help="write the report to this json file")
+    parser.add_argument('--baseline', help="report of another build to compare with")
+    parser.add_argument('--write-synthetic', metavar='PATH', help="write the synthetic trace and exit")
+    args = parser.parse_args()
+
+    if args.write_synthetic:
+        write_trace(args.write_synthetic, synthetic_trace())
+        sys.exit(0)
+    events = read_trace(args.trace) if args.trace else synthetic_trace()
+    report = replay(events, args.config, args.realtime, args.com_latency)
+    print_report(report)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
@@ -0,0 +1,20 @@
+"""Run every benchmark in this directory, one process each.
+
+Run: python benchmarks/run_all.py
+"""
+import os, subprocess, sys
+
+bench_path = os.path.dirname(os.path.realpath(__file__))
+
+
+if __name__ == '__main__':
+    failed = []
+    for name in sorted(os.listdir(bench_path)):
+        if not (name.startswith("bench_") and name.endswith(".py")):
+            continue
+        print(f"\n== {name}", flush=True)
+        if subprocess.call([sys.executable, os.path.join(bench_path, name)]) != 0:
+            failed.append(name)
+    if failed:
+        print(f"\nfailed: {', '.join(failed)}")
+        sys.exit(1)
@@ -0,0 +1,197 @@
+"""Soak test of the resident app: millions of simulated hotkey presses against
+the fake pycaw and pywin32 modules, while applications start and exit and the
+focus moves between them. Fails if the RSS, the live objects (tracemalloc, gc),
+the open COM interfaces of session wrappers or the open process handles keep
+growing after the warm-up.
+
+Every press looks the session up again (no session ttl), the lookups of
+windows without a session of their pid enumerate new session wrappers, like
+pycaw. With --monitor, sessions come from a SessionMonitor instead, and
+expired sessions are released by it.
+
+Not run by run_all.py, it takes minutes.
+
+Run: python benchmarks/soak_lifecycle.py [--presses N] [--monitor] [--no-tracemalloc]
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from contextlib import redirect_stdout
+from random import Random
+from time import perf_counter
+import _harness # adds src to sys.path
+from fakes.modules import install_fake_backend
+
+SESSIONS = 40
+FOCUS_EVERY = 20 # presses per focus change
+CHURN_EVERY = 500 # presses per application exiting and another one starting
+SAMPLES = 20
+WARMUP = 0.25 # part of the samples before the baseline
+
+# growth allowed between the first and the last quarter of the samples after the warm-up
+TOLERANCES = {
+    "rss": 16 * 2**20,
+    "traced": 2**20,
+    "objects": 10000,
+    "interfaces": 4 * SESSIONS,
+    "handles": 0,
+}
+
+audio, desktop = install_fake_backend(session_count=SESSIONS, fresh_wrappers=True)
+
+from audio.pycaw_backend import PycawBackend
+from audio.session_monitor import SessionMonitor, SimulatedSessionSource
+from process_volume_control import ActiveWindow_VolCtrl
+from utils.rate_limit import Unlimited
+
+
+def rss() -> int:
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+class Desktop:
+    """Applications of the fake desktop: the session pids, windows of other processes
+    of the same application (like browsers), and processes without audio.
+    """
+
+    def __init__(self, rng: Random, source: SimulatedSessionSource = None) -> None:
+        self._rng = rng
+        self._source = source
+        self._next_pid = 10000
+        self.window_pids = []
+        for pid in audio.pids():
+            if pid:
+                self._add_window(pid)
+        for i in range(4):
+            desktop.add_process(9000 + 4*i, f"shell{i}.exe")
+            self.window_pids.append(9000 + 4*i)
+
+    def _add_window(self, pid: int) -> None:
+        name = audio.session(pid).Process.name()
+        self.window_pids.append(pid)
+        # a window of a child process, found by the process name
+        desktop.add_process(pid + 1, name)
+        self.window_pids.append(pid + 1)
+
+    def focus(self) -> None:
+        desktop.focus(self._rng.choice(self.window_pids))
+
+    def churn(self, backend: PycawBackend) -> None:
+        # the oldest application exits, pids are reused by the next ones
+        pid = next(pid for pid in self.window_pids if audio.session(pid) is not None)
+        self.window_pids.remove(pid)
+        self.window_pids.remove(pid + 1)
+        session = backend.session_by_pid(pid)
+        audio.remove_session(pid)
+        desktop.remove_process(pid)
+        desktop.remove_process(pid + 1)
+        if self._source is not None and session is not None:
+            self._source.expire(session)
+
+        new_pid = self._next_pid
+        self._next_pid = 10000 + (self._next_pid - 10000 + 8) % (64 * SESSIONS)
+        session = audio.add_session(new_pid, f"app{new_pid}.exe")
+        desktop.add_process(new_pid, f"app{new_pid}.exe")
+        self._add_window(new_pid)
+        if self._source is not None:
+            self._source.create(session)
+        if desktop.foreground_pid not in self.window_pids:
+            self.focus()
+
+
+def sample(presses: int, backend: PycawBackend, ctrl: ActiveWindow_VolCtrl, traced: bool) -> dict:
+    gc.collect()
+    return {
+        "presses": presses,
+        "rss": rss(),
+        "traced": tracemalloc.get_traced_memory()[0] if traced else 0,
+        "objects": len(gc.get_objects()),
+        "interfaces": audio.open_interfaces,
+        "handles": desktop.open_handles,
+        "registry": len(backend.registry),
+        "cached": len(ctrl._session_cache),
+    }
+
+
+def grown(samples: list) -> dict:
+    """Metrics whose last quarter exceeds the first quarter after the warm-up by more than their tolerance"""
+    after_warmup = samples[int(len(samples) * WARMUP):]
+    quarter = max(1, len(after_warmup) // 4)
+    growth = {}
+    for metric, tolerance in TOLERANCES.items():
+        baseline = max(s[metric] for s in after_warmup[:quarter])
+        last = max(s[metric] for s in after_warmup[-quarter:])
+        if last - baseline > tolerance:
+            growth[metric] = last - baseline
+    return growth
+
+
+def soak(presses: int, monitor: bool, traced: bool) -> int:
+    rng = Random(1)
+    source = None
+    if monitor:
+        source = SimulatedSessionSource(audio.GetAllSessions())
+        session_monitor = SessionMonitor(source)
+        session_monitor.start()
+        backend = PycawBackend(session_monitor)
+    else:
+        backend = PycawBackend()
+    policies = {action: Unlimited() for action in
+                ('volume_up', 'volume_down', 'set_volume', 'mute', 'unmute', 'toggle_mute')}
+    ctrl = ActiveWindow_VolCtrl(backend=backend, rate_policies=policies, session_ttl=0.0)
+    apps = Desktop(rng, source)
+    actions = [ctrl.volume_up] * 9 + [ctrl.volume_down] * 9 + [ctrl.toggle_mute, lambda: ctrl.set_volume(50)]
+
+    if traced:
+        tracemalloc.start()
+    samples = []
+    every = max(1, presses // SAMPLES)
+    print(f"{'presses':>10} {'rss MiB':>8} {'traced KiB':>10} {'objects':>8} {'interfaces':>10} "
+          f"{'handles':>7} {'registry':>8} {'cached':>6}")
+    start = perf_counter()
+    with open(os.devnull, 'w') as devnull:
+        for i in range(presses):
+            if i % FOCUS_EVERY == 0:
+                apps.focus()
+            if i % CHURN_EVERY == 0:
+                apps.churn(backend)
+            with redirect_stdout(devnull):
+                rng.choice(actions)()
+            if (i + 1) % every == 0:
+                s = sample(i + 1, backend, ctrl, traced)
+                samples.append(s)
+                print(f"{s['presses']:>10} {s['rss']/2**20:>8.1f} {s['traced']/1024:>10.1f} {s['objects']:>8} "
+                      f"{s['interfaces']:>10} {s['handles']:>7} {s['registry']:>8} {s['cached']:>6}", flush=True)
+    elapsed = perf_counter() - start
+    if traced:
+        tracemalloc.stop()
+
+    print(f"{presses} presses in {elapsed:.1f}s ({elapsed/presses*1e6:.1f}us per press), "
+          f"{backend.registry.released} enumerated wrappers released"
+          + (f", {source.released} expired sessions released" if source else ""))
+    growth = grown(samples)
+    for metric, value in growth.items():
+        print(f"FAIL {metric} grew by {value} (tolerance {TOLERANCES[metric]})")
+    if not growth:
+        print("ok, nothing grows")
+    return 1 if growth else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--presses', type=int, default=2000000)
+    parser.add_argument('--monitor', action='store_true', help="sessions from a SessionMonitor")
+    parser.add_argument('--no-tracemalloc', dest='traced', action='store_false', help="faster, without traced memory")
+    args = parser.parse_args()
+    sys.exit(soak(args.presses, args.monitor, args.traced))
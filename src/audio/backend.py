@@ -0,0 +1,104 @@
+from abc import ABC, abstractmethod
+from typing import Any, Callable, List, Optional, Tuple
+from utils.event import Event
+from utils.log import get_logger
+
+log = get_logger(__name__)
+
+
+class AudioBackend(ABC):
+    """Audio sessions and their volume, independent of the audio API.
+
+    Sessions are opaque objects of the backend, only passed back to it.
+    Volumes are scalars between 0.0 and 1.0.
+    """
+
+    def __init__(self) -> None:
+        self._session_created_event = Event()
+        self._session_expired_event = Event()
+        self._volume_changed_event = Event()
+
+    @abstractmethod
+    def sessions(self) -> List[Any]:
+        """All known sessions"""
+        pass
+
+    @abstractmethod
+    def session_by_pid(self, pid: int) -> Optional[Any]:
+        pass
+
+    @abstractmethod
+    def session_by_name(self, name: str) -> Optional[Any]:
+        """First session of a process name (case insensitive)"""
+        pass
+
+    @abstractmethod
+    def session_pid(self, session) -> int:
+        pass
+
+    @abstractmethod
+    def session_name(self, session) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def get_volume(self, session) -> float:
+        pass
+
+    @abstractmethod
+    def set_volume(self, session, volume: float) -> None:
+        pass
+
+    def set_volumes(self, volumes: List[Tuple[Any, float]]) -> None:
+        """Set the volume of many sessions in one pass. A session that fails,
+        e.g. it expired meanwhile, does not stop the other writes.
+
+        Args:
+            volumes (List[Tuple[Any, float]]): (session, volume) pairs
+        """
+        for session, volume in volumes:
+            try:
+                self.set_volume(session, volume)
+            except Exception:
+                log.debug("could not set volume", exc_info=True)
+
+    @abstractmethod
+    def get_mute(self, session) -> bool:
+        pass
+
+    @abstractmethod
+    def set_mute(self, session, mute: bool) -> None:
+        pass
+
+    @abstractmethod
+    def get_peak(self, session) -> float:
+        """Peak level (0.0 - 1.0) of the audio played by a session during the last period"""
+        pass
+
+    def get_peaks(self, sessions: List[Any]) -> List[float]:
+        """Peak levels of many sessions in one pass"""
+        return [self.get_peak(session) for session in sessions]
+
+    def subscribe(self, on_created: Callable = None, on_expired: Callable = None,
+                  on_volume_changed: Callable = None) -> None:
+        """Subscribe to session and volume changes, see the event properties"""
+        if on_created:
+            self._session_created_event.append(on_created)
+        if on_expired:
+            self._session_expired_event.append(on_expired)
+        if on_volume_changed:
+            self._volume_changed_event.append(on_volume_changed)
+
+    @property
+    def session_created_event(self) -> Event:
+        """Session created event, args: (session)"""
+        return self._session_created_event
+
+    @property
+    def session_expired_event(self) -> Event:
+        """Session expired event, args: (session)"""
+        return self._session_expired_event
+
+    @property
+    def volume_changed_event(self) -> Event:
+        """Volume or mute of a session changed, also by this backend, args: (session, volume: float, mute: bool)"""
+        return self._volume_changed_event
@@ -0,0 +1,197 @@
+import threading
+from collections import deque
+from time import perf_counter_ns
+from typing import Callable, Hashable
+from utils.log import get_logger
+from utils.tracing import tracer
+
+log = get_logger(__name__)
+
+
+def _co_initialize():
+    """Initialize COM (multithreaded apartment) for the current thread.
+
+    Returns:
+        Callable: uninitializer, or None when COM is not available
+    """
+    try:
+        import comtypes
+    except ImportError:
+        return None
+    comtypes.CoInitializeEx(comtypes.COINIT_MULTITHREADED)
+    return comtypes.CoUninitialize
+
+
+class _Command:
+    __slots__ = ('func', 'args', 'key', 'queued_ns')
+
+    def __init__(self, func: Callable, args: tuple, key: Hashable) -> None:
+        self.func = func
+        self.args = args
+        self.key = key
+        self.queued_ns = perf_counter_ns() if tracer.enabled else 0
+
+
+class AudioCommandExecutor:
+    """Runs audio commands on a single thread that owns all COM interaction.
+
+    Commands submitted with a key are coalesced while they wait in the queue:
+    submit() keeps the latest arguments, submit_delta() sums the deltas, so
+    a burst of key repeats ends up as a single write.
+    """
+
+    def __init__(self, name: str = "audio-commands") -> None:
+        self._name = name
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._pending = {}
+        self._thread = None
+        self._running = False
+
+        self.submitted = 0
+        self.executed = 0
+        self.coalesced = 0
+
+    def start(self) -> None:
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """Stop the executor thread. Commands still in the queue are dropped."""
+        with self._cond:
+            self._running = False
+            self._queue.clear()
+            self._pending.clear()
+            self._cond.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def is_executor_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def submit(self, func: Callable, *args, key: Hashable = None) -> bool:
+        """Queue func(*args). If a command with the same key is still queued,
+        its arguments are replaced instead (latest value wins).
+
+        Returns:
+            bool: False if the command was merged into a queued command
+        """
+        with self._cond:
+            self.submitted += 1
+            if key is not None:
+                command = self._pending.get(key)
+                if command is not None:
+                    command.func = func
+                    command.args = args
+                    self.coalesced += 1
+                    return False
+            command = _Command(func, args, key)
+            if key is not None:
+                self._pending[key] = command
+            self._queue.append(command)
+            self._cond.notify()
+            return True
+
+    def submit_delta(self, key: Hashable, func: Callable[[float], None], delta: float) -> bool:
+        """Queue func(delta). If a delta with the same key is still queued,
+        the deltas are summed into one call.
+
+        Returns:
+            bool: False if the delta was merged into a queued delta
+        """
+        with self._cond:
+            self.submitted += 1
+            command = self._pending.get(key)
+            if command is not None:
+                command.args = (command.args[0] + delta,)
+                self.coalesced += 1
+                return False
+            command = _Command(func, (delta,), key)
+            self._pending[key] = command
+            self._queue.append(command)
+            self._cond.notify()
+            return True
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "submitted": self.submitted,
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "queued": len(self._queue),
+            }
+
+    def _next(self):
+        with self._cond:
+            while self._running and not self._queue:
+                self._cond.wait()
+            if not self._running:
+                return None
+            command = self._queue.popleft()
+            if command.key is not None:
+                del self._pending[command.key]
+            return command
+
+    def _run(self) -> None:
+        co_uninitialize = _co_initialize()
+        try:
+            while True:
+                command = self._next()
+                if command is None:
+                    break
+                if command.queued_ns:
+                    tracer.record('executor_queue', perf_counter_ns() - command.queued_ns)
+                try:
+                    command.func(*command.args)
+                except Exception:
+                    log.exception("audio command failed", command=getattr(command.func, '__qualname__', None))
+                self.executed += 1
+        finally:
+            if co_uninitialize is not None:
+                co_uninitialize()
+
+
+class InlineExecutor:
+    """Executor with the same interface as AudioCommandExecutor that runs
+    commands immediately on the calling thread. Commands submitted from
+    several threads, e.g. a hotkey and a session notification, run one at a
+    time, like on the executor thread.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self.submitted = 0
+        self.executed = 0
+        self.coalesced = 0
+
+    def start(self) -> None:
+        pass
+
+    def stop(self, timeout: float = 1.0) -> None:
+        pass
+
+    def is_executor_thread(self) -> bool:
+        return True
+
+    def submit(self, func: Callable, *args, key: Hashable = None) -> bool:
+        with self._lock:
+            self.submitted += 1
+            func(*args)
+            self.executed += 1
+        return True
+
+    def submit_delta(self, key: Hashable, func: Callable[[float], None], delta: float) -> bool:
+        return self.submit(func, delta)
+
+    def stats(self) -> dict:
+        return {
+            "submitted": self.submitted,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "queued": 0,
+        }
@@ -0,0 +1,112 @@
+import threading
+from array import array
+from typing import Any, Callable, List
+from audio.backend import AudioBackend
+from audio.command_executor import InlineExecutor
+
+
+class PeakSampler:
+    """Samples the peak levels of a few sessions at a fixed rate.
+
+    The sessions to meter are asked from a provider on every sample, and all
+    their peaks are read in one pass into a preallocated ring buffer with one
+    row of max_meters levels per sample. Sampling only runs between resume()
+    and pause(), a paused sampler costs nothing.
+
+    Samples are read on the executor thread; readers on other threads only
+    see complete floats, at worst from the previous sample.
+    """
+
+    def __init__(self, backend: AudioBackend, sessions: Callable[[], List[Any]], executor=None,
+                 rate: float = 30.0, max_meters: int = 1, history: int = 32) -> None:
+        """
+        Args:
+            backend (AudioBackend): backend of the sessions
+            sessions (Callable[[], List[Any]]): sessions to meter, called on every sample
+            executor (AudioCommandExecutor, optional): runs all audio (COM) calls.
+                Defaults to running them on the sampling thread.
+            rate (float, optional): samples per second. Defaults to 30.0.
+            max_meters (int, optional): max number of sessions metered. Defaults to 1.
+            history (int, optional): samples kept in the ring buffer. Defaults to 32.
+        """
+        self._backend = backend
+        self._sessions = sessions
+        self._executor = executor if executor is not None else InlineExecutor()
+        self._interval = 1.0 / rate
+        self._max_meters = max_meters
+        self._history = history
+
+        self._ring = array('f', bytes(4 * max_meters * history))
+        self._head = 0 # next row to write
+        self._meters = 0 # sessions metered by the last sample
+
+        self._active = threading.Event()
+        self._running = False
+        self._thread = None
+        self.samples = 0
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    @property
+    def meters(self) -> int:
+        return self._meters
+
+    def start(self) -> None:
+        """Start the sampling thread, paused"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="peak-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        self._active.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+
+    def resume(self) -> None:
+        self._active.set()
+
+    def pause(self) -> None:
+        self._active.clear()
+
+    @property
+    def paused(self) -> bool:
+        return not self._active.is_set()
+
+    def _run(self) -> None:
+        wait = threading.Event().wait
+        while self._running:
+            self._active.wait()
+            if not self._running:
+                break
+            self._executor.submit(self._sample, key=(id(self), 'sample'))
+            wait(self._interval)
+
+    def _sample(self) -> None:
+        sessions = self._sessions()[:self._max_meters]
+        peaks = self._backend.get_peaks(sessions) if sessions else []
+        row = self._head * self._max_meters
+        ring = self._ring
+        for i, peak in enumerate(peaks):
+            ring[row + i] = peak
+        for i in range(len(peaks), self._max_meters):
+            ring[row + i] = 0.0
+        self._meters = len(peaks)
+        self._head = (self._head + 1) % self._history
+        self.samples += 1
+
+    def latest(self, meter: int = 0) -> float:
+        """Last sampled peak of a meter"""
+        row = (self._head - 1) % self._history
+        return self._ring[row * self._max_meters + meter]
+
+    def recent(self, meter: int = 0) -> List[float]:
+        """Sampled peaks of a meter, oldest first"""
+        head = self._head
+        return [self._ring[((head + i) % self._history) * self._max_meters + meter]
+                for i in range(self._history)]
@@ -0,0 +1,76 @@
+from typing import Any, List, Optional
+from audio.backend import AudioBackend
+from audio.session_monitor import SessionMonitor
+from audio.session_registry import SessionRegistry, release_session, session_process_name
+
+
+class PycawBackend(AudioBackend):
+    """Audio sessions of the default endpoint, through pycaw (Windows Core Audio).
+    All calls must be made from the thread owning COM, see AudioCommandExecutor.
+    """
+
+    def __init__(self, monitor: SessionMonitor = None) -> None:
+        """
+        Args:
+            monitor (SessionMonitor, optional): keeps the sessions up to date from notifications.
+                Without it sessions are enumerated again when a lookup misses.
+        """
+        super().__init__()
+        self._monitor = monitor
+        if monitor is not None:
+            self._registry = monitor.registry
+            monitor.session_created_event.append(self._session_created_event)
+            monitor.session_expired_event.append(self._session_expired_event)
+            monitor.session_volume_changed_event.append(self._volume_changed_event)
+        else:
+            from pycaw.pycaw import AudioUtilities
+            self._registry = SessionRegistry(AudioUtilities.GetAllSessions, release=release_session)
+
+    @property
+    def registry(self) -> SessionRegistry:
+        return self._registry
+
+    def sessions(self) -> List[Any]:
+        if len(self._registry) == 0:
+            self._registry.refresh()
+        return self._registry.sessions()
+
+    def session_by_pid(self, pid: int) -> Optional[Any]:
+        return self._registry.get_by_pid(pid)
+
+    def session_by_name(self, name: str) -> Optional[Any]:
+        session = self._registry.get_by_name(name)
+        # sessions might have been created since last lookup
+        if session is None and self._registry.refresh():
+            session = self._registry.get_by_name(name)
+        return session
+
+    def session_pid(self, session) -> int:
+        return session.ProcessId
+
+    def session_name(self, session) -> Optional[str]:
+        return self._registry.name_of(session.ProcessId) or session_process_name(session)
+
+    def get_volume(self, session) -> float:
+        return session.SimpleAudioVolume.GetMasterVolume()
+
+    def set_volume(self, session, volume: float) -> None:
+        session.SimpleAudioVolume.SetMasterVolume(volume, None)
+
+    def _meter(self, session):
+        # kept on the session, so it is released with it, see release_session
+        meter = getattr(session, '_meter', None)
+        if meter is None:
+            from pycaw.pycaw import IAudioMeterInformation
+            meter = session._ctl.QueryInterface(IAudioMeterInformation)
+            session._meter = meter
+        return meter
+
+    def get_peak(self, session) -> float:
+        return self._meter(session).GetPeakValue()
+
+    def get_mute(self, session) -> bool:
+        return bool(session.SimpleAudioVolume.GetMute())
+
+    def set_mute(self, session, mute: bool) -> None:
+        session.SimpleAudioVolume.SetMute(int(mute), None)
@@ -0,0 +1,210 @@
+import threading
+from array import array
+from time import perf_counter, perf_counter_ns
+from typing import Any, Callable, Dict, List, Tuple
+from audio.backend import AudioBackend
+from audio.command_executor import InlineExecutor
+
+# smallest volume change that is written, finer steps are not audible
+VOLUME_RESOLUTION = 0.005
+
+
+def linear(progress: float) -> float:
+    return progress
+
+def smoothstep(progress: float) -> float:
+    return progress * progress * (3.0 - 2.0 * progress)
+
+
+class RampScheduler:
+    """Fades session volumes toward targets over time.
+
+    All active ramps share one tick. A tick computes every ramp in one pass
+    over flat arrays, and only writes volumes that changed by at least
+    VOLUME_RESOLUTION since the last write. Starting a ramp on a session that
+    is already ramping retargets it from its current volume.
+
+    Ramps are computed and written on the executor thread; the tick thread only
+    schedules ticks, and a tick still queued is not scheduled twice. The ramps
+    are guarded by a lock, callers on other threads (e.g. with an
+    InlineExecutor, or a group with its own executor) see whole ticks.
+    """
+
+    def __init__(self, backend: AudioBackend, executor=None, tick_interval: float = 1/60,
+                 resolution: float = VOLUME_RESOLUTION, easing: Callable[[float], float] = smoothstep) -> None:
+        """
+        Args:
+            backend (AudioBackend): backend of the sessions
+            executor (AudioCommandExecutor, optional): runs all audio (COM) calls.
+                Defaults to running them on the tick thread.
+            tick_interval (float, optional): seconds between ticks. Defaults to 1/60.
+            resolution (float, optional): smallest volume change written. Defaults to VOLUME_RESOLUTION.
+            easing (Callable, optional): maps linear progress (0..1) to eased progress. Defaults to smoothstep.
+        """
+        self._backend = backend
+        self._executor = executor if executor is not None else InlineExecutor()
+        self._tick_interval = tick_interval
+        self._resolution = resolution
+        self._easing = easing
+
+        # one slot per ramp, guarded by _lock
+        self._lock = threading.RLock()
+        self._sessions: List[Any] = []
+        self._slots: Dict[int, int] = {} # id(session) -> slot
+        self._start = array('d')
+        self._target = array('d')
+        self._t0 = array('d')
+        self._duration = array('d')
+        self._written = array('d')
+
+        # writes to an expired session would fail
+        backend.session_expired_event.append(lambda session: self._executor.submit(self.cancel, session))
+
+        self._active = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.ticks = 0
+        self.writes = 0
+        self.skipped = 0
+        self.tick_ns = 0 # total time spent in ticks
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="volume-ramps", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._active.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(1.0)
+        self._thread = None
+
+    def ramp(self, session, target: float, duration: float) -> None:
+        """Fade the volume of a session to target (0.0 - 1.0) in duration seconds"""
+        self._executor.submit(self.start_ramps, [(session, target)], duration)
+
+    def start_ramps(self, targets: List[Tuple[Any, float]], duration: float) -> None:
+        """Start (or retarget) ramps of many sessions. Must run on the executor thread.
+
+        Args:
+            targets (List[Tuple[Any, float]]): (session, target volume) pairs
+            duration (float): seconds until the targets are reached
+        """
+        with self._lock:
+            now = perf_counter()
+            for session, target in targets:
+                target = max(0.0, min(1.0, target))
+                slot = self._slots.get(id(session))
+                if slot is not None:
+                    # retarget from the current volume of the running ramp
+                    self._start[slot] = self._value(slot, now)
+                    self._target[slot] = target
+                    self._t0[slot] = now
+                    self._duration[slot] = duration
+                    continue
+                volume = self._backend.get_volume(session)
+                self._slots[id(session)] = len(self._sessions)
+                self._sessions.append(session)
+                self._start.append(volume)
+                self._target.append(target)
+                self._t0.append(now)
+                self._duration.append(duration)
+                self._written.append(volume)
+            if self._sessions:
+                self._active.set()
+
+    def target_of(self, session) -> float:
+        """Target volume of a running ramp, or None"""
+        with self._lock:
+            slot = self._slots.get(id(session))
+            return self._target[slot] if slot is not None else None
+
+    def cancel(self, session) -> None:
+        """Stop the ramp of a session at its current volume"""
+        with self._lock:
+            slot = self._slots.get(id(session))
+            if slot is not None:
+                self._remove([slot])
+
+    def _value(self, slot: int, now: float) -> float:
+        duration = self._duration[slot]
+        progress = 1.0 if duration <= 0.0 else min(1.0, (now - self._t0[slot]) / duration)
+        start = self._start[slot]
+        return start + (self._target[slot] - start) * self._easing(progress)
+
+    def _tick(self) -> None:
+        start_ns = perf_counter_ns()
+        with self._lock:
+            now = perf_counter()
+            writes = []
+            finished = []
+            start, target, t0, duration, written = self._start, self._target, self._t0, self._duration, self._written
+            easing, resolution = self._easing, self._resolution
+            for slot in range(len(self._sessions)):
+                d = duration[slot]
+                progress = 1.0 if d <= 0.0 else min(1.0, (now - t0[slot]) / d)
+                value = start[slot] + (target[slot] - start[slot]) * easing(progress)
+                if progress >= 1.0:
+                    finished.append(slot)
+                    value = target[slot]
+                    unchanged = value == written[slot]
+                else:
+                    unchanged = abs(value - written[slot]) < resolution
+                if unchanged:
+                    self.skipped += 1
+                    continue
+                written[slot] = value
+                writes.append((self._sessions[slot], value))
+
+            if finished:
+                self._remove(finished)
+            if not self._sessions:
+                self._active.clear()
+            self.ticks += 1
+
+        # the writes are taken, ramps started meanwhile are written on the next tick
+        if writes:
+            self._backend.set_volumes(writes)
+            self.writes += len(writes)
+        self.tick_ns += perf_counter_ns() - start_ns
+
+    def _remove(self, slots: List[int]) -> None:
+        # _lock is held; swap with the last slot and pop, highest slots first so indexes stay valid
+        for slot in sorted(slots, reverse=True):
+            last = len(self._sessions) - 1
+            del self._slots[id(self._sessions[slot])]
+            if slot != last:
+                moved = self._sessions[last]
+                self._sessions[slot] = moved
+                self._slots[id(moved)] = slot
+                for values in (self._start, self._target, self._t0, self._duration, self._written):
+                    values[slot] = values[last]
+            self._sessions.pop()
+            for values in (self._start, self._target, self._t0, self._duration, self._written):
+                values.pop()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._active.wait()
+            if self._stopped.is_set():
+                break
+            self._executor.submit(self._tick, key=(id(self), 'tick'))
+            self._stopped.wait(self._tick_interval)
+
+    def stats(self) -> dict:
+        with self._lock:
+            active = len(self._sessions)
+        return {
+            "active": active,
+            "ticks": self.ticks,
+            "writes": self.writes,
+            "skipped": self.skipped,
+            "mean_tick_us": round(self.tick_ns / self.ticks / 1000, 2) if self.ticks else 0,
+        }
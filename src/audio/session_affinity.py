@@ -0,0 +1,108 @@
+from typing import Any, Dict, Optional, Tuple
+from audio.backend import AudioBackend
+from utils.process_tree import ProcessTree
+
+
+class SessionAffinity:
+    """Audio sessions of the application of a process, from a ProcessTree.
+
+    An application is a tree of processes with the same exe name, its root is
+    the highest ancestor of a process with that name. The windows and child
+    processes of a browser or an Electron app share their sessions this way,
+    two instances of an app do not, and a shell does not get the sessions of
+    the apps it started. The sessions found for an application are cached
+    until one of its sessions is created or expires, or the processes change.
+
+    Not thread safe, used on the thread of the audio calls.
+    """
+
+    def __init__(self, tree: ProcessTree, backend: AudioBackend) -> None:
+        self._tree = tree
+        self._backend = backend
+        self._roots: Dict[int, int] = {} # pid -> application root
+        self._sessions: Dict[int, Tuple[Any, ...]] = {} # application root -> sessions, closest first
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def tree(self) -> ProcessTree:
+        return self._tree
+
+    def root(self, pid: int) -> Optional[int]:
+        """Application root of a known process, None for a process the tree does not know"""
+        root = self._roots.get(pid)
+        if root is None and pid in self._tree:
+            root = self._roots[pid] = self._tree.app_root(pid)
+        return root
+
+    def _refresh(self) -> None:
+        if self._tree.refresh():
+            self._roots.clear()
+            self._sessions.clear()
+
+    def _validate(self, pid: int, name: str = None) -> None:
+        known = pid in self._tree
+        if not self._tree.validate(pid, name):
+            # a process started since the last refresh, or a reused pid
+            if known:
+                self._roots.clear()
+                self._sessions.clear()
+            self._refresh()
+
+    def sessions(self, pid: int, name: str = None) -> Optional[Tuple[Any, ...]]:
+        """Sessions of the application of a process, the ones of the closest processes first
+
+        Args:
+            pid (int): process id
+            name (str, optional): exe name of the process, if known. A process of the
+                tree with another name had the pid before.
+
+        Returns:
+            Optional[Tuple]: None if the process is not running
+        """
+        self._validate(pid, name)
+        root = self.root(pid)
+        if root is None:
+            return None
+        sessions = self._sessions.get(root)
+        if sessions is not None:
+            self.hits += 1
+            return sessions
+        self.misses += 1
+        found = []
+        for descendant in self._tree.descendants(root, same_name=True):
+            session = self._backend.session_by_pid(descendant)
+            if session is not None:
+                found.append(session)
+        sessions = self._sessions[root] = tuple(found)
+        return sessions
+
+    def session_changed(self, session) -> Optional[int]:
+        """Forget the sessions of the application of a session that was created or expired
+
+        Returns:
+            Optional[int]: application root of the session, None if it is unknown
+                and everything was forgotten
+        """
+        try:
+            pid = self._backend.session_pid(session)
+        except Exception:
+            pid = None
+        if pid is not None:
+            self._validate(pid)
+        root = self.root(pid) if pid is not None else None
+        if root is None:
+            self._sessions.clear()
+            return None
+        self._sessions.pop(root, None)
+        return root
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "applications": len(self._sessions),
+            **self._tree.stats(),
+        }
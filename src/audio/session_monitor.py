@@ -0,0 +1,277 @@
+from abc import ABC, abstractmethod
+from typing import Any, Callable, List
+from audio.session_registry import SessionRegistry, release_session
+from utils.event import Event
+
+# AudioSessionState (audiosessiontypes.h)
+SESSION_INACTIVE = 0
+SESSION_ACTIVE = 1
+SESSION_EXPIRED = 2
+
+
+class SessionNotificationSource(ABC):
+    """Source of audio session notifications.
+
+    Callbacks:
+        on_created(session): a new session was created
+        on_expired(session): a session expired or was disconnected
+        on_state_changed(session, state: int): state of a watched session changed
+        on_volume_changed(session, volume: float, mute: bool): volume of a watched session changed
+    """
+
+    @abstractmethod
+    def sessions(self) -> List[Any]:
+        """All sessions that exist right now. Only called once, at startup."""
+        pass
+
+    @abstractmethod
+    def subscribe(self, on_created: Callable, on_expired: Callable, on_state_changed: Callable,
+                  on_volume_changed: Callable = None) -> None:
+        pass
+
+    @abstractmethod
+    def unsubscribe(self) -> None:
+        pass
+
+    def watch(self, session) -> None:
+        """Start receiving state changes for a session."""
+        pass
+
+    def unwatch(self, session) -> None:
+        """Stop receiving state changes for a session."""
+        pass
+
+    def release(self, session) -> None:
+        """Release a session that expired or was replaced, it is not used afterwards."""
+        pass
+
+
+class PycawSessionSource(SessionNotificationSource):
+    """Session notifications from the default audio endpoint, through pycaw.
+    Notifications arrive on COM worker threads.
+    """
+
+    def __init__(self) -> None:
+        self._manager = None
+        self._notification = None
+        self._callbacks = None
+
+    def sessions(self) -> List[Any]:
+        from pycaw.pycaw import AudioUtilities
+        # enumerating is also needed for the session manager to start sending notifications
+        return AudioUtilities.GetAllSessions()
+
+    def subscribe(self, on_created: Callable, on_expired: Callable, on_state_changed: Callable,
+                  on_volume_changed: Callable = None) -> None:
+        from pycaw.pycaw import AudioUtilities
+        from pycaw.callbacks import AudioSessionNotification
+
+        class _SessionCreated(AudioSessionNotification):
+            def on_session_created(self, new_session):
+                on_created(new_session)
+
+        self._callbacks = (on_created, on_expired, on_state_changed, on_volume_changed)
+        self._manager = AudioUtilities.GetAudioSessionManager()
+        self._notification = _SessionCreated()
+        self._manager.RegisterSessionNotification(self._notification)
+
+    def unsubscribe(self) -> None:
+        if self._manager is not None and self._notification is not None:
+            self._manager.UnregisterSessionNotification(self._notification)
+        self._manager = None
+        self._notification = None
+        self._callbacks = None
+
+    def watch(self, session) -> None:
+        if self._callbacks is None:
+            return
+        from pycaw.callbacks import AudioSessionEvents
+        _, on_expired, on_state_changed, on_volume_changed = self._callbacks
+
+        class _SessionEvents(AudioSessionEvents):
+            def on_simple_volume_changed(self, new_volume, new_mute, event_context):
+                if on_volume_changed:
+                    on_volume_changed(session, new_volume, bool(new_mute))
+
+            def on_state_changed(self, new_state, new_state_id):
+                on_state_changed(session, new_state_id)
+
+            def on_session_disconnected(self, disconnect_reason, disconnect_reason_id):
+                on_expired(session)
+
+        session.register_notification(_SessionEvents())
+
+    def unwatch(self, session) -> None:
+        try:
+            session.unregister_notification()
+        except Exception:
+            # session might already be released
+            pass
+
+    def release(self, session) -> None:
+        release_session(session)
+
+
+class SimulatedSessionSource(SessionNotificationSource):
+    """In-memory notification source. Notifications are delivered synchronously
+    on the thread calling create(), expire() or set_state().
+    """
+
+    def __init__(self, sessions: List[Any] = None) -> None:
+        self._sessions = list(sessions or [])
+        self._watched = set()
+        self.released = 0
+        self._on_created = None
+        self._on_expired = None
+        self._on_state_changed = None
+        self._on_volume_changed = None
+
+    def sessions(self) -> List[Any]:
+        return list(self._sessions)
+
+    def subscribe(self, on_created: Callable, on_expired: Callable, on_state_changed: Callable,
+                  on_volume_changed: Callable = None) -> None:
+        self._on_created = on_created
+        self._on_expired = on_expired
+        self._on_state_changed = on_state_changed
+        self._on_volume_changed = on_volume_changed
+
+    def unsubscribe(self) -> None:
+        self._on_created = self._on_expired = self._on_state_changed = self._on_volume_changed = None
+
+    def watch(self, session) -> None:
+        self._watched.add(id(session))
+
+    def unwatch(self, session) -> None:
+        self._watched.discard(id(session))
+
+    def release(self, session) -> None:
+        self.released += 1
+        release_session(session)
+
+    def create(self, session) -> None:
+        self._sessions.append(session)
+        if self._on_created:
+            self._on_created(session)
+
+    def expire(self, session) -> None:
+        if session in self._sessions:
+            self._sessions.remove(session)
+        if self._on_expired:
+            self._on_expired(session)
+
+    def set_state(self, session, state: int) -> None:
+        if id(session) in self._watched and self._on_state_changed:
+            self._on_state_changed(session, state)
+
+    def set_volume(self, session, volume: float, mute: bool = False) -> None:
+        if id(session) in self._watched and self._on_volume_changed:
+            self._on_volume_changed(session, volume, mute)
+
+
+class SessionMonitor:
+    """Keeps a SessionRegistry up to date from session notifications,
+    so sessions never have to be enumerated again after start().
+
+    Sessions that expire or are replaced by a new session of their pid are
+    released after their event was sent.
+    """
+
+    def __init__(self, source: SessionNotificationSource, registry: SessionRegistry = None,
+                 release: Callable[[Any], None] = None) -> None:
+        """
+        Args:
+            source (SessionNotificationSource): session notifications
+            registry (SessionRegistry, optional): registry to keep up to date. Defaults to a new one.
+            release (Callable, optional): releases a session, e.g. source.release queued on the
+                audio thread, after the commands already queued for the session. Defaults to source.release.
+        """
+        self._source = source
+        self._release = release if release is not None else source.release
+        # registry without provider, it is only updated from notifications
+        self._registry = registry if registry is not None else SessionRegistry()
+        self._running = False
+
+        self._session_created_event = Event()
+        self._session_expired_event = Event()
+        self._session_state_changed_event = Event()
+        self._session_volume_changed_event = Event()
+
+    @property
+    def registry(self) -> SessionRegistry:
+        return self._registry
+
+    @property
+    def session_created_event(self) -> Event:
+        """Session created event, args: (session)"""
+        return self._session_created_event
+
+    @property
+    def session_expired_event(self) -> Event:
+        """Session expired event, args: (session)"""
+        return self._session_expired_event
+
+    @property
+    def session_state_changed_event(self) -> Event:
+        """Session state changed event, args: (session, state: int)"""
+        return self._session_state_changed_event
+
+    @property
+    def session_volume_changed_event(self) -> Event:
+        """Session volume changed event, args: (session, volume: float, mute: bool)"""
+        return self._session_volume_changed_event
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        # subscribe before enumerating, so sessions created in between are not lost
+        self._source.subscribe(self._on_created, self._on_expired, self._on_state_changed,
+                               self._session_volume_changed_event)
+        for session in self._source.sessions():
+            _, previous = self._add(session)
+            if previous is not None:
+                self._release(previous)
+
+    def stop(self) -> None:
+        if not self._running:
+            return
+        self._running = False
+        self._source.unsubscribe()
+        sessions = self._registry.sessions()
+        self._registry.clear()
+        for session in sessions:
+            self._source.unwatch(session)
+            self._release(session)
+
+    def _add(self, session):
+        """Register a session, returns (added, replaced session of the same pid or None)"""
+        previous = self._registry.get_by_pid(session.ProcessId)
+        if not self._registry.add(session):
+            return False, None
+        if previous is not None:
+            self._source.unwatch(previous)
+        self._source.watch(session)
+        return True, previous
+
+    def _on_created(self, session) -> None:
+        added, previous = self._add(session)
+        if added:
+            self._session_created_event(session)
+        if previous is not None:
+            self._release(previous)
+
+    def _on_expired(self, session) -> None:
+        pid = session.ProcessId
+        if self._registry.get_by_pid(pid) is not session:
+            return
+        self._registry.remove(pid)
+        self._source.unwatch(session)
+        self._session_expired_event(session)
+        self._release(session)
+
+    def _on_state_changed(self, session, state: int) -> None:
+        if state == SESSION_EXPIRED:
+            self._on_expired(session)
+            return
+        self._session_state_changed_event(session, state)
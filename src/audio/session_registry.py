@@ -0,0 +1,163 @@
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+def session_process_name(session) -> Optional[str]:
+    """Process (exe) name of an audio session, or None for sessions without
+    a process (e.g. system sounds).
+    """
+    process = getattr(session, "Process", None)
+    if process is None:
+        return None
+    try:
+        return process.name()
+    except Exception:
+        # process may have exited between enumeration and this call
+        return None
+
+
+def release_session(session) -> None:
+    """Release the COM interfaces, the notification callback and the process of a
+    pycaw AudioSession right away, on the calling (COM) thread, instead of whenever
+    the wrapper is collected. The callback holds the session, without releasing
+    it the wrapper is only freed by the cyclic garbage collector, on any thread.
+    The session must not be used afterwards.
+    """
+    for attr in ('_callback', '_meter', '_volume', '_ctl', '_process'):
+        if getattr(session, attr, None) is not None:
+            setattr(session, attr, None)
+
+
+class SessionRegistry:
+    """Audio sessions indexed by process id and process (exe) name.
+
+    Sessions are added and removed one by one, so lookups never need to
+    enumerate all sessions. The process name of a session is resolved once,
+    when the session is added, instead of on every lookup.
+
+    Sessions enumerated by refresh() are new wrappers of the same sessions, the
+    registered wrapper of a pid is reused and the new one released. Removed
+    sessions are not released, they may still be held by the callers.
+    """
+
+    def __init__(self, session_provider: Callable[[], Iterable[Any]] = None,
+                 release: Callable[[Any], None] = None) -> None:
+        """
+        Args:
+            session_provider (Callable, optional): returns all current sessions,
+                e.g. AudioUtilities.GetAllSessions. Used by refresh(). Defaults to None.
+            release (Callable, optional): releases a session wrapper owned by the registry,
+                e.g. release_session. Defaults to None.
+        """
+        self._session_provider = session_provider
+        self._release = release
+        self.released = 0
+        self._lock = threading.RLock()
+        self._by_pid: Dict[int, Any] = {}
+        self._by_name: Dict[str, Dict[int, Any]] = {}
+        self._names: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_pid)
+
+    def __contains__(self, pid: int) -> bool:
+        return pid in self._by_pid
+
+    def add(self, session) -> bool:
+        """Add a session to the indexes.
+
+        Args:
+            session: pycaw AudioSession (or an object with ProcessId and Process)
+
+        Returns:
+            bool: True if the session was not registered before
+        """
+        pid = session.ProcessId
+        with self._lock:
+            if self._by_pid.get(pid) is session:
+                return False
+            if pid in self._by_pid:
+                self.remove(pid)
+
+            self._by_pid[pid] = session
+            name = session_process_name(session)
+            if name:
+                self._names[pid] = name
+                self._by_name.setdefault(name.lower(), {})[pid] = session
+        return True
+
+    def remove(self, pid: int):
+        """Remove the session of a process from the indexes.
+
+        Args:
+            pid (int): process id of the session
+
+        Returns:
+            the removed session, or None if no session was registered for pid
+        """
+        with self._lock:
+            session = self._by_pid.pop(pid, None)
+            name = self._names.pop(pid, None)
+            if name:
+                key = name.lower()
+                sessions = self._by_name.get(key)
+                if sessions is not None:
+                    sessions.pop(pid, None)
+                    if not sessions:
+                        del self._by_name[key]
+        return session
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_pid.clear()
+            self._by_name.clear()
+            self._names.clear()
+
+    def get_by_pid(self, pid: int):
+        return self._by_pid.get(pid)
+
+    def get_by_name(self, name: str):
+        """First registered session of a process name (case insensitive)."""
+        if not name:
+            return None
+        sessions = self._by_name.get(name.lower())
+        if not sessions:
+            return None
+        return next(iter(sessions.values()), None)
+
+    def name_of(self, pid: int) -> Optional[str]:
+        return self._names.get(pid)
+
+    def sessions(self) -> List[Any]:
+        with self._lock:
+            return list(self._by_pid.values())
+
+    def refresh(self) -> bool:
+        """Synchronize the indexes with the session provider.
+        Only sessions that appeared or disappeared are touched.
+
+        Returns:
+            bool: True if any session was added or removed
+        """
+        if self._session_provider is None:
+            return False
+
+        current = {s.ProcessId: s for s in self._session_provider()}
+        changed = False
+        unused = [] # new wrappers of registered sessions, never handed out
+        with self._lock:
+            for pid in [pid for pid in self._by_pid if pid not in current]:
+                self.remove(pid)
+                changed = True
+            for pid, session in current.items():
+                registered = self._by_pid.get(pid)
+                if registered is None:
+                    self.add(session)
+                    changed = True
+                elif registered is not session:
+                    unused.append(session)
+        if self._release is not None:
+            for session in unused:
+                self._release(session)
+            self.released += len(unused)
+        return changed
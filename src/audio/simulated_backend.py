@@ -0,0 +1,221 @@
+import math
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from audio.backend import AudioBackend
+
+# typical latencies of Core Audio calls on a desktop, in seconds. Getters are
+# answered in-process, setters go through the audio service.
+DEFAULT_LATENCIES = {
+    'get_volume': 15e-6,
+    'get_mute': 15e-6,
+    'set_volume': 120e-6,
+    'set_mute': 120e-6,
+    'enumerate': 40e-6, # per session
+    'get_peak': 10e-6,
+}
+
+
+def spin(seconds: float) -> None:
+    """Busy wait, sleep() is too coarse for microsecond latencies"""
+    if seconds <= 0.0:
+        return
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class CallStats:
+    """Number of calls per fake COM method"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts.clear()
+
+
+class LatencyModel:
+    """Latency of a simulated call: a mean with log-normal jitter."""
+
+    def __init__(self, mean: float, jitter: float = 0.3, seed: int = None) -> None:
+        """
+        Args:
+            mean (float): mean latency in seconds
+            jitter (float, optional): sigma of the log-normal factor, 0 for a fixed latency. Defaults to 0.3.
+            seed (int, optional): seed of the random generator. Defaults to None.
+        """
+        self.mean = mean
+        self.jitter = jitter
+        self._random = random.Random(seed)
+
+    def sample(self) -> float:
+        if self.jitter <= 0.0 or self.mean <= 0.0:
+            return self.mean
+        # mean of lognormvariate(mu, sigma) is exp(mu + sigma^2/2)
+        return self.mean * self._random.lognormvariate(-self.jitter**2 / 2, self.jitter)
+
+    def wait(self, scale: float = 1.0) -> None:
+        seconds = self.sample() * scale
+        # sleep is too coarse for short waits
+        if seconds < 0.002:
+            spin(seconds)
+        else:
+            time.sleep(seconds)
+
+
+class SimSession:
+    __slots__ = ('pid', 'name', 'volume', 'mute', 'lock')
+
+    def __init__(self, pid: int, name: str, volume: float = 1.0) -> None:
+        self.pid = pid
+        self.name = name
+        self.volume = volume
+        self.mute = False
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return f"SimSession({self.pid}, {self.name!r}, volume={self.volume:.2f}, mute={self.mute})"
+
+
+class SimulatedBackend(AudioBackend):
+    """In-memory audio sessions with simulated call latencies.
+
+    Sessions can be added, removed and changed "by other applications" from
+    any thread while the backend is used, to load test with racing updates.
+    Like the audio service, every change is notified by volume_changed_event,
+    also the writes made through the backend.
+    """
+
+    def __init__(self, session_count: int = 0, latencies: Dict[str, LatencyModel] = None,
+                 seed: int = None) -> None:
+        """
+        Args:
+            session_count (int, optional): sessions to create, pid 4*i named "app{i}.exe". Defaults to 0.
+            latencies (Dict[str, LatencyModel], optional): latency per operation, replaces
+                DEFAULT_LATENCIES of that operation. Defaults to None.
+            seed (int, optional): seed of the default latency models. Defaults to None.
+        """
+        super().__init__()
+        self.stats = CallStats()
+        self._latencies = {op: LatencyModel(mean, seed=seed) for op, mean in DEFAULT_LATENCIES.items()}
+        self._latencies.update(latencies or {})
+        self._lock = threading.Lock()
+        self._by_pid: Dict[int, SimSession] = {}
+        self._by_name: Dict[str, Dict[int, SimSession]] = {}
+        for i in range(1, session_count+1):
+            self.add_session(4*i, f"app{i}.exe")
+
+    @staticmethod
+    def without_latency(session_count: int = 0) -> 'SimulatedBackend':
+        return SimulatedBackend(session_count, {op: LatencyModel(0.0) for op in DEFAULT_LATENCIES})
+
+    def _call(self, op: str, scale: float = 1.0) -> None:
+        self.stats.count(op)
+        latency = self._latencies.get(op)
+        if latency is not None:
+            latency.wait(scale)
+
+    def _write(self, op: str, session: SimSession) -> None:
+        self._call(op)
+        if self._by_pid.get(session.pid) is not session:
+            # the session expired, e.g. it was cached for too long
+            self.stats.count('stale_write')
+
+    # simulation
+    def add_session(self, pid: int, name: str, volume: float = 1.0) -> SimSession:
+        session = SimSession(pid, name, volume)
+        with self._lock:
+            self._by_pid[pid] = session
+            self._by_name.setdefault(name.lower(), {})[pid] = session
+        self._session_created_event(session)
+        return session
+
+    def remove_session(self, pid: int) -> Optional[SimSession]:
+        with self._lock:
+            session = self._by_pid.pop(pid, None)
+            if session is None:
+                return None
+            sessions = self._by_name.get(session.name.lower())
+            if sessions is not None:
+                sessions.pop(pid, None)
+                if not sessions:
+                    del self._by_name[session.name.lower()]
+        self._session_expired_event(session)
+        return session
+
+    def change_volume(self, session: SimSession, volume: float = None, mute: bool = None) -> None:
+        """Change a session like another application would, notifies subscribers"""
+        with session.lock:
+            if volume is not None:
+                session.volume = volume
+            if mute is not None:
+                session.mute = mute
+            volume, mute = session.volume, session.mute
+        self._volume_changed_event(session, volume, mute)
+
+    # AudioBackend
+    def sessions(self) -> List[Any]:
+        with self._lock:
+            sessions = list(self._by_pid.values())
+        self._call('enumerate', len(sessions))
+        return sessions
+
+    def session_by_pid(self, pid: int) -> Optional[Any]:
+        return self._by_pid.get(pid)
+
+    def session_by_name(self, name: str) -> Optional[Any]:
+        if not name:
+            return None
+        with self._lock:
+            sessions = self._by_name.get(name.lower())
+            if not sessions:
+                return None
+            return next(iter(sessions.values()), None)
+
+    def session_pid(self, session: SimSession) -> int:
+        return session.pid
+
+    def session_name(self, session: SimSession) -> Optional[str]:
+        return session.name
+
+    def get_volume(self, session: SimSession) -> float:
+        self._call('get_volume')
+        return session.volume
+
+    def set_volume(self, session: SimSession, volume: float) -> None:
+        self._write('set_volume', session)
+        with session.lock:
+            session.volume = volume
+            mute = session.mute
+        # the audio service notifies the writes of this process too
+        self._volume_changed_event(session, volume, mute)
+
+    def get_peak(self, session: SimSession) -> float:
+        self._call('get_peak')
+        if session.mute:
+            return 0.0
+        # a level that moves, different per session
+        return session.volume * abs(math.sin(time.perf_counter() * 7.0 + session.pid))
+
+    def get_mute(self, session: SimSession) -> bool:
+        self._call('get_mute')
+        return session.mute
+
+    def set_mute(self, session: SimSession, mute: bool) -> None:
+        self._write('set_mute', session)
+        with session.lock:
+            session.mute = mute
+            volume = session.volume
+        self._volume_changed_event(session, volume, mute)
@@ -0,0 +1,261 @@
+from abc import ABC, abstractmethod
+from fnmatch import fnmatchcase
+from time import perf_counter, perf_counter_ns
+from typing import Any, Callable, Dict, List, Optional
+from audio.backend import AudioBackend
+from audio.command_executor import InlineExecutor
+from audio.ramp import RampScheduler
+from process_volume_control import VolumeCtrlBase, VOLUME_STEP
+from utils.event import Event
+from utils.log import get_logger
+from utils.rate_limit import RatePolicy, Debounce
+from utils.tracing import tracer
+from utils.win_utils import get_pid_active_window, get_process_image_name
+
+log = get_logger(__name__)
+
+
+class GroupTarget(ABC):
+    """Selects the sessions of a group, resolved once per batch"""
+
+    @abstractmethod
+    def select(self, backend: AudioBackend, sessions: List[Any]) -> List[Any]:
+        pass
+
+
+class AllSessions(GroupTarget):
+    def select(self, backend: AudioBackend, sessions: List[Any]) -> List[Any]:
+        return sessions
+
+
+class AllExceptForeground(GroupTarget):
+    """All sessions except the ones of the foreground application (same pid or exe name)"""
+
+    def __init__(self, foreground_pid: Callable[[], int] = get_pid_active_window,
+                 process_name: Callable[[int], str] = get_process_image_name) -> None:
+        self._foreground_pid = foreground_pid
+        self._process_name = process_name
+
+    def select(self, backend: AudioBackend, sessions: List[Any]) -> List[Any]:
+        pid = self._foreground_pid()
+        name = (self._process_name(pid) or "").lower()
+        return [s for s in sessions
+                if backend.session_pid(s) != pid
+                and not (name and (backend.session_name(s) or "").lower() == name)]
+
+
+class NamePattern(GroupTarget):
+    """Sessions whose process name matches a glob pattern, e.g. "*chrome*.exe" (case insensitive)"""
+
+    def __init__(self, pattern: str) -> None:
+        self._pattern = pattern.lower()
+
+    def select(self, backend: AudioBackend, sessions: List[Any]) -> List[Any]:
+        return [s for s in sessions if fnmatchcase((backend.session_name(s) or "").lower(), self._pattern)]
+
+
+class BatchResult:
+    """Timing of one batched group operation"""
+    __slots__ = ('action', 'sessions', 'resolve_ns', 'write_ns')
+
+    def __init__(self, action: str, sessions: int, resolve_ns: int, write_ns: int) -> None:
+        self.action = action
+        self.sessions = sessions
+        self.resolve_ns = resolve_ns
+        self.write_ns = write_ns
+
+    @property
+    def total_ms(self) -> float:
+        return (self.resolve_ns + self.write_ns) / 1e6
+
+    def __repr__(self):
+        return (f"BatchResult({self.action}, sessions={self.sessions}, "
+                f"resolve={self.resolve_ns/1e6:.2f}ms, write={self.write_ns/1e6:.2f}ms)")
+
+
+class GroupVolCtrl(VolumeCtrlBase):
+    """Controls the volume of a group of sessions at once.
+
+    Every operation resolves the sessions of the group once, reads what it
+    needs, and then issues all writes in one pass on the executor.
+    """
+
+    def __init__(self, target: GroupTarget, backend: AudioBackend, volume_step: float=VOLUME_STEP,
+                 executor=None, rate_policies: Dict[str, RatePolicy]=None,
+                 ramp: RampScheduler=None, fade: float=0.25) -> None:
+        """
+        Args:
+            target (GroupTarget): sessions of the group
+            backend (AudioBackend): audio sessions to control
+            volume_step (float, optional): volume change per step. Defaults to VOLUME_STEP.
+            executor (AudioCommandExecutor, optional): runs all audio (COM) calls.
+                Defaults to running them on the calling thread.
+            rate_policies (Dict[str, RatePolicy], optional): see VolumeCtrlBase.
+            ramp (RampScheduler, optional): fades ducking in and out. Defaults to instant changes.
+            fade (float, optional): seconds of a ducking fade. Defaults to 0.25.
+        """
+        super().__init__(rate_policies)
+        self._target = target
+        self._backend = backend
+        self._volume_step = volume_step
+        self._executor = executor if executor is not None else InlineExecutor()
+        self._ramp = ramp
+        self._fade = fade
+        self._ducked: Dict[int, float] = {} # pid -> volume before ducking
+        self._last_batch: BatchResult = None
+        self._batch_completed_event = Event()
+
+    @staticmethod
+    def default_rate_policies(clock: Callable[[], float] = perf_counter) -> Dict[str, RatePolicy]:
+        policies = VolumeCtrlBase.default_rate_policies(clock)
+        policies['toggle_duck'] = Debounce(0.1, clock=clock)
+        return policies
+
+    @property
+    def batch_completed_event(self) -> Event:
+        """Batch completed event, args: (result: BatchResult)"""
+        return self._batch_completed_event
+
+    @property
+    def last_batch(self) -> BatchResult:
+        return self._last_batch
+
+    @property
+    def is_ducked(self) -> bool:
+        return bool(self._ducked)
+
+    def _batch(self, action: str, compute: Callable[[List[Any], List[float]], List[float]],
+               sessions: List[Any]=None, fade: bool=False):
+        """Resolve the group once, read all volumes, then write all changed volumes.
+
+        Args:
+            action (str): name of the operation, for the timing report
+            compute (Callable): (sessions, volumes) -> new volumes (None to leave a session unchanged)
+            sessions (List, optional): sessions to use instead of the group. Defaults to None.
+            fade (bool, optional): fade to the new volumes if there is a ramp scheduler. Defaults to False.
+        """
+        backend = self._backend
+        start = perf_counter_ns()
+        with tracer.span('group_resolve'):
+            if sessions is None:
+                sessions = self._target.select(backend, backend.sessions())
+            sessions, volumes = self._read(backend.get_volume, sessions)
+            new_volumes = compute(sessions, volumes)
+        resolved = perf_counter_ns()
+
+        with tracer.span('group_write'):
+            writes = [(s, max(0.0, min(1.0, v))) for s, v, old in zip(sessions, new_volumes, volumes)
+                      if v is not None and v != old]
+            if self._ramp is None:
+                backend.set_volumes(writes)
+            elif fade:
+                self._ramp.start_ramps(writes, self._fade)
+            else:
+                # a running fade would overwrite the new volume
+                for s, _ in writes:
+                    self._ramp.cancel(s)
+                backend.set_volumes(writes)
+        result = BatchResult(action, len(writes), resolved - start, perf_counter_ns() - resolved)
+
+        self._last_batch = result
+        self._batch_completed_event(result)
+
+    def _read(self, get: Callable[[Any], Any], sessions: List[Any]):
+        """(sessions, values) of the sessions that could be read, a session can expire during a batch"""
+        read, values = [], []
+        for s in sessions:
+            try:
+                values.append(get(s))
+            except Exception:
+                log.debug("could not read session", exc_info=True)
+                continue
+            read.append(s)
+        return read, values
+
+    def _step(self, delta: float):
+        self._batch('step', lambda sessions, volumes: [v + delta for v in volumes])
+
+    def _submit_step(self, delta: float):
+        if not self._executor.submit_delta((id(self), 'volume'), self._step, delta):
+            self._rate_limiter.merged('volume_up' if delta > 0 else 'volume_down')
+
+    def volume_up(self):
+        self.change_volume(self._volume_step)
+
+    def volume_down(self):
+        self.change_volume(-self._volume_step)
+
+    def change_volume(self, delta: float):
+        """Change the volume of every session of the group by delta (-1.0 - 1.0)"""
+        action = 'volume_up' if delta > 0 else 'volume_down'
+        self._rate_limiter(action, self._submit_step, delta)
+
+    def set_volume(self, volume: int):
+        if not 0 <= volume <= 100:
+            return
+        self._rate_limiter('set_volume', self._executor.submit, self._batch,
+                           'set', lambda sessions, volumes: [volume/100]*len(sessions))
+
+    def scale(self, factor: float):
+        """Multiply the volume of every session of the group by factor"""
+        self._rate_limiter('scale', self._executor.submit, self._batch,
+                           'scale', lambda sessions, volumes: [v*factor for v in volumes])
+
+    def _set_mute(self, mute: Optional[bool]):
+        backend = self._backend
+        start = perf_counter_ns()
+        sessions, muted = self._read(backend.get_mute, self._target.select(backend, backend.sessions()))
+        if mute is None:
+            # toggle: unmute only a group that is all muted
+            mute = not all(muted)
+        resolved = perf_counter_ns()
+        for s in sessions:
+            try:
+                backend.set_mute(s, mute)
+            except Exception:
+                log.debug("could not set mute", exc_info=True)
+        result = BatchResult('mute' if mute else 'unmute', len(sessions), resolved - start,
+                             perf_counter_ns() - resolved)
+        self._last_batch = result
+        self._batch_completed_event(result)
+
+    def mute(self):
+        self._rate_limiter('mute', self._executor.submit, self._set_mute, True)
+
+    def unmute(self):
+        self._rate_limiter('unmute', self._executor.submit, self._set_mute, False)
+
+    def toggle_mute(self):
+        """Mute every session of the group, or unmute them if they are all muted"""
+        self._rate_limiter('toggle_mute', self._executor.submit, self._set_mute, None)
+
+    def _duck(self, factor: float):
+        backend = self._backend
+        def compute(sessions, volumes):
+            if self._ramp is not None:
+                # while fading back in, duck from the volume being restored
+                targets = [self._ramp.target_of(s) for s in sessions]
+                volumes = [v if t is None else t for v, t in zip(volumes, targets)]
+            for s, v in zip(sessions, volumes):
+                self._ducked[backend.session_pid(s)] = v
+            return [v*factor for v in volumes]
+        self._batch('duck', compute, fade=True)
+
+    def _unduck(self):
+        # restore what was ducked, even if the foreground application changed since
+        backend = self._backend
+        ducked, self._ducked = self._ducked, {}
+        sessions = [s for s in map(backend.session_by_pid, ducked) if s is not None]
+        def compute(sessions, volumes):
+            return [ducked[backend.session_pid(s)] for s in sessions]
+        self._batch('unduck', compute, sessions, fade=True)
+
+    def _toggle_duck(self, factor: float):
+        if self._ducked:
+            self._unduck()
+        else:
+            self._duck(factor)
+
+    def toggle_duck(self, factor: float = 0.2):
+        """Lower the group to factor of its volume, or restore the volumes if already ducked"""
+        self._rate_limiter('toggle_duck', self._executor.submit, self._toggle_duck, factor)
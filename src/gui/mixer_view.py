@@ -0,0 +1,229 @@
+import threading
+from time import perf_counter
+from typing import Dict, Optional
+from PySide6.QtCore import QEvent, QModelIndex, QRect, QSize, QTimer, Qt, Signal, Slot
+from PySide6.QtGui import QColor, QPainter
+from PySide6.QtWidgets import QListView, QStyle, QStyledItemDelegate, QVBoxLayout, QWidget
+from audio.backend import AudioBackend
+from audio.command_executor import InlineExecutor
+from gui.session_model import SessionListModel, SessionState, MuteRole, VolumeRole
+from gui.throttle import frame_interval_ms
+from volume_controller import VolumeController
+
+
+class SessionDelegate(QStyledItemDelegate):
+    """Paints a session row as name, volume bar and mute box, and edits the volume
+    by clicking or dragging on the bar, the mute state by clicking the box.
+    """
+    row_height = 26
+    _muted_text = u"✕"
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self._bar_color = QColor(0x3d, 0xae, 0xe9)
+        self._muted_bar_color = QColor(0x6a, 0x6a, 0x6a)
+        self._groove_color = QColor(0x51, 0x5b, 0x6a)
+        self._dragging: Optional[QModelIndex] = None
+
+    def sizeHint(self, option, index) -> QSize:
+        return QSize(300, self.row_height)
+
+    def _layout(self, rect: QRect):
+        # name | bar | percentage | mute box
+        name_width = int(rect.width() * 0.35)
+        box = QRect(rect.right() - self.row_height + 4, rect.top() + 4, self.row_height - 8, self.row_height - 8)
+        text = QRect(box.left() - 40, rect.top(), 36, rect.height())
+        bar = QRect(rect.left() + name_width + 8, rect.center().y() - 3, text.left() - rect.left() - name_width - 12, 6)
+        name = QRect(rect.left() + 6, rect.top(), name_width, rect.height())
+        return name, bar, text, box
+
+    def paint(self, painter: QPainter, option, index: QModelIndex) -> None:
+        volume = index.data(VolumeRole)
+        mute = index.data(MuteRole)
+        name_rect, bar, text_rect, box = self._layout(option.rect)
+        painter.save()
+        if option.state & QStyle.State_MouseOver:
+            painter.fillRect(option.rect, option.palette.alternateBase())
+        painter.setPen(option.palette.text().color())
+        elided = option.fontMetrics.elidedText(index.data(), Qt.ElideRight, name_rect.width())
+        painter.drawText(name_rect, Qt.AlignVCenter | Qt.AlignLeft, elided)
+
+        painter.fillRect(bar, self._groove_color)
+        filled = QRect(bar.left(), bar.top(), int(bar.width() * volume / 100), bar.height())
+        painter.fillRect(filled, self._muted_bar_color if mute else self._bar_color)
+        painter.drawText(text_rect, Qt.AlignVCenter | Qt.AlignRight, str(volume))
+
+        painter.drawRect(box)
+        if mute:
+            painter.drawText(box, Qt.AlignCenter, self._muted_text)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index: QModelIndex) -> bool:
+        _, bar, _, box = self._layout(option.rect)
+        kind = event.type()
+        if kind == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
+            pos = event.position().toPoint()
+            if box.contains(pos):
+                model.setData(index, not index.data(MuteRole), MuteRole)
+                return True
+            if bar.adjusted(0, -8, 0, 8).contains(pos):
+                self._dragging = index
+                model.setData(index, self._volume_at(bar, pos.x()), VolumeRole)
+                return True
+        elif kind == QEvent.MouseMove and self._dragging is not None:
+            if self._dragging == index:
+                model.setData(index, self._volume_at(bar, event.position().toPoint().x()), VolumeRole)
+            return True
+        elif kind == QEvent.MouseButtonRelease and self._dragging is not None:
+            self._dragging = None
+            return True
+        return False
+
+    @staticmethod
+    def _volume_at(bar: QRect, x: int) -> int:
+        return max(0, min(100, round((x - bar.left()) * 100 / max(1, bar.width()))))
+
+
+class MixerView(QWidget):
+    """Every audio session with its volume and mute state.
+
+    Session changes of the backend are collected per pid (latest state wins)
+    and applied to the model as row changes at most once per frame. The list
+    is virtualized, only visible rows are painted. Writes go through the
+    VolumeController, on its audio thread. Sessions are only tracked while
+    the mixer is visible, it is synced with a full read when shown.
+    """
+    _changes_pending = Signal()
+    # emit from any thread to show or hide the mixer
+    toggle_requested = Signal()
+
+    def __init__(self, volume_service: VolumeController, backend: AudioBackend, executor=None) -> None:
+        """
+        Args:
+            volume_service (VolumeController): writes the volume changes
+            backend (AudioBackend): sessions to show
+            executor (AudioCommandExecutor, optional): runs all audio (COM) reads.
+                Defaults to running them on the calling thread.
+        """
+        super().__init__()
+        self._volume_service = volume_service
+        self._backend = backend
+        self._executor = executor if executor is not None else InlineExecutor()
+
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Optional[SessionState]] = {} # pid -> state, None if expired
+        self._snapshot = None
+        self._tracking = False
+
+        self.setWindowTitle('Volume mixer')
+        self.setWindowFlags(Qt.Tool)
+        self.resize(360, 480)
+
+        self._model = SessionListModel(self)
+        self._model.volume_edited.connect(self._write_volume)
+        self._model.mute_edited.connect(self._write_mute)
+        self._view = QListView(self)
+        self._view.setModel(self._model)
+        self._view.setItemDelegate(SessionDelegate(self._view))
+        self._view.setUniformItemSizes(True)
+        self._view.setMouseTracking(True)
+        self._view.setSelectionMode(QListView.NoSelection)
+        self._view.setEditTriggers(QListView.NoEditTriggers)
+        vbox = QVBoxLayout()
+        vbox.setContentsMargins(0, 0, 0, 0)
+        vbox.addWidget(self._view)
+        self.setLayout(vbox)
+
+        self._interval_ms = frame_interval_ms()
+        self._last_apply = 0.0
+        self._apply_timer = QTimer(self)
+        self._apply_timer.setSingleShot(True)
+        self._apply_timer.timeout.connect(self._apply_changes)
+        self._changes_pending.connect(self._schedule_apply)
+        self.toggle_requested.connect(self.toggle)
+
+        backend.subscribe(self._session_created, self._session_expired, self._volume_changed)
+
+    @property
+    def model(self) -> SessionListModel:
+        return self._model
+
+    @Slot()
+    def toggle(self):
+        self.setVisible(not self.isVisible())
+
+    def showEvent(self, event):
+        self._tracking = True
+        self._executor.submit(self._read_all, key=(id(self), 'read_all'))
+        return super().showEvent(event)
+
+    def hideEvent(self, event):
+        self._tracking = False
+        return super().hideEvent(event)
+
+    # audio thread
+    def _state(self, session) -> SessionState:
+        backend = self._backend
+        return SessionState(session, backend.session_pid(session), backend.session_name(session) or "",
+                            int(round(backend.get_volume(session)*100)), backend.get_mute(session))
+
+    def _read_all(self):
+        snapshot = [self._state(session) for session in self._backend.sessions()]
+        with self._lock:
+            self._snapshot = snapshot
+        self._changes_pending.emit()
+
+    def _read_session(self, session):
+        self._push(self._backend.session_pid(session), self._state(session))
+
+    # backend notifications, any thread
+    def _push(self, pid: int, state: Optional[SessionState]):
+        with self._lock:
+            first = not self._pending and self._snapshot is None
+            self._pending[pid] = state
+        if first:
+            self._changes_pending.emit()
+
+    def _session_created(self, session):
+        if self._tracking:
+            self._executor.submit(self._read_session, session)
+
+    def _session_expired(self, session):
+        if self._tracking:
+            self._push(self._backend.session_pid(session), None)
+
+    def _volume_changed(self, session, volume: float, mute: bool):
+        if self._tracking:
+            self._push(self._backend.session_pid(session),
+                       SessionState(session, self._backend.session_pid(session),
+                                    self._backend.session_name(session) or "", int(round(volume*100)), mute))
+
+    # gui thread
+    @Slot()
+    def _schedule_apply(self):
+        if self._apply_timer.isActive():
+            return
+        since_last = (perf_counter() - self._last_apply) * 1000
+        self._apply_timer.start(max(0, int(self._interval_ms - since_last)))
+
+    @Slot()
+    def _apply_changes(self):
+        self._last_apply = perf_counter()
+        with self._lock:
+            snapshot, self._snapshot = self._snapshot, None
+            pending, self._pending = self._pending, {}
+        if snapshot is not None:
+            self._model.sync(snapshot)
+        for pid, state in pending.items():
+            if state is None:
+                self._model.remove(pid)
+            else:
+                self._model.upsert(state)
+
+    @Slot(object, int)
+    def _write_volume(self, session, volume: int):
+        self._volume_service.set_session_volume(self._backend, session, volume)
+
+    @Slot(object, bool)
+    def _write_mute(self, session, mute: bool):
+        self._volume_service.set_session_mute(self._backend, session, mute)
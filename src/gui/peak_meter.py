@@ -0,0 +1,59 @@
+from PySide6.QtCore import QRect, QTimer, Qt
+from PySide6.QtGui import QColor, QPainter
+from PySide6.QtWidgets import QWidget
+from audio.peak_sampler import PeakSampler
+
+
+class PeakMeter(QWidget):
+    """Vertical peak level bar of one meter of a PeakSampler.
+
+    The sampler runs only while the meter is visible. On every sample only the
+    part of the bar between the previous and the new level is repainted, and
+    nothing is repainted if the level did not move by a pixel.
+    """
+
+    def __init__(self, sampler: PeakSampler, meter: int = 0, parent: QWidget = None) -> None:
+        super().__init__(parent)
+        self._sampler = sampler
+        self._meter = meter
+        self._level_px = 0
+        self._color = QColor(120, 200, 120)
+        self._background = QColor(0, 0, 0, 40)
+        self.setAttribute(Qt.WA_OpaquePaintEvent, False)
+        self.setFixedWidth(4)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(max(1, int(sampler.interval * 1000)))
+        self._timer.timeout.connect(self._on_sample)
+        self.repaints = 0
+
+    def showEvent(self, event):
+        self._sampler.resume()
+        self._timer.start()
+        return super().showEvent(event)
+
+    def hideEvent(self, event):
+        self._timer.stop()
+        self._sampler.pause()
+        self._level_px = 0
+        return super().hideEvent(event)
+
+    def _on_sample(self):
+        level = min(1.0, max(0.0, self._sampler.latest(self._meter)))
+        level_px = int(round(level * self.height()))
+        if level_px == self._level_px:
+            return
+        # only the rows between the old and the new level change
+        height = self.height()
+        top = height - max(level_px, self._level_px)
+        self.update(QRect(0, top, self.width(), abs(level_px - self._level_px)))
+        self._level_px = level_px
+
+    def paintEvent(self, event):
+        self.repaints += 1
+        rect = event.rect()
+        bar = QRect(0, self.height() - self._level_px, self.width(), self._level_px)
+        painter = QPainter(self)
+        painter.fillRect(rect, self._background)
+        painter.fillRect(rect.intersected(bar), self._color)
+        painter.end()
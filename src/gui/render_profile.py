@@ -0,0 +1,87 @@
+import sys
+from collections import Counter
+from typing import List
+from PySide6.QtCore import QEvent, QObject
+from PySide6.QtWidgets import QWidget
+
+# set to any value to print the render profile of the popup on exit
+RENDER_PROFILE_ENV = "VOLUME_CONTROL_RENDER_PROFILE"
+
+
+class PopupRender:
+    """Paints and frames of one popup, from show to hide"""
+    __slots__ = ('updates', 'paints', 'frame_ms')
+
+    def __init__(self) -> None:
+        self.updates = 0 # volume updates shown
+        self.paints = Counter() # widget -> paint events
+        self.frame_ms: List[float] = [] # time to render each frame of the window
+
+    @property
+    def total_paints(self) -> int:
+        return sum(self.paints.values())
+
+
+class RenderProfiler(QObject):
+    """Counts paint events per widget and times the frames of a window, per popup.
+
+    watch() installs an event filter on a window and its children. The window
+    reports the popup boundaries, volume updates and frame times.
+    """
+
+    def __init__(self, parent: QObject = None) -> None:
+        super().__init__(parent)
+        self._popups: List[PopupRender] = []
+        self._current: PopupRender = None
+
+    @property
+    def popups(self) -> List[PopupRender]:
+        return self._popups
+
+    def watch(self, window: QWidget) -> None:
+        window.installEventFilter(self)
+        for child in window.findChildren(QWidget):
+            child.installEventFilter(self)
+
+    def eventFilter(self, obj, event) -> bool:
+        if event.type() == QEvent.Paint and self._current is not None:
+            self._current.paints[obj.objectName() or type(obj).__name__] += 1
+        return False
+
+    def begin_popup(self) -> None:
+        self._current = PopupRender()
+        self._popups.append(self._current)
+
+    def end_popup(self) -> None:
+        self._current = None
+
+    def update(self) -> None:
+        if self._current is not None:
+            self._current.updates += 1
+
+    def frame(self, seconds: float) -> None:
+        if self._current is not None:
+            self._current.frame_ms.append(seconds * 1000)
+
+    def summary(self) -> dict:
+        updates = sum(p.updates for p in self._popups)
+        paints = sum(p.total_paints for p in self._popups)
+        frames = sorted(ms for p in self._popups for ms in p.frame_ms)
+        per_widget = Counter()
+        for popup in self._popups:
+            per_widget.update(popup.paints)
+        return {
+            "popups": len(self._popups),
+            "updates": updates,
+            "paints": paints,
+            "paints_per_update": round(paints / updates, 2) if updates else 0.0,
+            "frames": len(frames),
+            "frame_ms_median": round(frames[len(frames)//2], 3) if frames else 0.0,
+            "frame_ms_max": round(frames[-1], 3) if frames else 0.0,
+            "paints_per_widget": dict(per_widget),
+        }
+
+    def report(self, file=sys.stdout) -> None:
+        print("popup render profile:", file=file)
+        for name, value in self.summary().items():
+            print(f"  {name:<20} {value}", file=file)
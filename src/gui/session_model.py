@@ -0,0 +1,132 @@
+from typing import Any, Dict, List, Optional
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt, Signal
+
+PidRole = Qt.UserRole + 1
+VolumeRole = Qt.UserRole + 2 # int 0 - 100
+MuteRole = Qt.UserRole + 3
+SessionRole = Qt.UserRole + 4
+
+
+class SessionState:
+    """Row of the session model"""
+    __slots__ = ('session', 'pid', 'name', 'volume', 'mute')
+
+    def __init__(self, session, pid: int, name: str, volume: int, mute: bool) -> None:
+        self.session = session
+        self.pid = pid
+        self.name = name
+        self.volume = volume
+        self.mute = mute
+
+
+class SessionListModel(QAbstractListModel):
+    """Audio sessions, one row per pid.
+
+    Changes are applied row by row (insert, remove, dataChanged), the views
+    keep their state and only repaint the rows that changed. Edits through
+    setData() update the row right away and are reported with the edited
+    signals, to be written to the backend by their receiver.
+    """
+    volume_edited = Signal(object, int) # session, volume
+    mute_edited = Signal(object, bool) # session, mute
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self._rows: List[SessionState] = []
+        self._index: Dict[int, int] = {} # pid -> row
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        state = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return state.name
+        if role == VolumeRole:
+            return state.volume
+        if role == MuteRole:
+            return state.mute
+        if role == PidRole:
+            return state.pid
+        if role == SessionRole:
+            return state.session
+        return None
+
+    def flags(self, index: QModelIndex):
+        return Qt.ItemIsEnabled | Qt.ItemIsEditable
+
+    def setData(self, index: QModelIndex, value: Any, role: int = Qt.EditRole) -> bool:
+        if not index.isValid() or index.row() >= len(self._rows):
+            return False
+        state = self._rows[index.row()]
+        if role == VolumeRole:
+            value = max(0, min(100, int(value)))
+            if value == state.volume:
+                return False
+            state.volume = value
+            self.dataChanged.emit(index, index, [VolumeRole])
+            self.volume_edited.emit(state.session, value)
+            return True
+        if role == MuteRole:
+            value = bool(value)
+            if value == state.mute:
+                return False
+            state.mute = value
+            self.dataChanged.emit(index, index, [MuteRole])
+            self.mute_edited.emit(state.session, value)
+            return True
+        return False
+
+    def row_of(self, pid: int) -> Optional[int]:
+        return self._index.get(pid)
+
+    def state(self, row: int) -> SessionState:
+        return self._rows[row]
+
+    def upsert(self, state: SessionState) -> None:
+        """Insert a session, or update the row of its pid"""
+        row = self._index.get(state.pid)
+        if row is None:
+            row = len(self._rows)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._rows.append(state)
+            self._index[state.pid] = row
+            self.endInsertRows()
+            return
+
+        current = self._rows[row]
+        roles = []
+        if current.name != state.name:
+            roles.append(Qt.DisplayRole)
+        if current.volume != state.volume:
+            roles.append(VolumeRole)
+        if current.mute != state.mute:
+            roles.append(MuteRole)
+        if current.session is not state.session:
+            roles.append(SessionRole)
+        self._rows[row] = state
+        if roles:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, roles)
+
+    def remove(self, pid: int) -> None:
+        row = self._index.pop(pid, None)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        for i in range(row, len(self._rows)):
+            self._index[self._rows[i].pid] = i
+        self.endRemoveRows()
+
+    def sync(self, states: List[SessionState]) -> None:
+        """Apply a full list of sessions as row changes: remove the missing ones,
+        update the known ones and append the new ones.
+        """
+        pids = {state.pid for state in states}
+        for pid in [pid for pid in self._index if pid not in pids]:
+            self.remove(pid)
+        for state in states:
+            self.upsert(state)
@@ -0,0 +1,59 @@
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+from PySide6.QtGui import QGuiApplication
+
+
+def frame_interval_ms() -> int:
+    """Duration of one display frame of the primary screen, in milliseconds"""
+    screen = QGuiApplication.primaryScreen()
+    rate = screen.refreshRate() if screen else 0.0
+    if rate <= 0.0:
+        rate = 60.0
+    return max(1, int(1000 / rate))
+
+
+class FrameThrottle(QObject):
+    """Latest-value-wins throttle, forwards at most one value per frame.
+
+    The first value is forwarded immediately. Values pushed during the same
+    frame replace each other, and the last one is forwarded when the frame ends.
+    flush() forwards a pending value right away, e.g. on slider release.
+    """
+    value_ready = Signal(int)
+
+    def __init__(self, interval_ms: int = None, parent: QObject = None) -> None:
+        super().__init__(parent)
+        self._pending = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms if interval_ms is not None else frame_interval_ms())
+        self._timer.timeout.connect(self._on_frame)
+
+        self.received = 0
+        self.forwarded = 0
+
+    @Slot(int)
+    def push(self, value: int) -> None:
+        self.received += 1
+        if self._timer.isActive():
+            self._pending = value
+            return
+        self._forward(value)
+        self._timer.start()
+
+    @Slot()
+    def flush(self) -> None:
+        self._timer.stop()
+        if self._pending is not None:
+            value, self._pending = self._pending, None
+            self._forward(value)
+
+    def _on_frame(self) -> None:
+        if self._pending is None:
+            # nothing changed during the last frame
+            self._timer.stop()
+            return
+        value, self._pending = self._pending, None
+        self._forward(value)
+
+    def _forward(self, value: int) -> None:
+        self.forwarded += 1
+        self.value_ready.emit(value)
@@ -1,15 +1,28 @@
-import os,sys,logging
+import os,sys
 gui_path = os.path.dirname(os.path.realpath(__file__))
 main_dir = os.path.abspath(os.path.join(gui_path, os.pardir))
 sys.path.insert(1, main_dir) # add volume_control directory at runtime
 
 from volume_controller import VolumeController
-from PySide6.QtWidgets import (QWidget, QSlider, QVBoxLayout,
+from gui.throttle import FrameThrottle
+from gui.peak_meter import PeakMeter
+from gui.render_profile import RenderProfiler
+from audio.peak_sampler import PeakSampler
+from utils.log import get_logger
+from utils.tracing import tracer
+from PySide6.QtWidgets import (QWidget, QSlider, QVBoxLayout, QHBoxLayout,
                              QLabel, QApplication)
-from PySide6.QtCore import QAbstractAnimation, QFile, QMargins, QTextStream, QTimer, QTimerEvent, QUrl, Qt, QVariantAnimation, QEasingCurve, Signal, Slot
+from PySide6.QtCore import QAbstractAnimation, QEvent, QFile, QMargins, QTextStream, QTimer, QTimerEvent, QUrl, Qt, QVariantAnimation, QEasingCurve, Signal, Slot
+from time import perf_counter
 
 import sys
 
+log = get_logger(__name__)
+
+# seconds after which a hotkey press is not the cause of a popup anymore, e.g.
+# it was a hotkey without a popup and the popup comes from another application
+KEYPRESS_MAX_AGE = 0.5
+
 # colors
 class VolumeView(QWidget):
     _alpha = 0.98
@@ -18,8 +31,20 @@ class VolumeView(QWidget):
     _volume_changed = Signal(int)
     _muted_text = u"✕"
 
-    def __init__(self, volume_service: VolumeController):
+    def __init__(self, volume_service: VolumeController, peak_sampler: PeakSampler = None,
+                 render_profiler: RenderProfiler = None, cached_chrome: bool = True):
+        """
+        Args:
+            volume_service (VolumeController): volume events to show, and volume changes from the slider
+            peak_sampler (PeakSampler, optional): shows a peak meter next to the slider. Defaults to None.
+            render_profiler (RenderProfiler, optional): records paints and frame times per popup. Defaults to None.
+            cached_chrome (bool, optional): paint the window background (chrome) once per popup,
+                a volume update only repaints the slider and label. Needs the stylesheet. Defaults to True.
+        """
         super().__init__()
+        self._peak_sampler = peak_sampler
+        self._render_profiler = render_profiler
+        self._cached_chrome = cached_chrome
 
         self._prev_volume = None
         self._prev_text = None
@@ -35,11 +60,19 @@ class VolumeView(QWidget):
         self._volume_service.volume_muted.connect(self.mute)
         self._volume_service.volume_unmuted.connect(self.unmute)
 
-        self._volume_changed.connect(self._volume_service.set_volume_of_last_session)
+        # at most one backend write per frame while the slider is dragged,
+        # the writes run on the audio thread of the volume service
+        self._volume_throttle = FrameThrottle(parent=self)
+        self._volume_throttle.value_ready.connect(self._volume_service.set_volume_of_last_session)
+        self._volume_changed.connect(self._volume_throttle.push)
         self._volume_changed.connect(self._change_text_value)
 
-        # animation setup
-        self._animation = QVariantAnimation()
+        # animation setup, the same fade out is reused for every popup
+        self._animation = QVariantAnimation(self)
+        self._animation.setStartValue(self._alpha)
+        self._animation.setEndValue(0.0)
+        self._animation.setDuration(self._fade_out_duration)
+        self._animation.setEasingCurve(QEasingCurve.OutBack)
         self._animation.valueChanged.connect(self.setWindowOpacity)
         self._animation.finished.connect(self.hide) # lambda : sys.exit(0)
 
@@ -50,7 +83,17 @@ class VolumeView(QWidget):
         self._popup_timer.timeout.connect(self._start_fadeout)
         
         self.initUI()
-
+        self._prerendered = False
+        if self._render_profiler is not None:
+            self._render_profiler.watch(self)
+
+    def prerender(self):
+        """Render the popup once while invisible. Call it when the event loop is idle,
+        it is done before the first popup otherwise.
+        """
+        if self._prerendered:
+            return
+        self._prerendered = True
         # for some reason qt uses a lot of time to first time render high unicode chars
         # this helps render once, so it will be a lot faster upcoming times
         # used to render _muted_text
@@ -67,21 +110,46 @@ class VolumeView(QWidget):
         self._slider.setRange(0, 100)
         self._slider.setPageStep(5)
         self._slider.valueChanged.connect(self._volume_changed.emit)
+        self._slider.sliderReleased.connect(self._volume_throttle.flush)
         
         # label
         self._label = QLabel(self._muted_text, self)
         self._label.setAlignment(Qt.AlignCenter | Qt.AlignVCenter)
         self._label.setMinimumWidth(10)
+        if self._cached_chrome:
+            # a new text never changes the layout
+            self._label.setFixedWidth(40)
+
+        # peak meter next to the slider, it samples only while the popup is visible
+        self._peak_meter = None
+        if self._peak_sampler is not None:
+            self._peak_meter = PeakMeter(self._peak_sampler, parent=self)
 
         # add to layout
-        vbox.addWidget(self._slider)
+        if self._peak_meter is not None:
+            hbox = QHBoxLayout()
+            hbox.setSpacing(3)
+            hbox.addWidget(self._slider)
+            hbox.addWidget(self._peak_meter)
+            vbox.addLayout(hbox)
+            vbox.setAlignment(hbox, Qt.AlignHCenter)
+        else:
+            vbox.addWidget(self._slider)
+            vbox.setAlignment(self._slider, Qt.AlignHCenter)
         vbox.addSpacing(2)
         vbox.setContentsMargins(QMargins(0,20,0,14))
         vbox.addWidget(self._label)
         
-        vbox.setAlignment(self._slider, Qt.AlignHCenter)
         vbox.setAlignment(self._label, Qt.AlignHCenter)
 
+        if self._cached_chrome:
+            # the stylesheet paints the whole background of the slider and label, but Qt
+            # only knows after polishing. Marked opaque, the window below them is not
+            # repainted when they change.
+            for widget in (self._slider, self._label):
+                widget.ensurePolished()
+                widget.setAttribute(Qt.WA_OpaquePaintEvent)
+
         # set layout
         self.setLayout(vbox)
         self.setGeometry(50, 60, 65, 140)
@@ -90,10 +158,11 @@ class VolumeView(QWidget):
     @Slot(str)
     @Slot(int)
     def _change_text_value(self, value):
-        logging.info(f"value changed: {value}")
+        log.debug("value changed", value=value)
         self._label.setText(str(value))
 
     def _show(self):
+        self.prerender()
         if self._animation.state() == QAbstractAnimation.State.Running:
             self._animation.stop()
         
@@ -103,22 +172,24 @@ class VolumeView(QWidget):
         if not abs(self.windowOpacity() - self._alpha) < 0.01:
             self.setWindowOpacity(self._alpha)
 
-        if self.isHidden: self.show()
+        if self.isHidden():
+            if self._render_profiler is not None:
+                self._render_profiler.begin_popup()
+            self.show()
 
     def _popup(self):
         self._show()
         if not self.underMouse():
             self._popup_timer.start()
+        tracer.since('keypress', 'keypress_to_popup', max_age=KEYPRESS_MAX_AGE)
 
     def _start_fadeout(self):
-        self._animation.stop()
-        self._animation.setStartValue(self._alpha)
-        self._animation.setEndValue(0.0)
-        self._animation.setDuration(self._fade_out_duration)
-        self._animation.setEasingCurve(QEasingCurve.OutBack)
         self._animation.start()
 
     def _update_volume(self, volume: int, text: str, icon):
+        tracer.since('signal_emit', 'qt_signal_hop')
+        if self._render_profiler is not None:
+            self._render_profiler.update()
         if self._prev_volume != volume:
             self._slider.blockSignals(True)
             self._slider.setValue(volume)
@@ -149,17 +220,31 @@ class VolumeView(QWidget):
     def unmute(self, percentage: int, icon=None):
         self.set_volume(percentage, icon)
 
+    def event(self, event):
+        if self._render_profiler is not None and event.type() == QEvent.UpdateRequest:
+            # the window renders its dirty region
+            start = perf_counter()
+            handled = super().event(event)
+            self._render_profiler.frame(perf_counter() - start)
+            return handled
+        return super().event(event)
+
+    def hideEvent(self, event):
+        if self._render_profiler is not None:
+            self._render_profiler.end_popup()
+        return super().hideEvent(event)
+
     def closeEvent(self, event):
-        print('User has pressed the close button; ignoring')
+        log.info("close button pressed, ignoring")
         event.ignore()
         
     def enterEvent(self, event):
-        print("enterEvent")
+        log.debug("mouse entered popup")
         self._show()
         # return super().enterEvent(event)
 
     def leaveEvent(self, event):
-        print("leaveEvent")
+        log.debug("mouse left popup")
         if not self.windowOpacity()==0.0:
             self._popup()
         # return super().enterEvent(event)
@@ -0,0 +1,158 @@
+"""Hotkey bindings from a json config file.
+
+    {
+        "groups": {"browsers": "*chrome*.exe"},
+        "bindings": [
+            {"keys": ["alt_gr", "page_up"], "action": "volume_up", "step": 2},
+            {"keys": ["alt_gr", "end"], "action": "toggle_duck", "factor": 0.2},
+            {"keys": ["alt_gr", "b"], "action": "toggle_mute", "group": "browsers"}
+        ]
+    }
+
+The config is validated and compiled once, into a BindingTable of callbacks
+with their parameters already bound. Key events only look the table up.
+A "group" parameter is the name of a group of the config, it is passed to the
+action as its process name pattern.
+
+Example Usage:
+>>> actions = {'say': Action(lambda text: lambda: print(text), text=Param(str, "hi"))}
+>>> table = compile_bindings({"bindings": [{"keys": ["ctrl", "h"], "action": "say"}]}, actions)
+>>> table.hotkeys[0].activate()
+hi
+>>> try:
+...     compile_bindings({"bindings": [{"keys": ["ctrl", "h"], "action": "shout"}]}, actions)
+... except HotkeyConfigError as e:
+...     print(e)
+binding 1 (ctrl+h): unknown action 'shout'
+"""
+import json
+import os
+import shutil
+from typing import Any, Callable, Dict
+from hotkey.pyhotkey import BindingTable, InvalidHotkey, make_hotkey
+
+# path of the config file, instead of default_config_path()
+HOTKEYS_ENV = "VOLUME_CONTROL_HOTKEYS"
+# bindings of a new config file
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "default_hotkeys.json")
+REQUIRED = object()
+
+
+def default_config_path() -> str:
+    base = os.getenv('APPDATA') or os.path.expanduser('~')
+    return os.path.join(base, 'volume-control', 'hotkeys.json')
+
+
+def user_config_path() -> str:
+    """Path of the config file of the user, created from DEFAULT_CONFIG if it does not exist"""
+    path = os.getenv(HOTKEYS_ENV) or default_config_path()
+    if not os.path.exists(path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        shutil.copyfile(DEFAULT_CONFIG, path)
+    return path
+
+
+class HotkeyConfigError(ValueError):
+    pass
+
+
+class Param:
+    """A parameter of an action: its type(s), a default, and a check of its value"""
+    __slots__ = ('types', 'default', 'check')
+
+    def __init__(self, types, default=REQUIRED, check: Callable[[Any], bool] = None) -> None:
+        self.types = types if isinstance(types, tuple) else (types,)
+        self.default = default
+        self.check = check
+
+
+class Action:
+    """An action the bindings can use. make(**params) returns the callback of a
+    binding, it can raise ValueError for a combination of parameters it does not support.
+    """
+
+    def __init__(self, make: Callable[..., Callable[[], None]], **params: Param) -> None:
+        self.make = make
+        self.params = params
+
+
+def _params(action: Action, binding: dict, groups: Dict[str, str]) -> Dict[str, Any]:
+    values = {}
+    for name, value in binding.items():
+        if name in ('keys', 'action'):
+            continue
+        param = action.params.get(name)
+        if param is None:
+            raise ValueError(f"unknown parameter '{name}'")
+        if name == 'group':
+            if not isinstance(value, str) or value not in groups:
+                raise ValueError(f"unknown group '{value}'")
+            value = groups[value]
+        # bool is an int, but never a valid number here
+        if not isinstance(value, param.types) or (isinstance(value, bool) and bool not in param.types):
+            raise ValueError(f"{name}: expected {'/'.join(t.__name__ for t in param.types)}, got {value!r}")
+        if param.check is not None and not param.check(value):
+            raise ValueError(f"{name}: invalid value {value!r}")
+        values[name] = value
+    for name, param in action.params.items():
+        if name not in values:
+            if param.default is REQUIRED:
+                raise ValueError(f"missing parameter '{name}'")
+            values[name] = param.default
+    return values
+
+
+def compile_bindings(config: dict, actions: Dict[str, Action]) -> BindingTable:
+    """Validate a config and compile it into a binding table.
+
+    Args:
+        config (dict): parsed config, see the module docstring
+        actions (Dict[str, Action]): actions the bindings can use, by name
+
+    Raises:
+        HotkeyConfigError: the config is invalid, nothing is compiled
+
+    Returns:
+        BindingTable: a hotkey per binding
+    """
+    if not isinstance(config, dict) or not isinstance(config.get('bindings'), list):
+        raise HotkeyConfigError("config must be an object with a list of bindings")
+    groups = config.get('groups', {})
+    if not isinstance(groups, dict) or not all(isinstance(p, str) for p in groups.values()):
+        raise HotkeyConfigError("groups must map names to process name patterns")
+
+    hotkeys = []
+    combos: Dict[frozenset, int] = {}
+    for i, binding in enumerate(config['bindings'], 1):
+        keys = binding.get('keys') if isinstance(binding, dict) else None
+        if not isinstance(keys, list) or not all(isinstance(k, str) for k in keys):
+            raise HotkeyConfigError(f"binding {i}: keys must be a list of key names")
+        where = f"binding {i} ({'+'.join(keys)})"
+        name = binding.get('action')
+        if not isinstance(name, str):
+            raise HotkeyConfigError(f"{where}: action must be the name of an action, got {name!r}")
+        action = actions.get(name)
+        if action is None:
+            raise HotkeyConfigError(f"{where}: unknown action {binding.get('action')!r}")
+        try:
+            callback = action.make(**_params(action, binding, groups))
+            hotkey = make_hotkey(keys, callback)
+        except (ValueError, InvalidHotkey) as e:
+            raise HotkeyConfigError(f"{where}: {e}")
+        if hotkey.keys in combos:
+            raise HotkeyConfigError(f"{where}: same keys as binding {combos[hotkey.keys]}")
+        combos[hotkey.keys] = i
+        hotkeys.append(hotkey)
+    return BindingTable(hotkeys)
+
+
+def load_bindings(path: str, actions: Dict[str, Action]) -> BindingTable:
+    """Read and compile a config file, see compile_bindings()"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        raise HotkeyConfigError(f"could not read {path}: {e}")
+    return compile_bindings(config, actions)
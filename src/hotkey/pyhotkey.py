@@ -1,6 +1,8 @@
-from typing import List, Callable
+from typing import Dict, FrozenSet, Iterable, List, Callable, Optional, Tuple
 
 from pynput import keyboard as kb
+from utils.input_trace import recorder
+from utils.tracing import tracer
 
 
 _MODIFIERS = ('ctrl','alt','shift','cmd','alt_gr',
@@ -9,86 +11,206 @@ _MODIFIERS = ('ctrl','alt','shift','cmd','alt_gr',
 'up','down','left','right',
 'f1','f2','f3','f4','f5','f6','f7','f8','f9','f10','f11','f12')
 
+# keys recorded in input traces besides the keys of the hotkeys
+_TRACED_MODIFIERS = frozenset(key for name, key in kb.Key.__members__.items()
+                              if name.split('_')[0] in ('ctrl', 'alt', 'shift', 'cmd'))
+# name recorded for any other key, a trace is no keylog
+UNBOUND_KEY = '<0>'
+
 class Hotkey(kb.HotKey):
     def __init__(self, keys, on_activate) -> None:
         super().__init__(keys, on_activate)
-    
-    def press(self, key):
-        """Updates the hotkey state for a pressed key.
-        If the key is not currently pressed, but is the last key for the full
-        combination, the activation callback will be invoked.
-        Please note that the callback will only be invoked once.
-        :param key: The key being pressed.
-        :type key: Key or KeyCode
-        """
-        # TODO: check that modifiers are pressed before other
-        # TODO: not activate when extra modifier is pressed as well; if hotkey is <alt>+<pgup>,
-        # hotkey should not activate on <ctrl>+<alt>+<pgup>
-        if key in self._keys:
-            # print(f"here: {key}")
-            self._state.add(key)
-            if self._state == self._keys:
-                self._on_activate()
+        self._trigger = keys[-1]
+
+    @property
+    def keys(self) -> FrozenSet:
+        return frozenset(self._keys)
+
+    @property
+    def trigger(self):
+        """The last key of the combination, the one that activates the hotkey."""
+        return self._trigger
+
+    def activate(self) -> None:
+        self._on_activate()
     # @staticmethod
     # def parse(keys):
     #     super().parse(keys)
 
-class HotkeySet:
-    _listener = None
-    _instance = None
-    _hotkeys = []
-
-    class InvalidHotkey(ValueError):
-        pass
+class InvalidHotkey(ValueError):
+    pass
 
-    def __new__(cls, *args):
-        if cls._instance is None:
-            cls._instance = object.__new__(cls, *args)
-        return cls._instance
 
-    def __key_isvalid(self, key) -> bool:
-        if len(key)==0:
+def _key_isvalid(key) -> bool:
+    if len(key)==0:
+        return False
+    elif len(key)==1:
+        if not key.isascii():
             return False
-        elif len(key)==1:
-            if not key.isascii():
-                return False
-            if not (32 < ord(key) < 127):
-                return False
-        elif not key.lower() in _MODIFIERS:
+        if not (32 < ord(key) < 127):
             return False
-        return True
+    elif not key.lower() in _MODIFIERS:
+        return False
+    return True
+
+
+def make_hotkey(hotkey: List[str], callback: Callable) -> Hotkey:
+    """Hotkey of a key combination, e.g. ('alt_gr', 'page_up')"""
+    if len(hotkey)==0:
+        raise InvalidHotkey("Length of hotkey cannot be 0.")
+
+    current_hotkey = ""
+    for key in hotkey:
+        key=key.lower()
+        if not _key_isvalid(key):
+            raise InvalidHotkey(f"Invalid key '{key}'")
+        if len(key)==1:
+            current_hotkey += f'{key}+'
+        else:
+            current_hotkey += f'<{key}>+'
+    current_hotkey = current_hotkey[:-1]
+
+    return Hotkey(Hotkey.parse(current_hotkey), callback)
+
+
+def key_name(key) -> str:
+    """Name of a key in the syntax of HotKey.parse, e.g. '<alt_gr>', 'a' or '<65>' (virtual key code)"""
+    if isinstance(key, kb.Key):
+        return f'<{key.name}>'
+    char = getattr(key, 'char', None)
+    if char:
+        return char
+    return f'<{key.vk}>'
+
+
+def parse_key(name: str):
+    """Key of a name from key_name()"""
+    if len(name)==1:
+        return kb.KeyCode.from_char(name)
+    return kb.HotKey.parse(name)[0]
+
+
+class BindingTable:
+    """Hotkeys indexed for dispatch: trigger key -> exact set of pressed keys -> hotkeys.
+    A table is never changed after it is built.
+    """
+
+    def __init__(self, hotkeys: Iterable[Hotkey] = ()) -> None:
+        self.hotkeys: Tuple[Hotkey, ...] = tuple(hotkeys)
+        self.dispatch: Dict[object, Dict[FrozenSet, List[Hotkey]]] = {}
+        for hotkey in self.hotkeys:
+            self.dispatch.setdefault(hotkey.trigger, {}).setdefault(hotkey.keys, []).append(hotkey)
+        # keys of any hotkey
+        self.keys: FrozenSet = frozenset().union(*(hotkey.keys for hotkey in self.hotkeys))
+
+    def __len__(self) -> int:
+        return len(self.hotkeys)
+
+    def added(self, hotkey: Hotkey) -> 'BindingTable':
+        return BindingTable(self.hotkeys + (hotkey,))
+
+
+class HotkeySet:
+    """Hotkeys of a keyboard listener. The bindings are one BindingTable, which
+    can be swapped while the listener runs.
+    """
+    InvalidHotkey = InvalidHotkey
+
+    def __init__(self, key_down: Callable[[object], Optional[bool]] = None) -> None:
+        """
+        Args:
+            key_down (Callable, optional): key -> whether it is held down now, None if unknown.
+                When the pressed keys match no hotkey of a trigger, the keys it reports as
+                released are dropped, their release was missed (e.g. on the lock screen).
+                Defaults to trusting the key events.
+        """
+        self._listener = None
+        self._table = BindingTable()
+        self._pressed = set()
+        self._alt_gr = False
+        self._key_down = key_down
+
+    @property
+    def table(self) -> BindingTable:
+        return self._table
 
     def register(self, hotkey: List[str], callback: Callable) -> None:
         """Register a new hotkey."""
-        if len(hotkey)==0:
-            raise self.InvalidHotkey("Length of hotkey cannot be 0.")
-        
-        current_hotkey = ""
-        for key in hotkey:
-            key=key.lower()
-            if not self.__key_isvalid(key):
-                raise self.InvalidHotkey(f"Invalid key '{key}'")
-            if len(key)==1:
-                current_hotkey += f'{key}+'
-            else:
-                current_hotkey += f'<{key}>+'
-        current_hotkey = current_hotkey[:-1]
-
-        self._hotkeys.append(Hotkey(
-            Hotkey.parse(current_hotkey),
-            callback))
+        self._table = self._table.added(make_hotkey(hotkey, callback))
+
+    def swap(self, table: BindingTable) -> BindingTable:
+        """Replace all bindings at once, key events see either the old or the new table.
+
+        Returns:
+            BindingTable: the replaced table
+        """
+        old, self._table = self._table, table
+        return old
+
+    def _canonical(self, key):
+        if self._listener is None:
+            return key
+        return self._listener.canonical(key)
+
+    def _traced_name(self, key) -> str:
+        """Name of a key in an input trace, UNBOUND_KEY for a key of no hotkey"""
+        if key in self._table.keys or key in _TRACED_MODIFIERS:
+            return key_name(key)
+        return UNBOUND_KEY
 
     def _on_press(self,key):
-        for hotkey in self._hotkeys:
-            hotkey.press(self._listener.canonical(key))
+        """The press callback.
+        Only hotkeys triggered by this key are looked at, and a hotkey is only
+        activated when exactly its keys are pressed, with no extra modifiers.
+        :param key: The key provided by the base class.
+        """
+        with tracer.span('hotkey_dispatch'):
+            raw, key = key, self._canonical(key)
+            if recorder.enabled:
+                recorder.key(True, self._traced_name(key))
+            # Windows reports AltGr as a left ctrl followed by alt_gr, also on
+            # key repeat; that ctrl is not part of the combination
+            if raw == kb.Key.alt_gr:
+                self._alt_gr = True
+                self._pressed.discard(self._canonical(kb.Key.ctrl_l))
+            elif raw == kb.Key.ctrl_l and self._alt_gr:
+                return
+            self._pressed.add(key)
+
+            candidates = self._table.dispatch.get(key)
+            if not candidates:
+                return
+            hotkeys = candidates.get(frozenset(self._pressed))
+            if hotkeys is None and self._drop_released(key):
+                hotkeys = candidates.get(frozenset(self._pressed))
+        if hotkeys:
+            tracer.mark('keypress')
+            for hotkey in hotkeys:
+                hotkey.activate()
+
+    def _drop_released(self, key) -> bool:
+        """Drop the pressed keys that are not held down anymore, besides key
+
+        Returns:
+            bool: True if keys were dropped
+        """
+        if self._key_down is None:
+            return False
+        released = [k for k in self._pressed if k != key and self._key_down(k) is False]
+        self._pressed.difference_update(released)
+        return bool(released)
 
     def _on_release(self, key):
         """The release callback.
         This is automatically registered upon creation.
         :param key: The key provided by the base class.
         """
-        for hotkey in self._hotkeys:
-            hotkey.release(self._listener.canonical(key))
+        if key == kb.Key.alt_gr:
+            self._alt_gr = False
+        key = self._canonical(key)
+        self._pressed.discard(key)
+        if recorder.enabled:
+            recorder.key(False, self._traced_name(key))
 
     def listen(self) -> None:
         """Start listening to hotkeys. Non-blocking."""
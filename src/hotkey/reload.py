@@ -0,0 +1,98 @@
+import os
+from time import perf_counter
+from typing import Callable
+from PySide6.QtCore import QFileSystemWatcher, QObject, QTimer, Signal, Slot
+from hotkey.config import HotkeyConfigError
+from hotkey.pyhotkey import BindingTable, HotkeySet
+from utils.log import get_logger
+
+log = get_logger(__name__)
+
+
+class HotkeyConfigReloader(QObject):
+    """Reloads the bindings of a HotkeySet when its config file changes.
+
+    The new table is compiled on the gui thread and swapped in at once, the
+    keyboard listener keeps running. A config that does not compile is logged
+    and the current bindings stay. Editors that save by replacing the file are
+    followed through the directory of the file.
+    """
+    reloaded = Signal(int) # bindings
+
+    def __init__(self, hotkeys: HotkeySet, path: str, load: Callable[[str], BindingTable],
+                 delay_ms: int = 100, parent: QObject = None) -> None:
+        """
+        Args:
+            hotkeys (HotkeySet): hotkeys to update
+            path (str): config file
+            load (Callable[[str], BindingTable]): reads and compiles the config file,
+                raises HotkeyConfigError
+            delay_ms (int, optional): time to wait for more changes, editors often write
+                a file in several steps. Defaults to 100.
+        """
+        super().__init__(parent)
+        self._hotkeys = hotkeys
+        self._path = os.path.abspath(path)
+        self._load = load
+        self._stamp = self._file_stamp()
+        self.reloads = 0
+        self.failed = 0
+        self.last_reload_ms = 0.0
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self._reload_if_changed)
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._changed)
+        self._watcher.directoryChanged.connect(self._changed)
+
+    def start(self) -> None:
+        self._watcher.addPath(os.path.dirname(self._path))
+        self._watch_file()
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self._path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _watch_file(self) -> None:
+        if os.path.exists(self._path) and self._path not in self._watcher.files():
+            self._watcher.addPath(self._path)
+
+    @Slot(str)
+    def _changed(self, path: str):
+        # a replaced file is no longer watched
+        self._watch_file()
+        self._timer.start()
+
+    @Slot()
+    def _reload_if_changed(self):
+        # the directory also changes when other files in it are written
+        stamp = self._file_stamp()
+        if stamp is None or stamp == self._stamp:
+            return
+        self.reload()
+
+    def reload(self) -> bool:
+        """Load the config file and swap in its bindings
+
+        Returns:
+            bool: False if the config did not compile
+        """
+        start = perf_counter()
+        self._stamp = self._file_stamp()
+        try:
+            table = self._load(self._path)
+        except HotkeyConfigError as e:
+            self.failed += 1
+            log.error("hotkey config not reloaded", error=str(e))
+            return False
+        self._hotkeys.swap(table)
+        self.last_reload_ms = (perf_counter() - start) * 1000
+        self.reloads += 1
+        log.info("hotkey config reloaded", bindings=len(table), ms=round(self.last_reload_ms, 2))
+        self.reloaded.emit(len(table))
+        return True
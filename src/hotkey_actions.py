@@ -0,0 +1,92 @@
+from typing import Callable, Dict
+from audio.backend import AudioBackend
+from audio.ramp import RampScheduler
+from group_volume_control import GroupVolCtrl, NamePattern
+from hotkey.config import Action, Param
+from process_volume_control import ActiveWindow_VolCtrl, VolumeCtrlBase, VOLUME_STEP
+
+TARGETS = ('active', 'background')
+
+
+class HotkeyActions:
+    """Actions of the hotkey config (see hotkey/config.py), on the volume controls of the app.
+
+    A binding controls the active window (target "active", the default), the
+    background applications (target "background") or a group of the config.
+    The control of a group is created once per process name pattern and kept
+    across reloads, so a group ducked before a reload can still be restored.
+    """
+
+    def __init__(self, active_window: ActiveWindow_VolCtrl, background_apps: GroupVolCtrl,
+                 backend: AudioBackend, executor=None, ramp: RampScheduler = None,
+                 commands: Dict[str, Callable[[], None]] = None) -> None:
+        """
+        Args:
+            active_window (ActiveWindow_VolCtrl): control of target "active"
+            background_apps (GroupVolCtrl): control of target "background"
+            backend (AudioBackend): sessions of the groups
+            executor (AudioCommandExecutor, optional): runs the audio calls of the groups.
+            ramp (RampScheduler, optional): fades the ducking of the groups.
+            commands (Dict[str, Callable], optional): actions without parameters, e.g. "quit".
+        """
+        self._active_window = active_window
+        self._background_apps = background_apps
+        self._backend = backend
+        self._executor = executor
+        self._ramp = ramp
+        self._commands = dict(commands or {})
+        self._groups: Dict[str, GroupVolCtrl] = {}
+
+    def _control(self, target: str, group: str) -> VolumeCtrlBase:
+        if group is not None:
+            control = self._groups.get(group)
+            if control is None:
+                control = GroupVolCtrl(NamePattern(group), self._backend, executor=self._executor, ramp=self._ramp)
+                self._groups[group] = control
+            return control
+        return self._active_window if target == 'active' else self._background_apps
+
+    def _step(self, sign: int):
+        def make(step, target, group):
+            control, delta = self._control(target, group), sign * step / 100
+            return lambda: control.change_volume(delta)
+        return make
+
+    def _set_volume(self, volume, target, group):
+        control = self._control(target, group)
+        return lambda: control.set_volume(volume)
+
+    def _mute(self, mute: bool):
+        def make(target, group):
+            control = self._control(target, group)
+            return control.mute if mute else control.unmute
+        return make
+
+    def _toggle_mute(self, target, group):
+        return self._control(target, group).toggle_mute
+
+    def _toggle_duck(self, factor, target, group):
+        control = self._control(target, group)
+        if not isinstance(control, GroupVolCtrl):
+            raise ValueError("toggle_duck is only supported for background and groups")
+        return lambda: control.toggle_duck(factor)
+
+    def actions(self) -> Dict[str, Action]:
+        def target(default='active'):
+            return Param(str, default, lambda t: t in TARGETS)
+        group = Param(str, None)
+        step = Param((int, float), VOLUME_STEP * 100, lambda s: 0 < s <= 100)
+        actions = {
+            'volume_up': Action(self._step(1), step=step, target=target(), group=group),
+            'volume_down': Action(self._step(-1), step=step, target=target(), group=group),
+            'set_volume': Action(self._set_volume, volume=Param(int, check=lambda v: 0 <= v <= 100),
+                                 target=target(), group=group),
+            'mute': Action(self._mute(True), target=target(), group=group),
+            'unmute': Action(self._mute(False), target=target(), group=group),
+            'toggle_mute': Action(self._toggle_mute, target=target(), group=group),
+            'toggle_duck': Action(self._toggle_duck, factor=Param((int, float), 0.2, lambda f: 0 <= f <= 1),
+                                  target=target('background'), group=group),
+        }
+        for name, command in self._commands.items():
+            actions[name] = Action(lambda command=command: command)
+        return actions
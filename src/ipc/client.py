@@ -0,0 +1,94 @@
+import socket
+from typing import List
+from ipc.server import default_address, default_token_path
+
+
+class ControlClient:
+    """Blocking client of the control server, one persistent connection.
+
+    Example Usage:
+        with ControlClient() as client:
+            client.request("set 30 name:firefox.exe;mute 1 name:spotify.exe")
+            answers = client.pipeline([f"step -5 pid:{pid}" for pid in pids])
+    """
+
+    def __init__(self, address: str = None, timeout: float = 5.0, token: str = None) -> None:
+        """
+        Args:
+            address (str, optional): socket path, or "host:port". Defaults to default_address().
+            timeout (float, optional): seconds to wait for the server. Defaults to 5.0.
+            token (str, optional): token of a TCP connection. Defaults to the one in default_token_path().
+
+        Raises:
+            ConnectionError: the server refused the token
+        """
+        address = address if address is not None else default_address()
+        host, sep, port = address.rpartition(':')
+        tcp = sep and port.isdigit() and '/' not in address and '\\' not in address
+        if tcp:
+            self._socket = socket.create_connection((host, int(port)), timeout)
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(timeout)
+            self._socket.connect(address)
+        self._file = self._socket.makefile('rb')
+        self.events: List[str] = [] # event lines received while waiting for answers
+        if tcp:
+            if token is None:
+                with open(default_token_path(), 'r', encoding='ascii') as f:
+                    token = f.read().strip()
+            answer = self.request(f"auth {token}")
+            if answer != 'ok':
+                self.close()
+                raise ConnectionError(f"control server refused the token: {answer}")
+
+    def __enter__(self) -> 'ControlClient':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+        self._socket.close()
+
+    def _read_answer(self) -> str:
+        while True:
+            line = self._file.readline()
+            if not line:
+                raise ConnectionError("connection closed by the server")
+            line = line.decode().rstrip('\n')
+            if line.startswith('event '):
+                self.events.append(line)
+                continue
+            return line
+
+    def request(self, line: str) -> str:
+        """Send one request line and wait for its answer line"""
+        self._socket.sendall(line.encode() + b'\n')
+        return self._read_answer()
+
+    def pipeline(self, lines: List[str], window: int = 512) -> List[str]:
+        """Send many request lines without waiting for each answer.
+        At most window requests are unanswered, so neither side blocks on a full socket.
+        """
+        answers = []
+        sent = 0
+        while len(answers) < len(lines):
+            if sent < len(lines) and sent - len(answers) < window:
+                chunk = lines[sent:sent + window // 2]
+                self._socket.sendall(''.join(line + '\n' for line in chunk).encode())
+                sent += len(chunk)
+            else:
+                answers.append(self._read_answer())
+        return answers
+
+    def read_event(self) -> str:
+        """Wait for the next event line (after "sub")"""
+        if self.events:
+            return self.events.pop(0)
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("connection closed by the server")
+        return line.decode().rstrip('\n')
@@ -0,0 +1,104 @@
+"""Line protocol of the control server.
+
+Every request is one line, several commands on a line are separated by ";"
+and are answered together on one line, also separated by ";". Requests can
+be pipelined, answers come back in request order.
+
+    set <volume 0-100> <target>      ok <pid> <volume>
+    step <delta -100..100> <target>  ok <pid> <volume>
+    mute <0|1|toggle> <target>       ok <pid> <mute 0|1>
+    get <target>                     ok <pid> <volume> <mute 0|1> <name>
+    list                             ok <pid>:<volume>:<mute>:<name>,...
+    ping                             ok
+    sub / unsub                      ok, then "event <pid> <volume> <mute 0|1>" lines
+
+A target is "pid:<pid>", "name:<process name>" (case insensitive, may hold
+spaces) or "active" for the window in the foreground. Failed commands are
+answered with "err <reason>".
+
+Over TCP (Windows), the first line of a connection is "auth <token>", with
+the token the server writes to a file only the user can read, see
+ipc.server.default_token_path(). It is answered with "ok", a connection with
+another first line is closed after "err unauthorized". Connections whose
+first line looks like HTTP, e.g. from a web page, are closed without answer.
+"""
+from typing import List, Optional, Tuple
+
+COMMANDS = {
+    # name: takes a value, takes a target
+    'set': (True, True),
+    'step': (True, True),
+    'mute': (True, True),
+    'get': (False, True),
+    'list': (False, False),
+    'ping': (False, False),
+    'sub': (False, False),
+    'unsub': (False, False),
+}
+SEPARATOR = ';'
+AUTH = 'auth'
+_HTTP_METHODS = (b'GET ', b'POST ', b'PUT ', b'HEAD ', b'DELETE ', b'OPTIONS ', b'PATCH ', b'CONNECT ', b'TRACE ')
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+class Command:
+    __slots__ = ('name', 'value', 'target')
+
+    def __init__(self, name: str, value: Optional[str] = None, target: Optional[str] = None) -> None:
+        self.name = name
+        self.value = value
+        self.target = target
+
+    def __repr__(self):
+        return f"Command({self.name}, {self.value}, {self.target})"
+
+
+def parse_command(text: str) -> Command:
+    text = text.strip()
+    name, _, rest = text.partition(' ')
+    spec = COMMANDS.get(name)
+    if spec is None:
+        raise ProtocolError(f"unknown command: {name}")
+    takes_value, takes_target = spec
+    value = None
+    if takes_value:
+        value, _, rest = rest.strip().partition(' ')
+        if not value:
+            raise ProtocolError(f"{name}: missing value")
+    target = rest.strip() or None
+    if takes_target and target is None:
+        raise ProtocolError(f"{name}: missing target")
+    if not takes_target and target is not None:
+        raise ProtocolError(f"{name}: unexpected argument")
+    return Command(name, value, target)
+
+
+def parse_line(line: str) -> List[Tuple[Optional[Command], Optional[str]]]:
+    """Commands of a request line, as (command, None) or (None, error) per command"""
+    parsed = []
+    for text in line.split(SEPARATOR):
+        try:
+            parsed.append((parse_command(text), None))
+        except ProtocolError as e:
+            parsed.append((None, f"err {e}"))
+    return parsed
+
+
+def looks_like_http(line: bytes) -> bool:
+    """Whether the first line of a connection is an HTTP request line"""
+    return line.startswith(_HTTP_METHODS) or b' HTTP/' in line
+
+
+def parse_target(target: str) -> Tuple[str, object]:
+    """("pid", int), ("name", str) or ("active", None)"""
+    if target == 'active':
+        return 'active', None
+    kind, sep, value = target.partition(':')
+    if sep and kind == 'pid' and value.isdigit():
+        return 'pid', int(value)
+    if sep and kind == 'name' and value:
+        return 'name', value
+    raise ProtocolError(f"bad target: {target}")
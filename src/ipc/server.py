@@ -0,0 +1,368 @@
+import asyncio
+import hmac
+import os
+import secrets
+import sys
+import tempfile
+import threading
+from typing import Dict, List, Optional
+from audio.backend import AudioBackend
+from audio.command_executor import InlineExecutor
+from ipc.protocol import AUTH, Command, ProtocolError, looks_like_http, parse_line, parse_target, SEPARATOR
+from process_volume_control import ActiveWindow_VolCtrl
+from utils.log import get_logger
+
+DEFAULT_PORT = 47611 # localhost, where unix sockets are not available
+MAX_BATCH_LINES = 256
+MAX_LINE_LENGTH = 64 * 1024
+
+log = get_logger(__name__)
+
+
+def default_address() -> str:
+    """Unix socket path, or "127.0.0.1:<port>" on Windows"""
+    if sys.platform == 'win32':
+        return f"127.0.0.1:{DEFAULT_PORT}"
+    base = os.getenv('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(base, 'volume-control.sock')
+
+
+def default_token_path() -> str:
+    """File with the token of TCP connections, in the profile of the user"""
+    base = os.getenv('APPDATA') or os.path.expanduser('~')
+    return os.path.join(base, 'volume-control', 'control.token')
+
+
+class _Connection:
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self.subscribed = False
+        self.authorized = False
+        self.events: Dict[int, str] = {} # pid -> latest event line
+        self.flush_scheduled = False
+
+
+class ControlServer:
+    """Local socket server for scripted volume commands, see ipc.protocol.
+
+    Connections are persistent. All complete request lines received from a
+    connection are executed as one batch on the executor, and their answers
+    are written back with one write. Subscribed connections get the volume
+    changes of the backend, only the latest change per pid is sent if the
+    connection falls behind.
+
+    A TCP connection must send the token of the server first, the token is
+    new for every start and written to a file only the user can read. The
+    unix socket is only accessible by the user.
+    """
+
+    def __init__(self, backend: AudioBackend, executor=None, active_window: ActiveWindow_VolCtrl = None,
+                 address: str = None, token_path: str = None) -> None:
+        """
+        Args:
+            backend (AudioBackend): sessions to control
+            executor (AudioCommandExecutor, optional): runs all audio (COM) calls.
+                Defaults to running them on the server thread.
+            active_window (ActiveWindow_VolCtrl, optional): controls the "active" target. Defaults to None.
+            address (str, optional): socket path, or "host:port". Defaults to default_address().
+            token_path (str, optional): file the token of TCP connections is written to.
+                Defaults to default_token_path().
+        """
+        self._backend = backend
+        self._executor = executor if executor is not None else InlineExecutor()
+        self._active_window = active_window
+        self._address = address if address is not None else default_address()
+        self._token_path = token_path if token_path is not None else default_token_path()
+        self._token: Optional[str] = None
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._thread = None
+        self._started = threading.Event()
+        self._connections: List[_Connection] = []
+
+        self.requests = 0
+        self.batches = 0
+
+        backend.volume_changed_event.append(self._volume_changed)
+
+    @property
+    def address(self) -> str:
+        return self._address
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._started.clear()
+        self._thread = threading.Thread(target=self._run, name="control-server", daemon=True)
+        self._thread.start()
+        self._started.wait(5.0)
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5.0)
+        self._thread = None
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            try:
+                if self._address_is_tcp():
+                    self._write_token()
+                loop.run_until_complete(self._listen())
+            except OSError:
+                log.exception("could not listen", address=self._address)
+                return
+            self._loop = loop
+            self._started.set()
+            loop.run_forever()
+            self._server.close()
+            # end open connections
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            if not self._address_is_tcp():
+                try:
+                    os.unlink(self._address)
+                except OSError:
+                    pass
+        finally:
+            self._loop = None
+            if self._token is not None:
+                self._token = None
+                try:
+                    os.unlink(self._token_path)
+                except OSError:
+                    pass
+            self._started.set()
+            loop.close()
+
+    def _write_token(self) -> None:
+        # the profile directory is only readable by the user on Windows, the
+        # mode restricts the file where it applies
+        token = secrets.token_hex(16)
+        os.makedirs(os.path.dirname(self._token_path) or '.', exist_ok=True)
+        try:
+            os.unlink(self._token_path)
+        except FileNotFoundError:
+            pass
+        fd = os.open(self._token_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'w', encoding='ascii') as f:
+            f.write(token)
+        self._token = token
+
+    def _address_is_tcp(self) -> bool:
+        host, sep, port = self._address.rpartition(':')
+        return bool(sep) and port.isdigit() and os.path.sep not in self._address
+
+    async def _listen(self) -> None:
+        if self._address_is_tcp():
+            host, _, port = self._address.rpartition(':')
+            self._server = await asyncio.start_server(self._serve, host, int(port))
+        else:
+            # bound in a directory only the user can enter, and moved into place
+            # once only the user can connect; replaces a socket left by a crash
+            private_dir = tempfile.mkdtemp(prefix='.volume-control-', dir=os.path.dirname(self._address) or '.')
+            path = os.path.join(private_dir, 'control.sock')
+            try:
+                self._server = await asyncio.start_unix_server(self._serve, path)
+                os.chmod(path, 0o600)
+                os.replace(path, self._address)
+            except OSError:
+                if self._server is not None:
+                    self._server.close()
+                raise
+            finally:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                os.rmdir(private_dir)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        connection = _Connection(writer)
+        self._connections.append(connection)
+        buffer = b''
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                # pipelined requests that already arrived run in the same batch
+                *lines, buffer = (buffer + data).split(b'\n')
+                if len(buffer) > MAX_LINE_LENGTH:
+                    break
+                if not connection.authorized and lines:
+                    if not await self._authorize(connection, lines):
+                        break
+                for i in range(0, len(lines), MAX_BATCH_LINES):
+                    answers = await self._execute_batch(connection, lines[i:i+MAX_BATCH_LINES])
+                    writer.write(''.join(answers).encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            # the client left, or the server stops
+            pass
+        finally:
+            self._connections.remove(connection)
+            writer.close()
+
+    async def _authorize(self, connection: _Connection, lines: List[bytes]) -> bool:
+        """Check the first line of a connection, removed from lines if it is the token"""
+        if looks_like_http(lines[0]):
+            log.warning("http request on the control socket", address=self._address)
+            return False
+        if self._token is not None:
+            name, _, token = lines.pop(0).decode('utf-8', 'replace').strip().partition(' ')
+            if name != AUTH or not hmac.compare_digest(token.strip().encode(), self._token.encode()):
+                log.warning("unauthorized control connection", address=self._address)
+                connection.writer.write(b'err unauthorized\n')
+                await connection.writer.drain()
+                return False
+            connection.writer.write(b'ok\n')
+        connection.authorized = True
+        return True
+
+    async def _execute_batch(self, connection: _Connection, lines: List[bytes]) -> List[str]:
+        requests = [parse_line(line.decode('utf-8', 'replace')) for line in lines]
+        self.requests += len(requests)
+        self.batches += 1
+        loop = self._loop
+        future = loop.create_future()
+        def resolve(answers):
+            if not future.done(): # cancelled when the server stops
+                future.set_result(answers)
+        def run():
+            try:
+                answers = [self._answer(connection, request) for request in requests]
+            except Exception as e:
+                log.exception("control command failed")
+                answers = [f"err {e}\n"] * len(requests)
+            if loop.is_closed():
+                return
+            try:
+                loop.call_soon_threadsafe(resolve, answers)
+            except RuntimeError:
+                pass # closed meanwhile
+        self._executor.submit(run)
+        return await future
+
+    # executor thread
+    def _answer(self, connection: _Connection, request) -> str:
+        answers = []
+        for command, answer in request:
+            if command is not None:
+                try:
+                    answer = self._execute(connection, command)
+                except ProtocolError as e:
+                    answer = f"err {e}"
+            answers.append(answer)
+        return SEPARATOR.join(answers) + '\n'
+
+    def _session(self, target: str):
+        kind, value = parse_target(target)
+        if kind == 'pid':
+            session = self._backend.session_by_pid(value)
+        else:
+            session = self._backend.session_by_name(value)
+        if session is None:
+            raise ProtocolError(f"no session: {target}")
+        return session
+
+    def _execute(self, connection: _Connection, command: Command) -> str:
+        name = command.name
+        if name == 'ping':
+            return "ok"
+        if name == 'sub' or name == 'unsub':
+            connection.subscribed = name == 'sub'
+            return "ok"
+        backend = self._backend
+        if name == 'list':
+            return "ok " + ",".join(
+                f"{backend.session_pid(s)}:{round(backend.get_volume(s)*100)}:{int(backend.get_mute(s))}:"
+                f"{backend.session_name(s) or ''}" for s in backend.sessions())
+        if command.target == 'active':
+            return self._execute_active(command)
+
+        session = self._session(command.target)
+        pid = backend.session_pid(session)
+        if name == 'get':
+            return (f"ok {pid} {round(backend.get_volume(session)*100)} {int(backend.get_mute(session))} "
+                    f"{backend.session_name(session) or ''}")
+        if name == 'mute':
+            mute = not backend.get_mute(session) if command.value == 'toggle' else _parse_flag(command.value)
+            backend.set_mute(session, mute)
+            return f"ok {pid} {int(mute)}"
+
+        value = _parse_int(command.value, -100 if name == 'step' else 0, 100)
+        volume = value if name == 'set' else round(backend.get_volume(session)*100) + value
+        volume = max(0, min(100, volume))
+        backend.set_volume(session, volume/100)
+        return f"ok {pid} {volume}"
+
+    def _execute_active(self, command: Command) -> str:
+        # queued on the active window control, like a hotkey press
+        active_window = self._active_window
+        if active_window is None or command.name == 'get':
+            raise ProtocolError(f"{command.name}: not supported for active")
+        if command.name == 'set':
+            active_window.set_volume(_parse_int(command.value, 0, 100))
+        elif command.name == 'step':
+            active_window.change_volume(_parse_int(command.value, -100, 100)/100)
+        elif command.value == 'toggle':
+            active_window.toggle_mute()
+        elif _parse_flag(command.value):
+            active_window.mute()
+        else:
+            active_window.unmute()
+        return "ok active"
+
+    # events
+    def _volume_changed(self, session, volume: float, mute: bool):
+        loop = self._loop
+        if loop is None or not any(c.subscribed for c in self._connections):
+            return
+        pid = self._backend.session_pid(session)
+        line = f"event {pid} {round(volume*100)} {int(mute)}\n"
+        loop.call_soon_threadsafe(self._queue_event, pid, line)
+
+    def _queue_event(self, pid: int, line: str):
+        for connection in self._connections:
+            if not connection.subscribed:
+                continue
+            connection.events[pid] = line
+            if not connection.flush_scheduled:
+                connection.flush_scheduled = True
+                self._loop.call_soon(self._flush_events, connection)
+
+    def _flush_events(self, connection: _Connection):
+        connection.flush_scheduled = False
+        transport = connection.writer.transport
+        if transport.is_closing():
+            return
+        if transport.get_write_buffer_size() > 64 * 1024:
+            # the client falls behind, keep the latest events until it catches up
+            connection.flush_scheduled = True
+            self._loop.call_later(0.01, self._flush_events, connection)
+            return
+        events, connection.events = connection.events, {}
+        connection.writer.write(''.join(events.values()).encode())
+
+
+def _parse_int(value: str, low: int, high: int) -> int:
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ProtocolError(f"bad number: {value}")
+    if not low <= number <= high:
+        raise ProtocolError(f"out of range: {value}")
+    return number
+
+def _parse_flag(value: str) -> bool:
+    if value not in ('0', '1'):
+        raise ProtocolError(f"bad flag: {value}")
+    return value == '1'
@@ -1,20 +1,13 @@
 import sys,os
-from volume_controller import VolumeController
+from utils.startup_profile import StartupProfile
 
-from PySide6.QtCore import QFile, QTextStream
-from PySide6.QtWidgets import QApplication
-from hotkey.pyhotkey import HotkeySet
-from pycaw.pycaw import AudioUtilities
-from gui.volume_view import VolumeView
-from process_volume_control import ActiveWindow_VolCtrl
+# max seconds from start until hotkeys are usable, checked with --profile-startup
+STARTUP_BUDGET = 0.5
+HOTKEYS_USABLE = "hotkeys usable"
 
 
-
-if __name__ == '__main__':
-
-    app = QApplication(sys.argv)
-
-    # set default style
+def load_stylesheet(app):
+    from PySide6.QtCore import QFile, QTextStream
     stylesheet = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gui", "styles", "stylesheet.qss")
     file = QFile(stylesheet)
     file.open(QFile.ReadOnly | QFile.Text)
@@ -22,22 +15,183 @@ if __name__ == '__main__':
     app.setStyleSheet(stream.readAll())
     file.close()
 
-    # create volume controls
-    active_window = ActiveWindow_VolCtrl()
-
-    
-    volume_controller = VolumeController([active_window])
-    volumeview = VolumeView(volume_controller)
-
-    # this needs to run before hotkeys, or error is thrown when running hotkey
-    AudioUtilities.GetAllSessions()
-
-    hk = HotkeySet()
-    hk.register(('alt_gr', 'page_up'), lambda:active_window.volume_up())
-    hk.register(('alt_gr', 'page_down'), lambda:active_window.volume_down())
-    hk.register(('alt_gr', 'shift'), lambda:active_window.toggle_mute())
-    hk.register(('ctrl', 'cmd', 'esc'), lambda:app.exit(0))
-    hk.listen()
-    
-    sys.exit(app.exec_())
-    
+
+def main(argv) -> int:
+    profile_startup = '--profile-startup' in argv
+    profile = StartupProfile(enabled=profile_startup, budget=STARTUP_BUDGET)
+
+    # heavy modules (pycaw, comtypes) are imported on first use, on the audio thread
+    with profile.phase("import qt", imports=True):
+        from PySide6.QtCore import QTimer
+        from PySide6.QtWidgets import QApplication
+    with profile.phase("import pynput", imports=True):
+        from hotkey.pyhotkey import HotkeySet
+    with profile.phase("start logging"):
+        # records are formatted and written on a background thread
+        from utils.log import LogService, get_logger
+        log_service = LogService()
+        log = get_logger(__name__)
+        log_service.start()
+    with profile.phase("import app modules", imports=True):
+        from volume_controller import VolumeController
+        from audio.session_monitor import SessionMonitor, PycawSessionSource
+        from audio.command_executor import AudioCommandExecutor
+        from audio.pycaw_backend import PycawBackend
+        from audio.ramp import RampScheduler
+        from audio.peak_sampler import PeakSampler
+        from gui.volume_view import VolumeView
+        from gui.mixer_view import MixerView
+        from gui.render_profile import RenderProfiler, RENDER_PROFILE_ENV
+        from hotkey.config import DEFAULT_CONFIG, HotkeyConfigError, load_bindings, user_config_path
+        from hotkey.reload import HotkeyConfigReloader
+        from hotkey_actions import HotkeyActions
+        from process_volume_control import ActiveWindow_VolCtrl
+        from group_volume_control import GroupVolCtrl, AllExceptForeground
+        from volume_profiles import VolumeProfiles
+        from utils.profile_store import ProfileStore
+        from utils.foreground import WinEventForegroundSource
+        from utils.tracing import tracer, TRACE_ENV
+        from utils.input_trace import recorder, RECORD_ENV
+        from utils.win_utils import get_process_creation_time, get_process_image_name, is_key_down, list_processes
+        from utils.process_tree import ProcessTree
+
+    with profile.phase("create application"):
+        app = QApplication(argv)
+    with profile.phase("load stylesheet"):
+        # set default style
+        load_stylesheet(app)
+
+    with profile.phase("start audio thread"):
+        # all audio (COM) calls run on this thread
+        executor = AudioCommandExecutor()
+        executor.start()
+        app.aboutToQuit.connect(executor.stop)
+
+    # keep track of audio sessions, this needs to run before hotkeys, or error is thrown when running hotkey.
+    # it runs in the background, hotkey commands queued before it are executed after it
+    warm = {}
+    def warm_up_sessions():
+        try:
+            with profile.phase("session warm-up (audio thread)"):
+                session_monitor.start()
+            profile.mark("sessions warm")
+        finally:
+            warm['sessions'] = True
+    session_source = PycawSessionSource()
+    # released on the audio thread, after the commands already queued for the session
+    session_monitor = SessionMonitor(session_source,
+                                     release=lambda session: executor.submit(session_source.release, session))
+    executor.submit(warm_up_sessions)
+
+    # input of the session (keys, foreground, sessions), to replay it against other builds
+    record_file = os.environ.get(RECORD_ENV)
+    if record_file:
+        recorder.start(record_file, process_name=get_process_image_name)
+        app.aboutToQuit.connect(recorder.stop)
+
+    with profile.phase("create controllers"):
+        # create volume controls
+        backend = PycawBackend(session_monitor)
+        # sessions of newly focused windows are looked up before the first key press
+        foreground = WinEventForegroundSource()
+        # audio of an application played by one of its child processes, e.g. browsers
+        process_tree = ProcessTree(list_processes, get_process_creation_time)
+        active_window = ActiveWindow_VolCtrl(backend=backend, executor=executor, foreground=foreground,
+                                             process_tree=process_tree)
+        app.aboutToQuit.connect(foreground.stop)
+        ramp = RampScheduler(backend, executor)
+        ramp.start()
+        app.aboutToQuit.connect(ramp.stop)
+        background_apps = GroupVolCtrl(AllExceptForeground(foreground.current_pid), backend, executor=executor, ramp=ramp)
+        volume_controller = VolumeController([active_window], executor=executor)
+        # the log is read when first needed, not during startup
+        profile_store = ProfileStore()
+        profile_store.start()
+        app.aboutToQuit.connect(profile_store.stop)
+        VolumeProfiles(profile_store, backend, [active_window], executor=executor)
+        if recorder.enabled:
+            def record_sessions():
+                recorder.sessions([(backend.session_pid(s), backend.session_name(s),
+                                    round(backend.get_volume(s), 3), backend.get_mute(s)) for s in backend.sessions()])
+            # after the warm-up, and after every session change
+            executor.submit(record_sessions, key='record_sessions')
+            def sessions_changed(session):
+                executor.submit(record_sessions, key='record_sessions')
+            backend.subscribe(on_created=sessions_changed, on_expired=sessions_changed)
+    with profile.phase("create volume view"):
+        # level of the session shown in the popup
+        def metered_sessions():
+            session = volume_controller.current_session
+            return [session] if session is not None else []
+        peak_sampler = PeakSampler(backend, metered_sessions, executor)
+        peak_sampler.start()
+        app.aboutToQuit.connect(peak_sampler.stop)
+        render_profiler = None
+        if os.getenv(RENDER_PROFILE_ENV):
+            render_profiler = RenderProfiler()
+            app.aboutToQuit.connect(lambda:render_profiler.report())
+        volumeview = VolumeView(volume_controller, peak_sampler, render_profiler)
+        # sessions are read when the mixer is opened
+        mixer = MixerView(volume_controller, backend, executor)
+
+    if '--control-server' in argv:
+        # scripted commands over a local socket, see ipc/protocol.py
+        from ipc.server import ControlServer
+        control_server = ControlServer(backend, executor, active_window)
+        control_server.start()
+        app.aboutToQuit.connect(control_server.stop)
+
+    with profile.phase("register hotkeys"):
+        # bindings of the config file, reloaded when it changes
+        trace_file = os.environ.get(TRACE_ENV)
+        if tracer.enabled:
+            app.aboutToQuit.connect(lambda:tracer.dump(trace_file))
+        hotkey_actions = HotkeyActions(active_window, background_apps, backend, executor, ramp, commands={
+            'toggle_mixer': lambda:mixer.toggle_requested.emit(),
+            'quit': lambda:app.exit(0),
+            'dump_trace': lambda:tracer.dump(trace_file) if tracer.enabled else None,
+            # recent log records, including debug ones, see utils/log.py
+            'dump_log': lambda:log_service.dump(),
+        }).actions()
+        load = lambda path: load_bindings(path, hotkey_actions)
+        hk = HotkeySet(key_down=is_key_down)
+        hotkey_config = user_config_path()
+        try:
+            hk.swap(load(hotkey_config))
+        except HotkeyConfigError as e:
+            log.error("invalid hotkey config, using the default bindings", error=str(e))
+            hk.swap(load(DEFAULT_CONFIG))
+        hk.listen()
+        reloader = HotkeyConfigReloader(hk, hotkey_config, load)
+        reloader.start()
+    profile.mark(HOTKEYS_USABLE)
+
+    # pre-render glyphs of the popup when the event loop is idle for the first time
+    def prerender():
+        with profile.phase("popup pre-render (first idle)"):
+            volumeview.prerender()
+        profile.mark("popup pre-rendered")
+    QTimer.singleShot(0, prerender)
+    # last, records logged while quitting are still written
+    app.aboutToQuit.connect(log_service.stop)
+
+    if profile_startup:
+        exit_code = []
+        def report_when_warm():
+            if not warm.get('sessions'):
+                return
+            poll.stop()
+            profile.report(HOTKEYS_USABLE)
+            exit_code.append(0 if profile.within_budget(HOTKEYS_USABLE) else 1)
+            app.quit()
+        poll = QTimer()
+        poll.timeout.connect(report_when_warm)
+        poll.start(10)
+        app.exec()
+        return exit_code[0] if exit_code else 1
+
+    return app.exec()
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -1,25 +1,70 @@
 import os
-from PySide6.QtCore import QObject
 from utils.event import Event
+from utils.rate_limit import RateLimiter, RatePolicy, Debounce, TokenBucket
+from utils.tracing import tracer
+from utils.foreground import ForegroundSource
+from utils.input_trace import recorder
+from utils.log import get_logger
 from utils.win_utils import *
-from pycaw.pycaw import AudioUtilities
-import operator
+from audio.backend import AudioBackend
+from audio.command_executor import InlineExecutor
+from audio.session_affinity import SessionAffinity
+from utils.process_tree import ProcessTree
 from time import perf_counter
-from typing import Callable
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict
 # from volume_control_service import VolumeService
 
 VOLUME_STEP = 0.02
 
+log = get_logger(__name__)
+
 class VolumeCtrlBase(ABC):
 
-    def __init__(self) -> None:
+    def __init__(self, rate_policies: Dict[str, RatePolicy]=None) -> None:
+        """
+        Args:
+            rate_policies (Dict[str, RatePolicy], optional): rate policy per action
+                (e.g. 'volume_up', 'mute'), replaces the defaults of that action.
+        """
         super().__init__()
         
         self._volume_changed_event = Event()
         self._volume_muted_event = Event()
         self._volume_unmuted_event = Event()
 
+        policies = self.default_rate_policies()
+        policies.update(rate_policies or {})
+        self._rate_limiter = RateLimiter(policies)
+        self._backend: AudioBackend = None
+
+    @staticmethod
+    def default_rate_policies(clock: Callable[[], float] = perf_counter) -> Dict[str, RatePolicy]:
+        """
+        Args:
+            clock (Callable[[], float], optional): time of the policies, e.g. the time of a replayed trace.
+        """
+        return {
+            # above keyboard auto-repeat rate, only limits floods of key events
+            'volume_up': TokenBucket(rate=50, burst=10, clock=clock),
+            'volume_down': TokenBucket(rate=50, burst=10, clock=clock),
+            # ignore repeated calls from holding the mute hotkey
+            'mute': Debounce(0.1, clock=clock),
+            'unmute': Debounce(0.1, clock=clock),
+            'toggle_mute': Debounce(0.1, clock=clock),
+        }
+
+    @property
+    def backend(self) -> AudioBackend:
+        """Backend of the sessions passed with the events"""
+        return self._backend
+
+    @property
+    def rate_limit_stats(self) -> Dict[str, dict]:
+        """Calls executed, dropped and merged per action"""
+        return self._rate_limiter.stats()
+
     @abstractmethod
     def volume_up(self):
         pass
@@ -42,7 +87,7 @@ class VolumeCtrlBase(ABC):
 
     @property
     def volume_changed_event(self) -> Event:
-        """Volume changed event, args: (self, volume: int, icon)
+        """Volume changed event, args: (session, volume: int, icon)
 
         Returns:
             Event: an event that one can subscribe to
@@ -51,7 +96,7 @@ class VolumeCtrlBase(ABC):
 
     @property
     def volume_muted_event(self) -> Event:
-        """Volume muted event, args: (self, icon)
+        """Volume muted event, args: (session, icon)
 
         Returns:
             Event: an event that one can subscribe to
@@ -60,7 +105,7 @@ class VolumeCtrlBase(ABC):
 
     @property
     def volume_unmuted_event(self) -> Event:
-        """Volume unmuted event, args: (self, volume: int, icon)
+        """Volume unmuted event, args: (session, volume: int, icon)
 
         Returns:
             Event: an event that one can subscribe to
@@ -69,140 +114,270 @@ class VolumeCtrlBase(ABC):
 
 
 class ActiveWindow_VolCtrl(VolumeCtrlBase):
-    def __init__(self, volume_step: float=VOLUME_STEP) -> None:
-        super().__init__()
+    def __init__(self, volume_step: float=VOLUME_STEP, backend: AudioBackend=None, executor=None,
+                 rate_policies: Dict[str, RatePolicy]=None, session_ttl: float=2.0,
+                 foreground: ForegroundSource=None, session_cache_size: int=64,
+                 process_tree: ProcessTree=None) -> None:
+        """
+        Args:
+            volume_step (float, optional): volume change per step. Defaults to VOLUME_STEP.
+            backend (AudioBackend, optional): audio sessions to control. Defaults to PycawBackend.
+            executor (AudioCommandExecutor, optional): runs all audio (COM) calls.
+                Defaults to running them on the calling thread.
+            rate_policies (Dict[str, RatePolicy], optional): see VolumeCtrlBase.
+            session_ttl (float, optional): seconds the session of a pid is reused
+                without looking it up again. Defaults to 2.0.
+            foreground (ForegroundSource, optional): reports foreground window changes, the session
+                of a newly focused window is looked up before its first key press. Cached sessions
+                then stay valid until the backend reports a session change, instead of session_ttl.
+                Defaults to asking the OS for the foreground window on every key press.
+            session_cache_size (int, optional): max number of cached sessions. Defaults to 64.
+            process_tree (ProcessTree, optional): parent/child index of the processes. The session of a
+                window is then looked up among the processes of its application, e.g. the child process
+                of a browser playing its audio, before the first session with the exe name of the window,
+                and a session change only drops the cached sessions of its application. Defaults to the
+                first session with the exe name of the window.
+        """
+        super().__init__(rate_policies)
         # self._vol_service = volume_service
-        self._interface = None
+        if backend is None:
+            from audio.pycaw_backend import PycawBackend
+            backend = PycawBackend()
+        self._backend = backend
+        self._session = None
+        self._executor = executor if executor is not None else InlineExecutor()
         self._volume_step = volume_step
-        self._prev_time = 0.0
-        self._audio_session_time = 0.0 # allow pid for same window to be updated
-        self._prev_pid = None
-
-    def _get_audio_session_active_window(self):
-        pname = get_process_name_active_window()
-        if len(pname)==0: return
-
-        print(f"process name: {pname}")
-
-        session = None
-        sessions = AudioUtilities.GetAllSessions()
-        for s in sessions:
-            if s.Process and s.Process.name() == pname:
-                session = s
-                break
+        self._session_ttl = session_ttl
+        self._session_cache_size = session_cache_size
+        self._session_cache = OrderedDict() # pid -> (session or None, lookup time)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.prefetches = 0
+        self._affinity = SessionAffinity(process_tree, backend) if process_tree is not None else None
+
+        self._foreground = foreground
+        if foreground is not None:
+            foreground.start(self._foreground_changed)
+            self._foreground_changed(foreground.current_pid())
+        if foreground is not None or self._affinity is not None:
+            # sessions found since a lookup make cached results wrong
+            backend.session_created_event.append(self._sessions_changed)
+        # expired sessions are released by the backend, they are never used again
+        backend.session_expired_event.append(self._session_expired)
+
+    def _get_audio_session_active_window(self, pid: int):
+        session = self._backend.session_by_pid(pid)
+        if session is not None:
+            return session
+
+        pname = get_process_image_name(pid)
+        if self._affinity is not None:
+            sessions = self._affinity.sessions(pid, pname)
+            if sessions is not None:
+                # a session of the same exe outside the application is another instance
+                return sessions[0] if sessions else None
+
+        if not pname: return
+
+        log.debug("session by process name", pid=pid, name=pname)
+
+        return self._backend.session_by_name(pname)
+
+    def _foreground_changed(self, pid: int):
+        # runs on the thread of the foreground source
+        if recorder.enabled:
+            recorder.foreground(pid)
+        self._executor.submit(self._prefetch, pid, key=(id(self), 'prefetch'))
+
+    def _prefetch(self, pid: int):
+        if not pid or pid == os.getpid() or pid in self._session_cache:
+            return
+        self.prefetches += 1
+        self._lookup(pid)
+
+    def _sessions_changed(self, session):
+        if self._affinity is not None:
+            self._executor.submit(self._evict_application, session)
+            return
+        self._executor.submit(self._session_cache.clear, key=(id(self), 'clear_session_cache'))
+
+    def _session_expired(self, session):
+        # runs on the thread of the backend notification, the cache and the
+        # last session are only changed by commands of the executor
+        self._executor.submit(self._forget, session)
+
+    def _forget(self, session):
+        if self._affinity is not None:
+            self._evict_application(session)
+        else:
+            self._session_cache.clear()
+        if self._session is session:
+            self._session = None
+
+    def _evict_application(self, session):
+        # only the windows of the application of the session can resolve differently
+        root = self._affinity.session_changed(session)
+        if root is None:
+            self._session_cache.clear()
+            return
+        for pid in [pid for pid in self._session_cache if self._affinity.root(pid) in (root, None)]:
+            del self._session_cache[pid]
+
+    def _lookup(self, pid: int):
+        with tracer.span('session_lookup'):
+            session = self._get_audio_session_active_window(pid)
+        self._session_cache[pid] = (session, perf_counter())
+        self._session_cache.move_to_end(pid)
+        if len(self._session_cache) > self._session_cache_size:
+            self._session_cache.popitem(last=False)
         return session
 
-    def _set_interface_and_continue_execution(self, pid: int) -> bool:
-        """Sets audio interface of active window, if pid has changed, and if it exists for current pid.
-        Then tells the parent function to continue execution or stop.
+    @property
+    def session_cache_stats(self) -> dict:
+        lookups = self.cache_hits + self.cache_misses
+        stats = {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": round(self.cache_hits / lookups, 3) if lookups else 0.0,
+            "prefetches": self.prefetches,
+            "cached": len(self._session_cache),
+        }
+        if self._affinity is not None:
+            stats["affinity"] = self._affinity.stats()
+        return stats
+
+    def _session_for(self, pid: int):
+        """Audio interface of the active window, from the cache if it was looked up recently.
+        The caller uses the returned session only: a session expiring in the
+        meantime clears the last session, not the one of a command in progress.
 
         Args:
             pid (int): process id of active window
 
         Returns:
-            bool: tell the parent function if it should continue the execution or stop
+            the session, or None if the caller should stop
         """
-        # TODO: maybe save interface for pid, and update only if needed
-
-        # performance enhancement (minimize calls to "get_audio_session_active_window")
-        cur_time = perf_counter()
-        if pid == self._prev_pid and cur_time - self._audio_session_time < 2.0:
-            if self._interface:
-                return True
-            return False
-
-        # if the window of this process is activated, we want to skip th
+        # if the window of this process is activated, use the last audio session if it exists
         if pid == os.getpid():
-            if self._interface: # use last audio interface if exist
-                return True
-            return False
-        
-        self._prev_pid = pid
-        self._audio_session_time = cur_time
+            return self._session
 
-        # get session
-        session = self._get_audio_session_active_window()
-        if session is None:
-            self._interface = None
-            return False
-        
-        self._interface = session.SimpleAudioVolume
+        # performance enhancement (minimize calls to "get_audio_session_active_window")
+        entry = self._session_cache.get(pid)
+        if entry is not None and (self._foreground is not None
+                                  or perf_counter() - entry[1] < self._session_ttl):
+            self.cache_hits += 1
+            self._session_cache.move_to_end(pid)
+            session = entry[0]
+        else:
+            self.cache_misses += 1
+            session = self._lookup(pid)
+        self._session = session
+        return session
 
-        if self._interface is None:
-            return False
-        return True
+    def _active_window_pid(self) -> int:
+        if self._foreground is not None:
+            return self._foreground.current_pid()
+        with tracer.span('foreground_pid'):
+            return get_pid_active_window()
 
-    def _volume_delta(self, op: Callable):
+    def _volume_delta(self, delta: float):
         # get process id of active window (lightweight task)
-        pid = get_pid_active_window()
-        if not self._set_interface_and_continue_execution(pid):
+        session = self._session_for(self._active_window_pid())
+        if session is None:
             return
 
-        if self._interface.GetMute():
-            self._interface.SetMute(0, None)
-        vol = max(0.0, min(1.0, op(self._interface.GetMasterVolume(), self._volume_step)))
-        self._interface.SetMasterVolume(vol, None)
+        with tracer.span('com_write'):
+            if self._backend.get_mute(session):
+                self._backend.set_mute(session, False)
+            vol = max(0.0, min(1.0, self._backend.get_volume(session) + delta))
+            self._backend.set_volume(session, vol)
 
-        self._volume_changed_event(self._interface, int(round(vol*100)), icon=None)
+        with tracer.span('event_fanout'):
+            self._volume_changed_event(session, int(round(vol*100)), icon=None)
+
+    def _submit_volume_delta(self, delta: float):
+        # queued steps are merged into one write
+        if not self._executor.submit_delta((id(self), 'volume'), self._volume_delta, delta):
+            self._rate_limiter.merged('volume_up' if delta > 0 else 'volume_down')
 
     def volume_up(self):
         """Increase the volume of the active window
         """
-        self._volume_delta(operator.add)
+        self.change_volume(self._volume_step)
 
     def volume_down(self):
-        self._volume_delta(operator.sub)
+        self.change_volume(-self._volume_step)
+
+    def change_volume(self, delta: float):
+        """Change the volume of the active window by delta (-1.0 - 1.0)"""
+        action = 'volume_up' if delta > 0 else 'volume_down'
+        self._rate_limiter(action, self._submit_volume_delta, delta)
+
+    def _submit_set_volume(self, volume: int):
+        if not self._executor.submit(self._set_volume, volume, key=(id(self), 'set_volume')):
+            self._rate_limiter.merged('set_volume')
 
     def set_volume(self, volume: int):
         if not 0 <= volume <= 100:
             return
+        self._rate_limiter('set_volume', self._submit_set_volume, volume)
+
+    def _set_volume(self, volume: int):
         # pid = get_pid_active_window()
-        if not self._set_interface_and_continue_execution(get_pid_active_window()):
+        session = self._session_for(self._active_window_pid())
+        if session is None:
             return
 
-        self._interface.SetMasterVolume(volume/100, None)
-        self._volume_changed_event(self._interface, volume, icon=None)
-
-    def _timeout_if_needed(self):
-        # add timeout if called repeatedly, a call to 
-        cur_time = perf_counter()
-        if cur_time-self._prev_time < 0.1:
-            return True
-        self._prev_time = cur_time
-        return  False
-
-    def _mute(self, pid):
-        self._interface.SetMute(1, None)
-        print("sending muted event")
-        self._volume_muted_event(self._interface, icon=None)
+        with tracer.span('com_write'):
+            self._backend.set_volume(session, volume/100)
+        with tracer.span('event_fanout'):
+            self._volume_changed_event(session, volume, icon=None)
+
+    def _mute(self, pid, session):
+        with tracer.span('com_write'):
+            self._backend.set_mute(session, True)
+        log.debug("muted", pid=pid)
+        with tracer.span('event_fanout'):
+            self._volume_muted_event(session, icon=None)
         # self._prev_pid = None
 
-    def _unmute(self, pid):
-        self._interface.SetMute(0, None)
-        vol = int(round(self._interface.GetMasterVolume()*100))
-        self._volume_unmuted_event(self._interface, vol, icon=None)
+    def _unmute(self, pid, session):
+        with tracer.span('com_write'):
+            self._backend.set_mute(session, False)
+            vol = int(round(self._backend.get_volume(session)*100))
+        with tracer.span('event_fanout'):
+            self._volume_unmuted_event(session, vol, icon=None)
         # self._prev_pid = None
 
     def mute(self):
-        if self._timeout_if_needed(): return
-        pid = get_pid_active_window()
-        if not self._set_interface_and_continue_execution(pid):
-            return
-        self._mute(pid)
+        self._rate_limiter('mute', self._executor.submit, self._mute_active_window)
 
     def unmute(self):
-        if self._timeout_if_needed(): return
-        pid = get_pid_active_window()
-        if not self._set_interface_and_continue_execution(pid):
-            return
-        self._unmute(pid)
+        self._rate_limiter('unmute', self._executor.submit, self._unmute_active_window)
 
     def toggle_mute(self):
-        if self._timeout_if_needed(): return
-        pid = get_pid_active_window()
-        if not self._set_interface_and_continue_execution(pid):
+        self._rate_limiter('toggle_mute', self._executor.submit, self._toggle_mute_active_window)
+
+    def _mute_active_window(self):
+        pid = self._active_window_pid()
+        session = self._session_for(pid)
+        if session is None:
+            return
+        self._mute(pid, session)
+
+    def _unmute_active_window(self):
+        pid = self._active_window_pid()
+        session = self._session_for(pid)
+        if session is None:
+            return
+        self._unmute(pid, session)
+
+    def _toggle_mute_active_window(self):
+        pid = self._active_window_pid()
+        session = self._session_for(pid)
+        if session is None:
             return
-        if self._interface.GetMute():
-            self._unmute(pid)
+        if self._backend.get_mute(session):
+            self._unmute(pid, session)
         else:
-            self._mute(pid)
+            self._mute(pid, session)
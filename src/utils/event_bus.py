@@ -0,0 +1,108 @@
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Callable, Dict, List
+
+
+def _ref(callback: Callable, weak: bool):
+    if not weak:
+        return lambda: callback
+    if hasattr(callback, '__self__') and hasattr(callback, '__func__'):
+        return weakref.WeakMethod(callback)
+    return weakref.ref(callback)
+
+
+class EventBus:
+    """Events published by topic from any thread, delivered in batches by drain().
+
+    Only the latest event of a topic is kept until it is delivered, events it
+    replaced are counted as coalesced. Topics are delivered in the order they
+    were last published. Subscribers are weak references by default, so a
+    subscriber that is garbage collected is dropped without unsubscribing.
+
+    on_pending is called (on the publishing thread) when the first event is
+    queued after a drain, to schedule the next drain.
+
+    Example Usage:
+    >>> bus = EventBus()
+    >>> received = []
+    >>> bus.subscribe('volume', received.append, weak=False)
+    >>> for volume in (10, 20, 30):
+    ...     bus.publish('volume', volume)
+    >>> bus.drain()
+    1
+    >>> received
+    [30]
+    >>> bus.stats()
+    {'published': 3, 'delivered': 1, 'coalesced': 2, 'pending': 0}
+    """
+
+    def __init__(self, on_pending: Callable[[], None] = None) -> None:
+        self._on_pending = on_pending
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, List] = {}
+        self._pending = OrderedDict() # topic -> args
+
+        self.published = 0
+        self.delivered = 0
+        self.coalesced = 0
+
+    def subscribe(self, topic: str, callback: Callable, weak: bool = True) -> None:
+        """
+        Args:
+            topic (str): topic of the events
+            callback (Callable): called with the args of the event
+            weak (bool, optional): only keep a weak reference to callback. Defaults to True.
+        """
+        with self._lock:
+            self._subscribers.setdefault(topic, []).append(_ref(callback, weak))
+
+    def unsubscribe(self, topic: str, callback: Callable) -> None:
+        with self._lock:
+            refs = self._subscribers.get(topic, [])
+            self._subscribers[topic] = [r for r in refs if r() is not None and r() != callback]
+
+    def publish(self, topic: str, *args) -> None:
+        with self._lock:
+            self.published += 1
+            first = not self._pending
+            if topic in self._pending:
+                self.coalesced += 1
+                self._pending.move_to_end(topic)
+            self._pending[topic] = args
+        if first and self._on_pending is not None:
+            self._on_pending()
+
+    def drain(self) -> int:
+        """Deliver the pending events on the calling thread
+
+        Returns:
+            int: number of events delivered
+        """
+        with self._lock:
+            pending, self._pending = self._pending, OrderedDict()
+            deliveries = []
+            for topic, args in pending.items():
+                refs = self._subscribers.get(topic)
+                if not refs:
+                    continue
+                callbacks = [r() for r in refs]
+                if None in callbacks:
+                    # drop subscribers that were garbage collected
+                    self._subscribers[topic] = [r for r, c in zip(refs, callbacks) if c is not None]
+                deliveries.append((args, [c for c in callbacks if c is not None]))
+            self.delivered += len(pending)
+
+        for args, callbacks in deliveries:
+            for callback in callbacks:
+                callback(*args)
+        return len(pending)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "published": self.published,
+                "delivered": self.delivered,
+                "coalesced": self.coalesced,
+                "pending": len(self._pending),
+            }
@@ -0,0 +1,141 @@
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable
+from utils.log import get_logger
+
+EVENT_SYSTEM_FOREGROUND = 0x0003
+WINEVENT_OUTOFCONTEXT = 0x0000
+WM_QUIT = 0x0012
+
+log = get_logger(__name__)
+
+
+class ForegroundSource(ABC):
+    """Process id of the foreground window, and notifications when it changes"""
+
+    @abstractmethod
+    def start(self, on_changed: Callable[[int], None]) -> None:
+        """Start watching the foreground window
+
+        Args:
+            on_changed (Callable[[int], None]): called with the pid of the new foreground window,
+                on the thread of the source
+        """
+        pass
+
+    @abstractmethod
+    def stop(self) -> None:
+        pass
+
+    @abstractmethod
+    def current_pid(self) -> int:
+        """Pid of the foreground window, without a call to the OS"""
+        pass
+
+
+class WinEventForegroundSource(ForegroundSource):
+    """Foreground changes from a SetWinEventHook(EVENT_SYSTEM_FOREGROUND) hook.
+    The hook and its message loop run on their own thread.
+    """
+
+    def __init__(self) -> None:
+        self._on_changed = None
+        self._pid = 0
+        self._thread = None
+        self._thread_id = None
+        self._ready = threading.Event()
+        self._proc = None # keeps the ctypes callback alive
+
+    def start(self, on_changed: Callable[[int], None]) -> None:
+        if self._thread is not None:
+            return
+        from utils.win_utils import get_pid_active_window
+        self._on_changed = on_changed
+        self._pid = get_pid_active_window()
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name="foreground-hook", daemon=True)
+        self._thread.start()
+        self._ready.wait(1.0)
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        if self._thread_id is not None:
+            import ctypes
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+        self._thread.join(1.0)
+        self._thread = None
+        self._thread_id = None
+
+    def current_pid(self) -> int:
+        return self._pid
+
+    def _run(self) -> None:
+        try:
+            self._hook_and_pump()
+        finally:
+            # start() waits for the hook, even if it failed
+            self._ready.set()
+
+    def _hook_and_pump(self) -> None:
+        import ctypes
+        from ctypes import wintypes
+        user32 = ctypes.windll.user32
+        WinEventProc = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                          wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.SetWinEventHook.argtypes = [wintypes.UINT, wintypes.UINT, wintypes.HMODULE, WinEventProc,
+                                           wintypes.DWORD, wintypes.DWORD, wintypes.UINT]
+        self._proc = WinEventProc(self._callback)
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        hook = user32.SetWinEventHook(EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND, None, self._proc,
+                                      0, 0, WINEVENT_OUTOFCONTEXT)
+        self._ready.set()
+        if not hook:
+            log.error("could not hook foreground window changes")
+            return
+        try:
+            msg = wintypes.MSG()
+            while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+        finally:
+            user32.UnhookWinEvent(hook)
+
+    def _callback(self, hook, event, hwnd, id_object, id_child, event_thread, event_time) -> None:
+        from win32process import GetWindowThreadProcessId
+        try:
+            _, pid = GetWindowThreadProcessId(hwnd)
+        except Exception:
+            log.exception("could not get pid of foreground window", hwnd=hwnd)
+            return
+        if pid == self._pid:
+            return
+        self._pid = pid
+        self._on_changed(pid)
+
+
+class SimulatedForegroundSource(ForegroundSource):
+    """Foreground window set by focus(), notifications are sent on the calling thread"""
+
+    def __init__(self, pid: int = 0) -> None:
+        self._pid = pid
+        self._on_changed = None
+        self.changes = 0
+
+    def start(self, on_changed: Callable[[int], None]) -> None:
+        self._on_changed = on_changed
+
+    def stop(self) -> None:
+        self._on_changed = None
+
+    def current_pid(self) -> int:
+        return self._pid
+
+    def focus(self, pid: int) -> None:
+        if pid == self._pid:
+            return
+        self._pid = pid
+        self.changes += 1
+        if self._on_changed is not None:
+            self._on_changed(pid)
@@ -0,0 +1,164 @@
+"""Recording of the input of the app: key events of the hotkeys, foreground
+window changes and snapshots of the audio sessions, with their time. A trace
+replays the same workload against another build, see benchmarks/replay_trace.py.
+
+A trace is a gzip file of json lines, a header and then one array per event,
+times in microseconds since the start of the recording:
+
+    {"format": "volume-control-trace", "version": 1}
+    [1520, "k", 1, "<alt_gr>"]                     key pressed (0: released)
+    [80112, "f", 4, "app1.exe"]                    foreground pid, process name
+    [90230, "s", [[4, "app1.exe", 0.5, false]]]    sessions: pid, name, volume, mute
+
+Events are queued by the calling thread and written by a background thread.
+
+Example Usage:
+>>> import os, tempfile
+>>> path = os.path.join(tempfile.mkdtemp(), 'trace.jsonl.gz')
+>>> recorder = TraceRecorder()
+>>> recorder.start(path)
+>>> recorder.key(True, '<alt_gr>')
+>>> recorder.stop()
+>>> [event[1:] for event in read_trace(path)]
+[('k', True, '<alt_gr>')]
+"""
+import gzip
+import json
+import queue
+import threading
+from time import perf_counter_ns
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+from utils.log import get_logger
+
+# path of the trace file, recording is off without it
+RECORD_ENV = "VOLUME_CONTROL_RECORD"
+FORMAT = "volume-control-trace"
+VERSION = 1
+KEY, FOCUS, SESSIONS = 'k', 'f', 's'
+
+log = get_logger(__name__)
+
+# (time in us, kind, values...)
+TraceEvent = Tuple[Any, ...]
+
+
+class TraceRecorder:
+    """Records input events to a trace file while it is started.
+
+    Disabled until start(); the recording functions then return right away,
+    callers on hot paths check enabled before preparing their arguments.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.events = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._start = 0
+        self._process_name = None
+
+    def start(self, path: str, process_name: Callable[[int], Optional[str]] = None) -> None:
+        """
+        Args:
+            path (str): trace file, replaced
+            process_name (Callable[[int], Optional[str]], optional): name of the process of a pid,
+                recorded with foreground changes. Called on the writer thread.
+        """
+        if self._thread is not None:
+            return
+        self._process_name = process_name
+        self._start = perf_counter_ns()
+        self._thread = threading.Thread(target=self._write, args=(path,), name="trace-recorder", daemon=True)
+        self._thread.start()
+        self.enabled = True
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """Stop recording and write the queued events"""
+        if self._thread is None:
+            return
+        self.enabled = False
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _put(self, *event) -> None:
+        if self.enabled:
+            self._queue.put(((perf_counter_ns() - self._start) // 1000,) + event)
+
+    def key(self, pressed: bool, key: str) -> None:
+        self._put(KEY, pressed, key)
+
+    def foreground(self, pid: int) -> None:
+        self._put(FOCUS, pid)
+
+    def sessions(self, sessions: List[Tuple[int, str, float, bool]]) -> None:
+        """Snapshot of the audio sessions, (pid, name, volume, mute) per session"""
+        self._put(SESSIONS, sessions)
+
+    def _write(self, path: str) -> None:
+        try:
+            with gzip.open(path, 'wt', encoding='utf-8') as f:
+                f.write(json.dumps({"format": FORMAT, "version": VERSION}) + '\n')
+                while True:
+                    event = self._queue.get()
+                    if event is None:
+                        break
+                    f.write(json.dumps(self._encode(event), separators=(',', ':')) + '\n')
+                    self.events += 1
+        except OSError:
+            self.enabled = False
+            log.exception("could not write trace", path=path)
+
+    def _encode(self, event: TraceEvent) -> list:
+        t, kind = event[0], event[1]
+        if kind == KEY:
+            return [t, kind, int(event[2]), event[3]]
+        if kind == FOCUS:
+            name = None
+            if self._process_name is not None:
+                try:
+                    name = self._process_name(event[2])
+                except Exception:
+                    pass
+            return [t, kind, event[2], name]
+        return list(event)
+
+
+def write_trace(path: str, events: Iterable[TraceEvent]) -> None:
+    """Write events to a trace file, e.g. a synthetic workload"""
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write(json.dumps({"format": FORMAT, "version": VERSION}) + '\n')
+        for event in events:
+            event = list(event)
+            if event[1] == KEY:
+                event[2] = int(event[2])
+            f.write(json.dumps(event, separators=(',', ':')) + '\n')
+
+
+def read_trace(path: str) -> Iterator[TraceEvent]:
+    """Events of a trace file. The events of a trace cut short, e.g. by a crash, are read up to the cut.
+
+    Raises:
+        ValueError: not a trace file, or a newer version
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline() or 'null')
+        if not isinstance(header, dict) or header.get('format') != FORMAT:
+            raise ValueError(f"{path} is not a trace file")
+        if header.get('version', 0) > VERSION:
+            raise ValueError(f"{path}: unsupported trace version {header['version']}")
+        try:
+            for line in f:
+                event = json.loads(line)
+                if event[1] == KEY:
+                    event[2] = bool(event[2])
+                elif event[1] == SESSIONS:
+                    event[2] = [tuple(session) for session in event[2]]
+                yield tuple(event)
+        except (EOFError, json.JSONDecodeError):
+            log.warning("trace cut short", path=path)
+
+
+# shared recorder of the application, started when this environment
+# variable is set to the path of the trace file
+recorder = TraceRecorder()
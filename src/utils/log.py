@@ -0,0 +1,224 @@
+"""Logging that does not format or write on the logging thread.
+
+Records are put on a queue as they are, a background thread formats them and
+writes them to stderr, an optional file and a ring buffer of recent records,
+which can be dumped on demand. Only the traceback of an exception and the
+arguments of a message are formatted before, they would keep objects alive.
+Messages above their rate are dropped before they are queued.
+
+Example Usage:
+>>> log = get_logger('example')
+>>> log.debug("session lookup", pid=4, name="app1.exe")
+>>> service = LogService()
+>>> service.start()
+>>> log.warning("could not open process", pid=8)
+>>> service.stop()
+>>> [record.fields for record in service.recent()]
+[{'pid': 8}]
+"""
+import copy
+import logging
+import os
+import queue
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Dict, List
+from utils.rate_limit import RateLimiter, RatePolicy, TokenBucket
+
+# path of a log file, written in addition to stderr
+LOG_FILE_ENV = "VOLUME_CONTROL_LOG"
+DEFAULT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+MAX_MESSAGES = 1024 # distinct messages with their own rate limit
+
+
+def default_dump_path() -> str:
+    base = os.getenv('APPDATA') or os.path.expanduser('~')
+    return os.path.join(base, 'volume-control', 'recent.log')
+
+
+def get_logger(name: str) -> 'StructuredLogger':
+    return StructuredLogger(logging.getLogger(name))
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """Logger taking the fields of a message as keyword arguments. The message
+    is a constant text, the fields are kept on the record (record.fields) and
+    formatted with it on the background thread.
+    """
+    _keywords = ('exc_info', 'stack_info', 'stacklevel', 'extra')
+
+    def __init__(self, logger: logging.Logger) -> None:
+        super().__init__(logger, None)
+
+    def process(self, msg, kwargs):
+        fields = {key: kwargs.pop(key) for key in list(kwargs) if key not in self._keywords}
+        if fields:
+            kwargs['extra'] = {'fields': fields}
+        return msg, kwargs
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formats the fields of a record after its message, as key=value"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if not fields:
+            return text
+        # the traceback of an exception stays below the message
+        line, newline, rest = text.partition('\n')
+        values = " ".join(f"{key}={value!r}" if isinstance(value, str) else f"{key}={value}"
+                          for key, value in fields.items())
+        return f"{line} {values}{newline}{rest}"
+
+
+class RateLimitFilter(logging.Filter):
+    """Drops the records of a message above the rate of its policy. Records are
+    keyed by their message text (not formatted), e.g. {"process name": Sample(10)}
+    keeps one of ten. Messages without a policy get default_policy.
+    """
+
+    def __init__(self, policies: Dict[str, RatePolicy] = None,
+                 default_policy: Callable[[], RatePolicy] = lambda: TokenBucket(rate=20, burst=50)) -> None:
+        super().__init__()
+        self._limiter = RateLimiter(policies, default_policy)
+        self._messages = set(policies or ())
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = record.msg if isinstance(record.msg, str) else type(record.msg).__name__
+        if key not in self._messages:
+            if len(self._messages) >= MAX_MESSAGES:
+                # formatted messages, share one policy
+                key = '*'
+            self._messages.add(key)
+        return self._limiter(key, _keep)
+
+    @property
+    def dropped(self) -> int:
+        return sum(stats['dropped'] for stats in self._limiter.stats().values())
+
+
+def _keep():
+    pass
+
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the latest records in memory"""
+
+    def __init__(self, size: int, level: int = logging.NOTSET) -> None:
+        super().__init__(level)
+        self._records = deque(maxlen=size)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self._records.append(record)
+
+    def records(self) -> List[logging.LogRecord]:
+        with self.lock:
+            return list(self._records)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    _exception_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # the record stays in this process, it is formatted by the listener.
+        # Only what holds references is formatted here: the traceback, whose
+        # frames keep their locals (e.g. COM wrappers) alive in the ring
+        # buffer, and the arguments of the message.
+        if not record.exc_info and not record.args:
+            return record
+        record = copy.copy(record)
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class LogService:
+    """Logging of the app: records of all loggers are queued, the console, the
+    log file and the ring buffer are written by a background thread.
+    """
+
+    def __init__(self, level: int = logging.INFO, path: str = None, ring_size: int = 2000,
+                 ring_level: int = logging.DEBUG, policies: Dict[str, RatePolicy] = None,
+                 stream=None) -> None:
+        """
+        Args:
+            level (int, optional): level written to stderr and the log file. Defaults to logging.INFO.
+            path (str, optional): log file. Defaults to $VOLUME_CONTROL_LOG, or no file.
+            ring_size (int, optional): recent records kept in memory. Defaults to 2000.
+            ring_level (int, optional): level kept in the ring buffer. Defaults to logging.DEBUG.
+            policies (Dict[str, RatePolicy], optional): rate policy per message, see RateLimitFilter.
+            stream (optional): console stream. Defaults to sys.stderr.
+        """
+        self._level = level
+        self._ring_level = ring_level
+        self._formatter = StructuredFormatter(DEFAULT_FORMAT)
+        self._filter = RateLimitFilter(policies)
+        self._queue = queue.SimpleQueue()
+        self._handler = _DeferredQueueHandler(self._queue)
+        self._handler.addFilter(self._filter)
+
+        handlers = [logging.StreamHandler(stream)]
+        path = path if path is not None else os.getenv(LOG_FILE_ENV)
+        if path:
+            handlers.append(logging.FileHandler(path, delay=True, encoding='utf-8'))
+        for handler in handlers:
+            handler.setLevel(level)
+            handler.setFormatter(self._formatter)
+        self._ring = RingBufferHandler(ring_size, ring_level)
+        self._handlers = handlers
+        self._listener = QueueListener(self._queue, *handlers, self._ring, respect_handler_level=True)
+        self._started = False
+
+    def start(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        root = logging.getLogger()
+        root.setLevel(min(self._level, self._ring_level))
+        root.addHandler(self._handler)
+        self._listener.start()
+
+    def stop(self) -> None:
+        """Write the queued records and stop the background thread"""
+        if not self._started:
+            return
+        self._started = False
+        logging.getLogger().removeHandler(self._handler)
+        self._listener.stop()
+        for handler in self._handlers:
+            handler.close()
+
+    def recent(self) -> List[logging.LogRecord]:
+        """Records in the ring buffer, oldest first"""
+        return self._ring.records()
+
+    def dump(self, path: str = None) -> str:
+        """Write the records of the ring buffer to a file.
+
+        Args:
+            path (str, optional): file to write. Defaults to default_dump_path().
+
+        Returns:
+            str: path of the written file
+        """
+        path = path if path is not None else default_dump_path()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in self.recent():
+                f.write(self._formatter.format(record) + '\n')
+        return path
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "dropped": self._filter.dropped,
+            "recent": len(self._ring.records()),
+        }
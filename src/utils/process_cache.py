@@ -0,0 +1,106 @@
+import threading
+from collections import OrderedDict
+from ntpath import basename
+from typing import Any, Callable, Optional
+from utils.log import get_logger
+
+log = get_logger(__name__)
+
+
+class ProcessNameCache:
+    """Bounded LRU cache of pid -> (creation time, image name).
+
+    Process ids are reused by the OS, so a cached name is only returned when
+    the creation time of the process still matches the cached one.
+
+    The OS calls are injected, so the cache can run without Windows.
+    """
+
+    def __init__(self,
+                 open_process: Callable[[int], Any],
+                 close_handle: Callable[[Any], None],
+                 get_creation_time: Callable[[Any], Any],
+                 get_image_path: Callable[[Any], str],
+                 maxsize: int = 128) -> None:
+        """
+        Args:
+            open_process (Callable): pid -> process handle
+            close_handle (Callable): closes a process handle
+            get_creation_time (Callable): process handle -> creation time
+            get_image_path (Callable): process handle -> path of the executable
+            maxsize (int, optional): max number of cached processes. Defaults to 128.
+        """
+        self._open_process = open_process
+        self._close_handle = close_handle
+        self._get_creation_time = get_creation_time
+        self._get_image_path = get_image_path
+        self._maxsize = maxsize
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0 # misses caused by pid reuse
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, pid: int) -> Optional[str]:
+        """Image name (e.g. "firefox.exe") of a process.
+
+        Args:
+            pid (int): process id
+
+        Returns:
+            Optional[str]: image name, or None if the process could not be queried
+        """
+        try:
+            handle = self._open_process(pid)
+        except Exception:
+            log.warning("could not open process", pid=pid, exc_info=True)
+            return None
+
+        try:
+            creation_time = self._get_creation_time(handle)
+            with self._lock:
+                entry = self._entries.get(pid)
+                if entry is not None:
+                    if entry[0] == creation_time:
+                        self._entries.move_to_end(pid)
+                        self.hits += 1
+                        return entry[1]
+                    self.stale += 1
+                self.misses += 1
+
+            name = basename(self._get_image_path(handle))
+        except Exception:
+            log.warning("could not get process name", pid=pid, exc_info=True)
+            return None
+        finally:
+            self._close_handle(handle)
+
+        with self._lock:
+            self._entries[pid] = (creation_time, name)
+            self._entries.move_to_end(pid)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+        return name
+
+    def invalidate(self, pid: int) -> None:
+        with self._lock:
+            self._entries.pop(pid, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.stale = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self._maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+            }
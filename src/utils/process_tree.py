@@ -0,0 +1,197 @@
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from utils.log import get_logger
+
+log = get_logger(__name__)
+
+
+class ProcessTree:
+    """Parent/child index of the running processes, updated incrementally.
+
+    refresh() lists the processes in one call and applies the difference to
+    the index. Only new processes are asked for their creation time, which
+    tells a parent from a process that reused the pid of an exited parent.
+    Lookups walk the index in memory, without calls to the OS. A process
+    looked up by pid is checked with validate() first, its pid may have
+    been reused since the last refresh.
+
+    The OS calls are injected, so the index can run without Windows.
+
+    Example Usage:
+    >>> table = [(4, 0, "explorer.exe"), (8, 4, "chrome.exe"), (12, 8, "chrome.exe"), (16, 8, "chrome.exe")]
+    >>> tree = ProcessTree(lambda: table)
+    >>> tree.refresh()
+    True
+    >>> tree.app_root(16), list(tree.descendants(8))
+    (8, [8, 12, 16])
+    >>> list(tree.descendants(4)), list(tree.descendants(4, same_name=True))
+    ([4, 8, 12, 16], [4])
+    """
+
+    def __init__(self, list_processes: Callable[[], Iterable[Tuple[int, int, str]]],
+                 creation_time: Callable[[int], Any] = None) -> None:
+        """
+        Args:
+            list_processes (Callable): all processes as (pid, parent pid, exe name)
+            creation_time (Callable, optional): pid -> creation time, or None if the process
+                could not be queried. Defaults to trusting every parent pid.
+        """
+        self._list_processes = list_processes
+        self._creation_time = creation_time
+        self._lock = threading.Lock()
+        self._processes: Dict[int, tuple] = {} # pid -> (parent pid, name, creation time)
+        self._children: Dict[int, Set[int]] = {} # parent pid -> pids
+        self.refreshes = 0
+        self.added = 0
+        self.removed = 0
+
+    def __len__(self) -> int:
+        return len(self._processes)
+
+    def __contains__(self, pid: int) -> bool:
+        return pid in self._processes
+
+    def refresh(self) -> bool:
+        """Apply the current process list to the index
+
+        Returns:
+            bool: True if processes were added or removed
+        """
+        try:
+            listed = {pid: (ppid, name) for pid, ppid, name in self._list_processes()}
+        except Exception:
+            log.warning("could not list processes", exc_info=True)
+            return False
+        with self._lock:
+            self.refreshes += 1
+            # a pid with another parent or name is a new process
+            gone = [pid for pid, entry in self._processes.items() if listed.get(pid) != entry[:2]]
+            for pid in gone:
+                self._remove(pid)
+            new = [pid for pid in listed if pid not in self._processes]
+        created = {pid: self._created(pid) for pid in new}
+        with self._lock:
+            for pid in new:
+                ppid, name = listed[pid]
+                self._processes[pid] = (ppid, name, created[pid])
+                self._children.setdefault(ppid, set()).add(pid)
+            self.added += len(new)
+            self.removed += len(gone)
+        return bool(new or gone)
+
+    def validate(self, pid: int, name: str = None) -> bool:
+        """Check that a process of the index is still the one running with its pid.
+        A process that reused the pid, with another creation time or exe name,
+        is removed from the index, the next refresh adds it.
+
+        Args:
+            pid (int): process id
+            name (str, optional): exe name of the running process, if known
+
+        Returns:
+            bool: False if the pid is not in the index or was reused
+        """
+        with self._lock:
+            entry = self._processes.get(pid)
+        if entry is None:
+            return False
+        reused = name is not None and name.lower() != entry[1].lower()
+        if not reused and entry[2] is not None:
+            created = self._created(pid)
+            reused = created is not None and created != entry[2]
+        if reused:
+            with self._lock:
+                if self._processes.get(pid) is entry:
+                    self._remove(pid)
+                    self.removed += 1
+            log.debug("pid reused", pid=pid, name=name)
+        return not reused
+
+    def _created(self, pid: int):
+        if self._creation_time is None:
+            return None
+        try:
+            return self._creation_time(pid)
+        except Exception:
+            return None
+
+    def _remove(self, pid: int) -> None:
+        ppid = self._processes.pop(pid)[0]
+        siblings = self._children.get(ppid)
+        if siblings is not None:
+            siblings.discard(pid)
+            if not siblings:
+                del self._children[ppid]
+
+    def _is_child(self, parent: tuple, child: tuple) -> bool:
+        # the parent pid of a process is not updated when its parent exits,
+        # a process started later can have that pid
+        return parent[2] is None or child[2] is None or parent[2] <= child[2]
+
+    def parent(self, pid: int) -> Optional[int]:
+        with self._lock:
+            entry = self._processes.get(pid)
+            if entry is None or entry[0] == pid:
+                return None
+            parent = self._processes.get(entry[0])
+            if parent is None or not self._is_child(parent, entry):
+                return None
+            return entry[0]
+
+    def children(self, pid: int) -> List[int]:
+        with self._lock:
+            entry = self._processes.get(pid)
+            if entry is None:
+                return []
+            return sorted(child for child in self._children.get(pid, ())
+                          if child != pid and self._is_child(entry, self._processes[child]))
+
+    def name(self, pid: int) -> Optional[str]:
+        entry = self._processes.get(pid)
+        return entry[1] if entry is not None else None
+
+    def app_root(self, pid: int) -> Optional[int]:
+        """Highest ancestor of a process with the same exe name, e.g. the main process of a browser"""
+        name = self.name(pid)
+        if name is None:
+            return None
+        name = name.lower()
+        root, seen = pid, {pid}
+        parent = self.parent(root)
+        while parent is not None and parent not in seen and (self.name(parent) or "").lower() == name:
+            root = parent
+            seen.add(root)
+            parent = self.parent(root)
+        return root
+
+    def descendants(self, pid: int, same_name: bool = False) -> Iterator[int]:
+        """A process and its descendants, closest first
+
+        Args:
+            pid (int): process id
+            same_name (bool, optional): only the descendants with the exe name of the process,
+                through processes with that name. Defaults to False.
+        """
+        name = self.name(pid)
+        if name is None:
+            return
+        name = name.lower()
+        queue, seen = deque((pid,)), {pid}
+        while queue:
+            pid = queue.popleft()
+            yield pid
+            for child in self.children(pid):
+                if same_name and (self.name(child) or "").lower() != name:
+                    continue
+                if child not in seen:
+                    seen.add(child)
+                    queue.append(child)
+
+    def stats(self) -> dict:
+        return {
+            "processes": len(self._processes),
+            "refreshes": self.refreshes,
+            "added": self.added,
+            "removed": self.removed,
+        }
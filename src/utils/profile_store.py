@@ -0,0 +1,201 @@
+import os
+import threading
+from typing import Dict, Optional, Tuple
+from utils.log import get_logger
+
+log = get_logger(__name__)
+
+
+def default_profile_path() -> str:
+    base = os.getenv('APPDATA') or os.path.expanduser('~')
+    return os.path.join(base, 'volume-control', 'volume_profiles.log')
+
+
+class ProfileStore:
+    """Volume (0 - 100) per process name, persisted in an append-only log.
+
+    Every line of the log is "<process name>\\t<volume>", later lines replace
+    earlier ones. The log is read by the background writer when it starts,
+    or by the first get() without it, not at construction; record() never
+    reads it. Records are written by the writer in batches, only the latest
+    volume of a name is written per batch. When the log holds many more
+    lines than names, it is compacted into a new file that replaces the old
+    one. Files are written without holding the lock of record() and get().
+    """
+
+    def __init__(self, path: str = None, flush_interval: float = 1.0, compact_ratio: int = 4,
+                 compact_min_lines: int = 1000) -> None:
+        """
+        Args:
+            path (str, optional): log file. Defaults to default_profile_path().
+            flush_interval (float, optional): seconds records are collected before a write. Defaults to 1.0.
+            compact_ratio (int, optional): compact when the log has this many lines per name. Defaults to 4.
+            compact_min_lines (int, optional): never compact logs shorter than this. Defaults to 1000.
+        """
+        self._path = path if path is not None else default_profile_path()
+        self._flush_interval = flush_interval
+        self._compact_ratio = compact_ratio
+        self._compact_min_lines = compact_min_lines
+
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock() # one load or write of the file at a time
+        self._loaded = threading.Event()
+        self._profiles: Dict[str, int] = {} # recorded before the log is loaded, then all
+        self._pending: Dict[str, int] = {}
+        self._lines = 0 # lines in the log file
+
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+
+        self.writes = 0
+        self.records = 0
+        self.compactions = 0
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def load(self) -> None:
+        """Read the log, if it was not read yet. Volumes recorded before replace the ones of the log."""
+        if self._loaded.is_set():
+            return
+        with self._write_lock:
+            if self._loaded.is_set():
+                return
+            profiles, lines = self._read()
+            with self._lock:
+                profiles.update(self._profiles)
+                self._profiles = profiles
+                self._lines = lines
+            self._loaded.set()
+
+    def _read(self) -> Tuple[Dict[str, int], int]:
+        profiles = {}
+        lines = 0
+        try:
+            with open(self._path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    lines += 1
+                    name, sep, volume = line.rstrip('\n').rpartition('\t')
+                    # skip lines cut off by a crash
+                    if not sep or not volume.isdigit():
+                        continue
+                    profiles[name] = min(int(volume), 100)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            log.exception("could not read volume profiles", path=self._path)
+        return profiles, lines
+
+    def get(self, name: str) -> Optional[int]:
+        """Saved volume of a process name (case insensitive), or None"""
+        self.load()
+        with self._lock:
+            return self._profiles.get(name.lower())
+
+    def record(self, name: str, volume: int) -> None:
+        """Save the volume of a process name, written to the log later"""
+        if not name:
+            return
+        name = name.lower()
+        with self._lock:
+            if self._profiles.get(name) == volume and name not in self._pending:
+                return
+            self._profiles[name] = volume
+            self._pending[name] = volume
+            self.records += 1
+        self._wake.set()
+
+    def __len__(self) -> int:
+        self.load()
+        with self._lock:
+            return len(self._profiles)
+
+    def start(self) -> None:
+        """Start the background writer, it reads the log first"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="profile-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background writer, and write what is pending"""
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(5.0)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        self.load()
+        while self._running:
+            self._wake.wait()
+            if not self._running:
+                break
+            # collect records for a while, so a held hotkey is one write
+            threading.Event().wait(self._flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Write pending records, and compact the log if it has grown too long"""
+        self.load()
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                if not pending:
+                    return
+                # the file is written from a copy, records go on meanwhile
+                snapshot = dict(self._profiles) if self._needs_compaction(len(pending)) else None
+            try:
+                if snapshot is not None:
+                    self._compact(snapshot)
+                else:
+                    self._append(pending)
+            except OSError:
+                log.exception("could not write volume profiles", path=self._path)
+                # try again with the next batch
+                with self._lock:
+                    pending.update(self._pending)
+                    self._pending = pending
+
+    def _needs_compaction(self, new_lines: int) -> bool:
+        # caller holds the lock
+        lines = self._lines + new_lines
+        return lines >= self._compact_min_lines and lines >= self._compact_ratio * len(self._profiles)
+
+    def _append(self, pending: Dict[str, int]) -> None:
+        os.makedirs(os.path.dirname(self._path) or '.', exist_ok=True)
+        with open(self._path, 'a', encoding='utf-8') as f:
+            f.write(''.join(f"{name}\t{volume}\n" for name, volume in pending.items()))
+        with self._lock:
+            self._lines += len(pending)
+            self.writes += 1
+
+    def _compact(self, profiles: Dict[str, int]) -> None:
+        # write the current profiles to a new file, then replace the log with it
+        os.makedirs(os.path.dirname(self._path) or '.', exist_ok=True)
+        tmp_path = self._path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(''.join(f"{name}\t{volume}\n" for name, volume in profiles.items()))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._path)
+        with self._lock:
+            self._lines = len(profiles)
+            self.writes += 1
+            self.compactions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "profiles": len(self._profiles) if self._loaded.is_set() else None,
+                "log_lines": self._lines,
+                "pending": len(self._pending),
+                "records": self.records,
+                "writes": self.writes,
+                "compactions": self.compactions,
+            }
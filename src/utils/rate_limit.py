@@ -0,0 +1,167 @@
+import threading
+from abc import ABC, abstractmethod
+from time import perf_counter
+from typing import Callable, Dict
+
+
+class RatePolicy(ABC):
+    """Decides if a call of an action is executed or dropped. Calls that are
+    not dropped can still be merged by the executor, see AudioCommandExecutor.
+
+    Counters:
+        calls: number of calls made to the policy
+        executed: number of times the wrapped function ran
+        dropped: calls that were discarded
+        merged: executed calls the executor merged into a queued call
+    """
+
+    def __init__(self, clock: Callable[[], float] = perf_counter) -> None:
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executed = 0
+        self.dropped = 0
+        self.merged = 0
+
+    @abstractmethod
+    def __call__(self, func: Callable, *args) -> bool:
+        """Call func(*args) if the policy allows it.
+
+        Returns:
+            bool: False if the call was dropped
+        """
+        pass
+
+    def count_merged(self) -> None:
+        with self._lock:
+            self.merged += 1
+
+    def stats(self) -> dict:
+        return {
+            "policy": type(self).__name__,
+            "calls": self.calls,
+            "executed": self.executed,
+            "dropped": self.dropped,
+            "merged": self.merged,
+        }
+
+
+class Unlimited(RatePolicy):
+    """Every call is executed."""
+
+    def __call__(self, func: Callable, *args) -> bool:
+        with self._lock:
+            self.calls += 1
+            self.executed += 1
+        func(*args)
+        return True
+
+
+class Debounce(RatePolicy):
+    """Leading-edge debounce: a call is executed immediately, and calls within
+    `interval` seconds of the last executed call are dropped.
+    """
+
+    def __init__(self, interval: float, clock: Callable[[], float] = perf_counter) -> None:
+        super().__init__(clock)
+        self.interval = interval
+        self._prev_time = None
+
+    def __call__(self, func: Callable, *args) -> bool:
+        with self._lock:
+            self.calls += 1
+            cur_time = self._clock()
+            if self._prev_time is not None and cur_time - self._prev_time < self.interval:
+                self.dropped += 1
+                return False
+            self._prev_time = cur_time
+            self.executed += 1
+        func(*args)
+        return True
+
+
+class TokenBucket(RatePolicy):
+    """Token bucket: allows bursts of up to `burst` calls, refilled at `rate`
+    calls per second. Calls without a token are dropped.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, clock: Callable[[], float] = perf_counter) -> None:
+        super().__init__(clock)
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._prev_time = clock()
+
+    def __call__(self, func: Callable, *args) -> bool:
+        with self._lock:
+            self.calls += 1
+            cur_time = self._clock()
+            self._tokens = min(self.burst, self._tokens + (cur_time - self._prev_time)*self.rate)
+            self._prev_time = cur_time
+            if self._tokens < 1.0:
+                self.dropped += 1
+                return False
+            self._tokens -= 1.0
+            self.executed += 1
+        func(*args)
+        return True
+
+
+class Sample(RatePolicy):
+    """Executes one call of every `every` calls, starting with the first one."""
+
+    def __init__(self, every: int, clock: Callable[[], float] = perf_counter) -> None:
+        super().__init__(clock)
+        self.every = every
+
+    def __call__(self, func: Callable, *args) -> bool:
+        with self._lock:
+            self.calls += 1
+            if (self.calls - 1) % self.every:
+                self.dropped += 1
+                return False
+            self.executed += 1
+        func(*args)
+        return True
+
+
+class RateLimiter:
+    """Rate policies per action name. Actions without a policy get a new policy
+    from default_policy, unlimited by default.
+
+    Example Usage:
+    >>> limiter = RateLimiter({'mute': Debounce(0.1)})
+    >>> limiter('mute', print, 'muted')
+    muted
+    True
+    >>> limiter('mute', print, 'muted')
+    False
+    >>> limiter.stats()['mute']['dropped']
+    1
+    """
+
+    def __init__(self, policies: Dict[str, RatePolicy] = None,
+                 default_policy: Callable[[], RatePolicy] = Unlimited) -> None:
+        self._policies: Dict[str, RatePolicy] = dict(policies or {})
+        self._default_policy = default_policy
+
+    def __call__(self, action: str, func: Callable, *args) -> bool:
+        policy = self._policies.get(action)
+        if policy is None:
+            policy = self._policies.setdefault(action, self._default_policy())
+        return policy(func, *args)
+
+    def policy(self, action: str) -> RatePolicy:
+        return self._policies.get(action)
+
+    def merged(self, action: str) -> None:
+        """Count an executed call of an action that was merged into a queued call"""
+        policy = self._policies.get(action)
+        if policy is not None:
+            policy.count_merged()
+
+    def set_policy(self, action: str, policy: RatePolicy) -> None:
+        self._policies[action] = policy
+
+    def stats(self) -> Dict[str, dict]:
+        return {action: policy.stats() for action, policy in self._policies.items()}
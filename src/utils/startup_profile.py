@@ -0,0 +1,78 @@
+import sys
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+from typing import List, Tuple
+
+
+class StartupProfile:
+    """Time per startup phase, and milestones since the start of the process.
+
+    Phases that only import modules are marked, so their total import time
+    can be reported separately. When disabled, phase() and mark() do nothing.
+    """
+
+    def __init__(self, enabled: bool = False, budget: float = None) -> None:
+        """
+        Args:
+            enabled (bool, optional): record phases and milestones. Defaults to False.
+            budget (float, optional): max seconds until the first usable hotkey. Defaults to None.
+        """
+        self.enabled = enabled
+        self.budget = budget
+        self._start = perf_counter()
+        self._lock = threading.Lock()
+        self._phases: List[Tuple[str, float, bool]] = []
+        self._marks: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str, imports: bool = False):
+        if not self.enabled:
+            yield
+            return
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._phases.append((name, perf_counter() - start, imports))
+
+    def mark(self, name: str) -> None:
+        """Record that a milestone (e.g. "hotkeys usable") was reached"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._marks.append((name, perf_counter() - self._start))
+
+    def elapsed(self, name: str) -> float:
+        """Seconds from the start until a milestone, or None if not reached"""
+        with self._lock:
+            for mark, elapsed in self._marks:
+                if mark == name:
+                    return elapsed
+        return None
+
+    def within_budget(self, milestone: str) -> bool:
+        elapsed = self.elapsed(milestone)
+        if self.budget is None:
+            return True
+        return elapsed is not None and elapsed <= self.budget
+
+    def report(self, milestone: str = None, file=sys.stdout) -> None:
+        with self._lock:
+            phases = list(self._phases)
+            marks = sorted(self._marks, key=lambda m: m[1])
+
+        print("startup phases:", file=file)
+        for name, duration, imports in phases:
+            print(f"  {name:<36} {duration*1000:8.1f} ms{'  (import)' if imports else ''}", file=file)
+        import_time = sum(duration for _, duration, imports in phases if imports)
+        print(f"  {'total import time':<36} {import_time*1000:8.1f} ms", file=file)
+
+        print("milestones (since start):", file=file)
+        for name, elapsed in marks:
+            print(f"  {name:<36} {elapsed*1000:8.1f} ms", file=file)
+
+        if milestone is not None and self.budget is not None:
+            status = "ok" if self.within_budget(milestone) else "OVER BUDGET"
+            print(f"{milestone}: budget {self.budget*1000:.0f} ms, {status}", file=file)
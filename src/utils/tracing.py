@@ -0,0 +1,162 @@
+import json
+import math
+import os
+import threading
+from bisect import bisect_right
+from time import perf_counter_ns
+from typing import Dict, List
+
+# histogram bucket upper bounds in nanoseconds: 1us .. ~17s, 4 buckets per doubling
+_BUCKETS = [int(1000 * 2 ** (i / 4)) for i in range(0, 4 * 24 + 1)]
+
+
+class Histogram:
+    """Log-bucketed latency histogram with a fixed size."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, ns: int) -> None:
+        self.counts[bisect_right(_BUCKETS, ns)] += 1
+        self.count += 1
+        self.total += ns
+        if self.min is None or ns < self.min:
+            self.min = ns
+        if self.max is None or ns > self.max:
+            self.max = ns
+
+    def percentile(self, p: float) -> int:
+        """Upper bound (ns) of the bucket that holds the p-th percentile"""
+        if self.count == 0:
+            return 0
+        rank = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                bound = _BUCKETS[i] if i < len(_BUCKETS) else self.max
+                return max(self.min, min(bound, self.max))
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_us": round(self.total / self.count / 1000, 2) if self.count else 0,
+            "min_us": round((self.min or 0) / 1000, 2),
+            "p50_us": round(self.percentile(50) / 1000, 2),
+            "p95_us": round(self.percentile(95) / 1000, 2),
+            "p99_us": round(self.percentile(99) / 1000, 2),
+            "max_us": round((self.max or 0) / 1000, 2),
+        }
+
+
+class _Span:
+    __slots__ = ('_tracer', '_stage', '_start')
+
+    def __init__(self, tracer: 'Tracer', stage: str) -> None:
+        self._tracer = tracer
+        self._stage = stage
+
+    def __enter__(self):
+        self._start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self._tracer.record(self._stage, perf_counter_ns() - self._start)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    """Span timings per stage, aggregated into histograms.
+
+    Disabled by default; span() then returns a shared no-op context manager,
+    and mark()/since() return right away.
+
+    Example Usage:
+    >>> tracer = Tracer(enabled=True)
+    >>> with tracer.span('lookup'):
+    ...     pass
+    >>> tracer.summary()['lookup']['count']
+    1
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+        self._marks: Dict[str, int] = {}
+
+    def span(self, stage: str):
+        """Context manager timing the block as one sample of stage"""
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, stage)
+
+    def record(self, stage: str, ns: int) -> None:
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.add(ns)
+
+    def mark(self, name: str) -> None:
+        """Remember the current time, e.g. when a key was pressed"""
+        if self.enabled:
+            self._marks[name] = perf_counter_ns()
+
+    def since(self, name: str, stage: str, max_age: float = None) -> None:
+        """Record the time since mark(name) as one sample of stage, and clear the mark
+
+        Args:
+            name (str): name of the mark
+            stage (str): stage of the sample
+            max_age (float, optional): seconds after which the mark is abandoned, e.g. a key
+                press that caused no popup; it is cleared without a sample. Defaults to None.
+        """
+        if not self.enabled:
+            return
+        start = self._marks.pop(name, None)
+        if start is None:
+            return
+        ns = perf_counter_ns() - start
+        if max_age is None or ns <= max_age * 1e9:
+            self.record(stage, ns)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._marks.clear()
+
+    def stages(self) -> List[str]:
+        return list(self._histograms)
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            return {stage: h.summary() for stage, h in self._histograms.items()}
+
+    def dump(self, path: str) -> None:
+        """Write the per-stage summaries to a json file"""
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+# shared tracer of the application, enabled by setting this environment
+# variable to the path of the json file the summaries are dumped to
+TRACE_ENV = "VOLUME_CONTROL_TRACE"
+tracer = Tracer(enabled=bool(os.environ.get(TRACE_ENV)))
@@ -1,9 +1,12 @@
 from win32gui import GetForegroundWindow
-from win32process import GetWindowThreadProcessId, GetModuleFileNameEx
-from win32api import OpenProcess, CloseHandle
-from win32con import PROCESS_QUERY_INFORMATION, PROCESS_VM_READ
+from win32process import GetWindowThreadProcessId, GetModuleFileNameEx, GetProcessTimes
+from win32api import OpenProcess, CloseHandle, GetAsyncKeyState
+from win32con import PROCESS_QUERY_INFORMATION, PROCESS_QUERY_LIMITED_INFORMATION, PROCESS_VM_READ
 from ntpath import basename
-import logging
+from utils.log import get_logger
+from utils.process_cache import ProcessNameCache
+
+log = get_logger(__name__)
 
 # utility functions
 def get_pid_active_window():
@@ -14,12 +17,85 @@ def get_process_name(pid):
     pname = None
     try:
         handle = OpenProcess(PROCESS_QUERY_INFORMATION | PROCESS_VM_READ, False, pid)
+    except Exception:
+        log.warning("could not open process", pid=pid, exc_info=True)
+        return pname
+    try:
         pname = GetModuleFileNameEx(handle, 0)
+    except Exception:
+        log.warning("could not get process name", pid=pid, exc_info=True)
+    finally:
         CloseHandle(handle)
-    except Exception as e:
-        logging.exception(e)
 
     return pname
 
+def _open_process(pid):
+    return OpenProcess(PROCESS_QUERY_INFORMATION | PROCESS_VM_READ, False, pid)
+
+_process_name_cache = ProcessNameCache(
+    open_process=_open_process,
+    close_handle=CloseHandle,
+    get_creation_time=lambda handle: GetProcessTimes(handle)['CreationTime'],
+    get_image_path=lambda handle: GetModuleFileNameEx(handle, 0))
+
+def get_process_image_name(pid):
+    """Cached image name (e.g. "firefox.exe") of a process, or None"""
+    return _process_name_cache.get(pid)
+
+def get_process_name_cache_stats():
+    return _process_name_cache.stats()
+
+def get_process_creation_time(pid):
+    """Creation time of a process, or None if it could not be opened"""
+    try:
+        handle = OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    except Exception:
+        return None
+    try:
+        return GetProcessTimes(handle)['CreationTime']
+    except Exception:
+        return None
+    finally:
+        CloseHandle(handle)
+
+TH32CS_SNAPPROCESS = 0x00000002
+
+def list_processes():
+    """(pid, parent pid, exe name) of all processes, from one toolhelp snapshot"""
+    # pywin32 has no toolhelp functions
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESSENTRY32W(ctypes.Structure):
+        _fields_ = [('dwSize', wintypes.DWORD), ('cntUsage', wintypes.DWORD),
+                    ('th32ProcessID', wintypes.DWORD), ('th32DefaultHeapID', ctypes.c_size_t),
+                    ('th32ModuleID', wintypes.DWORD), ('cntThreads', wintypes.DWORD),
+                    ('th32ParentProcessID', wintypes.DWORD), ('pcPriClassBase', wintypes.LONG),
+                    ('dwFlags', wintypes.DWORD), ('szExeFile', wintypes.WCHAR * 260)]
+
+    kernel32 = ctypes.windll.kernel32
+    kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+    snapshot = kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPPROCESS, 0)
+    if not snapshot or snapshot == wintypes.HANDLE(-1).value:
+        raise ctypes.WinError()
+    try:
+        entry = PROCESSENTRY32W()
+        entry.dwSize = ctypes.sizeof(PROCESSENTRY32W)
+        processes = []
+        found = kernel32.Process32FirstW(snapshot, ctypes.byref(entry))
+        while found:
+            processes.append((entry.th32ProcessID, entry.th32ParentProcessID, entry.szExeFile))
+            found = kernel32.Process32NextW(snapshot, ctypes.byref(entry))
+        return processes
+    finally:
+        kernel32.CloseHandle(snapshot)
+
+def is_key_down(key):
+    """Whether a pynput key is held down now, or None for a key without a virtual key code"""
+    vk = getattr(getattr(key, 'value', key), 'vk', None)
+    if vk is None:
+        return None
+    return bool(GetAsyncKeyState(vk) & 0x8000)
+
 def get_process_name_active_window():
-    return basename(get_process_name(get_pid_active_window()))
+    return get_process_image_name(get_pid_active_window()) or ""
@@ -1,43 +1,132 @@
-from PySide6.QtCore import QObject, QThread, Signal, Slot
-from pycaw.pycaw import ISimpleAudioVolume
+from PySide6.QtCore import QObject, QThread, QTimer, Signal, Slot
 from process_volume_control import VolumeCtrlBase
+from audio.command_executor import InlineExecutor
+from gui.throttle import frame_interval_ms
+from utils.event_bus import EventBus
+from utils.tracing import tracer
 from typing import Any, List
+from functools import partial
+from time import perf_counter
 import threading
 
 class VolumeController(QObject):
     volume_changed = Signal(int, str)
     volume_muted = Signal(str)
     volume_unmuted = Signal(int, str)
+    _events_pending = Signal()
 
-    def __init__(self, volume_ctrls: List[VolumeCtrlBase]) -> None:
+    def __init__(self, volume_ctrls: List[VolumeCtrlBase], executor=None, interval_ms: int = None) -> None:
+        """
+        Args:
+            volume_ctrls (List[VolumeCtrlBase]): volume controls whose events are forwarded as signals
+            executor (AudioCommandExecutor, optional): runs all audio (COM) calls.
+                Defaults to running them on the calling thread.
+            interval_ms (int, optional): min time between two deliveries of signals. Defaults to one frame.
+        """
         super().__init__()
-        self._current_volume_interface = None
+        self._current_session = None
+        self._current_backend = None
+        # audio (COM) calls never run on the gui thread
+        self._executor = executor if executor is not None else InlineExecutor()
+
+        # events of the audio thread are delivered on the gui thread at most once per frame,
+        # only the latest event of each signal is delivered
+        self._interval_ms = interval_ms if interval_ms is not None else frame_interval_ms()
+        self._last_drain = 0.0
+        self._drain_timer = QTimer(self)
+        self._drain_timer.setSingleShot(True)
+        self._drain_timer.timeout.connect(self._drain)
+        self._events_pending.connect(self._schedule_drain)
+        self._bus = EventBus(on_pending=self._events_pending.emit)
+        self._bus.subscribe('volume_changed', self._emit_volume_changed)
+        self._bus.subscribe('volume_muted', self._emit_volume_muted)
+        self._bus.subscribe('volume_unmuted', self._emit_volume_unmuted)
+
         # self._volume_view = volume_view
         self._setup_events(volume_ctrls)
 
-    def _vol_changed_from_backend(self, session: ISimpleAudioVolume, volume: int, icon):
-        self._current_volume_interface = session
+    @property
+    def event_bus(self) -> EventBus:
+        return self._bus
+
+    @property
+    def current_session(self):
+        """Session of the last volume event"""
+        return self._current_session
+
+    @Slot()
+    def _schedule_drain(self):
+        if self._drain_timer.isActive():
+            return
+        since_last = (perf_counter() - self._last_drain) * 1000
+        self._drain_timer.start(max(0, int(self._interval_ms - since_last)))
+
+    @Slot()
+    def _drain(self):
+        self._last_drain = perf_counter()
+        self._bus.drain()
+
+    def _emit_volume_changed(self, volume: int, icon):
         self.volume_changed.emit(volume, icon)
-    
-    def _vol_muted_from_backend(self, session: ISimpleAudioVolume, icon):
-        self._current_volume_interface = session
+
+    def _emit_volume_muted(self, icon):
         self.volume_muted.emit(icon)
-    
-    def _vol_unmuted_from_backend(self, session: ISimpleAudioVolume, volume: int, icon):
-        self._current_volume_interface = session
+
+    def _emit_volume_unmuted(self, volume: int, icon):
         self.volume_unmuted.emit(volume, icon)
 
+    def _set_current_session(self, volume_ctrl: VolumeCtrlBase, session):
+        self._current_backend = volume_ctrl.backend
+        self._current_session = session
+
+    def _vol_changed_from_backend(self, volume_ctrl: VolumeCtrlBase, session, volume: int, icon):
+        self._set_current_session(volume_ctrl, session)
+        tracer.mark('signal_emit')
+        self._bus.publish('volume_changed', volume, icon)
+    
+    def _vol_muted_from_backend(self, volume_ctrl: VolumeCtrlBase, session, icon):
+        self._set_current_session(volume_ctrl, session)
+        tracer.mark('signal_emit')
+        self._bus.publish('volume_muted', icon)
+    
+    def _vol_unmuted_from_backend(self, volume_ctrl: VolumeCtrlBase, session, volume: int, icon):
+        self._set_current_session(volume_ctrl, session)
+        tracer.mark('signal_emit')
+        self._bus.publish('volume_unmuted', volume, icon)
+
+    def _session_expired(self, session):
+        # the backend releases expired sessions
+        if self._current_session is session:
+            self._current_session = None
+
     def _setup_events(self, volume_ctrls: List[VolumeCtrlBase]):
+        backends = []
         for vol in volume_ctrls:
-            vol.volume_changed_event.append(self._vol_changed_from_backend)
-            vol.volume_muted_event.append(self._vol_muted_from_backend)
-            vol.volume_unmuted_event.append(self._vol_unmuted_from_backend)
+            vol.volume_changed_event.append(partial(self._vol_changed_from_backend, vol))
+            vol.volume_muted_event.append(partial(self._vol_muted_from_backend, vol))
+            vol.volume_unmuted_event.append(partial(self._vol_unmuted_from_backend, vol))
+            if vol.backend is not None and vol.backend not in backends:
+                backends.append(vol.backend)
+                vol.backend.session_expired_event.append(self._session_expired)
     
     @Slot(int)
     def set_volume_of_last_session(self, volume: int):
-        # this will run on main (gui) thread (when called from gui)
-        if not self._current_volume_interface:
+        # called from gui thread, only the latest queued volume is written
+        self._executor.submit(self._set_volume_of_last_session, volume, key=(id(self), 'set_volume_of_last_session'))
+
+    def set_session_volume(self, backend, session, volume: int):
+        """Set the volume (0 - 100) of any session, e.g. from the mixer. Only the latest
+        queued volume of a session is written.
+        """
+        self._executor.submit(backend.set_volume, session, volume/100, key=(id(session), 'set_volume'))
+
+    def set_session_mute(self, backend, session, mute: bool):
+        self._executor.submit(backend.set_mute, session, mute, key=(id(session), 'set_mute'))
+
+    def _set_volume_of_last_session(self, volume: int):
+        session, backend = self._current_session, self._current_backend
+        if session is None or backend is None:
             return
-        if self._current_volume_interface.GetMute():
-            self._current_volume_interface.SetMute(0, None)
-        self._current_volume_interface.SetMasterVolume(volume/100, None)
+        if backend.get_mute(session):
+            backend.set_mute(session, False)
+        backend.set_volume(session, volume/100)
@@ -0,0 +1,47 @@
+from typing import List
+from audio.backend import AudioBackend
+from audio.command_executor import InlineExecutor
+from process_volume_control import VolumeCtrlBase
+from utils.profile_store import ProfileStore
+
+
+class VolumeProfiles:
+    """Remembers the volume set for an application and restores it when the application
+    opens a new audio session (e.g. after a restart).
+    """
+
+    def __init__(self, store: ProfileStore, backend: AudioBackend, volume_ctrls: List[VolumeCtrlBase],
+                 executor=None) -> None:
+        """
+        Args:
+            store (ProfileStore): saved volumes per process name
+            backend (AudioBackend): sessions to restore, new sessions are reported by its events
+            volume_ctrls (List[VolumeCtrlBase]): controls whose volume changes are saved
+            executor (AudioCommandExecutor, optional): runs all audio (COM) calls.
+                Defaults to running them on the calling thread.
+        """
+        self._store = store
+        self._backend = backend
+        self._executor = executor if executor is not None else InlineExecutor()
+        self.restored = 0
+
+        backend.session_created_event.append(self._session_created)
+        for volume_ctrl in volume_ctrls:
+            volume_ctrl.volume_changed_event.append(self._volume_changed)
+            volume_ctrl.volume_unmuted_event.append(self._volume_changed)
+
+    def _volume_changed(self, session, volume: int, icon):
+        self._store.record(self._backend.session_name(session), volume)
+
+    def _session_created(self, session):
+        # notifications arrive on a COM thread, restore on the executor
+        self._executor.submit(self._restore, session)
+
+    def _restore(self, session):
+        name = self._backend.session_name(session)
+        if not name:
+            return
+        volume = self._store.get(name)
+        if volume is not None:
+            self._backend.set_volume(session, volume/100)
+            self.restored += 1
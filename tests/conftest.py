@@ -0,0 +1,22 @@
+"""Shared setup of the tests: the modules of the app are imported from src,
+with the fake pywin32 and pycaw modules of the benchmarks installed first,
+so the tests run without Windows.
+"""
+import os
+import sys
+
+root = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir))
+sys.path.insert(1, os.path.join(root, "src"))
+sys.path.insert(1, os.path.join(root, "benchmarks"))
+
+import pytest
+from fakes.modules import install_fake_backend
+
+audio, desktop = install_fake_backend(session_count=0)
+
+
+@pytest.fixture
+def fake_desktop():
+    """Foreground window and processes seen by the win32 functions, reset per test"""
+    _, desktop = install_fake_backend(session_count=0)
+    return desktop
@@ -0,0 +1,62 @@
+import threading
+from audio.command_executor import AudioCommandExecutor
+
+
+def run_gated(commands):
+    """Submit commands while the executor thread is blocked, then run them"""
+    executor = AudioCommandExecutor()
+    executor.start()
+    gate = threading.Event()
+    executor.submit(gate.wait, 1.0)
+    try:
+        commands(executor)
+        gate.set()
+        done = threading.Event()
+        executor.submit(done.set)
+        assert done.wait(1.0)
+    finally:
+        executor.stop()
+    return executor
+
+
+def test_queued_deltas_become_one_call():
+    calls = []
+    def volume_up(executor):
+        for _ in range(10):
+            executor.submit_delta('volume', calls.append, 0.02)
+    executor = run_gated(volume_up)
+    assert len(calls) == 1
+    assert abs(calls[0] - 0.2) < 1e-9
+    assert executor.coalesced == 9
+
+
+def test_keyed_submit_replaces_the_queued_command():
+    calls = []
+    def set_volume(executor):
+        assert executor.submit(calls.append, ('set', 30), key='set_volume')
+        executor.submit(calls.append, 'unkeyed')
+        assert not executor.submit(calls.append, ('set', 60), key='set_volume')
+    run_gated(set_volume)
+    # the command keeps its place in the queue
+    assert calls == [('set', 60), 'unkeyed']
+
+
+def test_a_key_is_free_again_once_its_command_ran():
+    calls = []
+    executor = run_gated(lambda executor: executor.submit_delta('volume', calls.append, 1.0))
+    executor.start()
+    done = threading.Event()
+    executor.submit_delta('volume', calls.append, 2.0)
+    executor.submit(done.set)
+    assert done.wait(1.0)
+    executor.stop()
+    assert calls == [1.0, 2.0]
+
+
+def test_stop_leaves_no_thread():
+    executor = AudioCommandExecutor(name="test-audio-commands")
+    executor.start()
+    executor.submit(threading.Event().wait, 0.01)
+    executor.stop()
+    assert not any(t.name == "test-audio-commands" for t in threading.enumerate())
+    assert executor.stats()['queued'] == 0
@@ -0,0 +1,48 @@
+import gc
+from utils.event_bus import EventBus
+
+
+def test_last_value_per_topic_per_frame():
+    frames = []
+    bus = EventBus(on_pending=lambda: frames.append(len(frames)))
+    received = []
+    bus.subscribe('volume', lambda v: received.append(('volume', v)), weak=False)
+    bus.subscribe('mute', lambda m: received.append(('mute', m)), weak=False)
+
+    for volume in (10, 20, 30):
+        bus.publish('volume', volume)
+    bus.publish('mute', True)
+    bus.publish('volume', 40)
+    # one drain is scheduled per frame
+    assert frames == [0]
+    assert bus.drain() == 2
+    # topics in the order they were last published
+    assert received == [('mute', True), ('volume', 40)]
+
+    bus.publish('volume', 50)
+    assert frames == [0, 1]
+    bus.drain()
+    assert received[-1] == ('volume', 50)
+    assert bus.drain() == 0
+    assert bus.stats() == {'published': 6, 'delivered': 3, 'coalesced': 3, 'pending': 0}
+
+
+def test_collected_subscriber_dropped():
+    class View:
+        def __init__(self):
+            self.values = []
+
+        def update(self, value):
+            self.values.append(value)
+
+    bus = EventBus()
+    view = View()
+    bus.subscribe('volume', view.update)
+    bus.publish('volume', 1)
+    bus.drain()
+    assert view.values == [1]
+    del view
+    gc.collect()
+    bus.publish('volume', 2)
+    assert bus.drain() == 1
+    assert bus._subscribers['volume'] == []
@@ -0,0 +1,79 @@
+import pytest
+from audio.simulated_backend import DEFAULT_LATENCIES, LatencyModel, SimulatedBackend
+from group_volume_control import AllExceptForeground, GroupVolCtrl
+from utils.rate_limit import Unlimited
+
+
+def unlimited():
+    return {action: Unlimited() for action in GroupVolCtrl.default_rate_policies()}
+
+
+class ExpiringBackend(SimulatedBackend):
+    """Calls on an expired session fail, like on a released COM interface.
+    The session of expire_pid expires when the volume of another session is read.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(latencies={op: LatencyModel(0.0) for op in DEFAULT_LATENCIES})
+        self.expire_pid = None
+
+    def _check(self, session):
+        if self.session_by_pid(session.pid) is not session:
+            raise OSError("session expired")
+
+    def get_volume(self, session):
+        self._check(session)
+        if self.expire_pid is not None and session.pid != self.expire_pid:
+            self.remove_session(self.expire_pid)
+            self.expire_pid = None
+        return super().get_volume(session)
+
+    def set_volume(self, session, volume):
+        self._check(session)
+        super().set_volume(session, volume)
+
+
+def background(backend, foreground_pid=8, names=None):
+    names = names or {}
+    return GroupVolCtrl(AllExceptForeground(lambda: foreground_pid, names.get), backend,
+                        rate_policies=unlimited())
+
+
+def test_foreground_application_excluded():
+    backend = SimulatedBackend.without_latency()
+    focused = [backend.add_session(8, "game.exe"), backend.add_session(12, "game.exe")]
+    other = backend.add_session(16, "music.exe")
+    group = background(backend, names={8: "game.exe"})
+    group.toggle_duck(0.5)
+    assert [s.volume for s in focused] == [1.0, 1.0]
+    assert other.volume == 0.5
+    assert group.last_batch.sessions == 1
+
+
+def test_unduck_restores_the_volumes():
+    backend = SimulatedBackend.without_latency()
+    sessions = [backend.add_session(pid, f"app{pid}.exe", volume) for pid, volume in ((12, 0.8), (16, 0.3))]
+    group = background(backend)
+    group.toggle_duck(0.25)
+    assert group.is_ducked
+    assert [s.volume for s in sessions] == [0.2, 0.075]
+    group.toggle_duck(0.25)
+    assert not group.is_ducked
+    assert [s.volume for s in sessions] == [0.8, 0.3]
+
+
+def test_session_expiring_during_a_batch():
+    backend = ExpiringBackend()
+    sessions = [backend.add_session(pid, f"app{pid}.exe", 0.5) for pid in (12, 16, 20)]
+    group = background(backend)
+    backend.expire_pid = 16
+    group.volume_up()
+    assert [s.volume for s in sessions] == pytest.approx([0.52, 0.5, 0.52])
+    assert group.last_batch.sessions == 2
+
+    group.toggle_duck(0.5)
+    assert [sessions[0].volume, sessions[2].volume] == pytest.approx([0.26, 0.26])
+    backend.expire_pid = 20
+    group.toggle_duck(0.5)
+    assert sessions[0].volume == pytest.approx(0.52)
+    assert not group.is_ducked
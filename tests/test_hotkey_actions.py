@@ -0,0 +1,50 @@
+import json
+import pytest
+from audio.simulated_backend import SimulatedBackend
+from group_volume_control import AllExceptForeground, GroupVolCtrl, NamePattern
+from process_volume_control import ActiveWindow_VolCtrl
+from utils.rate_limit import Unlimited
+
+
+def test_group_toggle_mute():
+    backend = SimulatedBackend.without_latency()
+    chrome = [backend.add_session(8, "chrome.exe"), backend.add_session(12, "chrome.exe")]
+    other = backend.add_session(16, "app.exe")
+    group = GroupVolCtrl(NamePattern("*chrome*.exe"), backend,
+                         rate_policies={'toggle_mute': Unlimited()})
+
+    chrome[0].mute = True
+    group.toggle_mute()
+    assert all(s.mute for s in chrome) and not other.mute
+    group.toggle_mute()
+    assert not any(s.mute for s in chrome)
+
+
+def test_example_config(fake_desktop):
+    pytest.importorskip("pynput")
+    from hotkey import config
+    from hotkey_actions import HotkeyActions
+
+    doc = config.__doc__
+    example = json.loads(doc[doc.index('{'):doc.index('\n\nThe config')])
+    backend = SimulatedBackend.without_latency()
+    browser = backend.add_session(8, "chrome.exe")
+    active_window = ActiveWindow_VolCtrl(backend=backend)
+    background = GroupVolCtrl(AllExceptForeground(lambda: 0), backend)
+    table = config.compile_bindings(example, HotkeyActions(active_window, background, backend).actions())
+
+    assert len(table) == len(example["bindings"])
+    toggle_browsers = table.hotkeys[-1]
+    toggle_browsers.activate()
+    assert browser.mute
+
+
+@pytest.mark.parametrize('action', [["mute"], {"name": "mute"}, None])
+def test_action_not_a_name(action):
+    pytest.importorskip("pynput")
+    from hotkey.config import Action, HotkeyConfigError, compile_bindings
+
+    config = {"bindings": [{"keys": ["alt_gr", "end"], "action": "mute"},
+                           {"keys": ["alt_gr", "home"], "action": action}]}
+    with pytest.raises(HotkeyConfigError, match="binding 2"):
+        compile_bindings(config, {"mute": Action(lambda: lambda: None)})
@@ -0,0 +1,127 @@
+import logging
+import os
+import socket
+import pytest
+from audio.simulated_backend import SimulatedBackend
+from ipc.client import ControlClient
+from ipc.server import ControlServer
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def tcp_server(tmp_path):
+    server = ControlServer(SimulatedBackend.without_latency(2), address=f"127.0.0.1:{free_port()}",
+                           token_path=str(tmp_path / 'control.token'))
+    server.start()
+    yield server, str(tmp_path / 'control.token')
+    server.stop()
+
+
+def read_token(path: str) -> str:
+    with open(path, encoding='ascii') as f:
+        return f.read()
+
+
+def test_tcp_token(tcp_server):
+    server, token_path = tcp_server
+    with ControlClient(server.address, token=read_token(token_path)) as client:
+        assert client.request("set 30 pid:4") == "ok 4 30"
+    with pytest.raises(ConnectionError):
+        ControlClient(server.address, token="0" * 32)
+    # the first line is the token, not a command
+    host, _, port = server.address.rpartition(':')
+    with socket.create_connection((host, int(port)), 5.0) as s:
+        s.sendall(b"set 0 pid:4\n")
+        assert s.makefile('rb').readline() == b"err unauthorized\n"
+    assert server._backend.session_by_pid(4).volume == 0.3
+
+
+def test_token_file_removed_on_stop(tmp_path):
+    token_path = str(tmp_path / 'control.token')
+    server = ControlServer(SimulatedBackend.without_latency(1), address=f"127.0.0.1:{free_port()}",
+                           token_path=token_path)
+    server.start()
+    if os.name == 'posix':
+        assert os.stat(token_path).st_mode & 0o077 == 0
+    server.stop()
+    assert not os.path.exists(token_path)
+
+
+def test_http_request_closed(tcp_server):
+    server, _ = tcp_server
+    host, _, port = server.address.rpartition(':')
+    with socket.create_connection((host, int(port)), 5.0) as s:
+        s.sendall(b"POST / HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\nset 0 pid:4\n")
+        assert s.makefile('rb').readline() == b""
+    assert server._backend.session_by_pid(4).volume == 1.0
+
+
+def test_stop_with_connected_client(tcp_server, caplog):
+    server, token_path = tcp_server
+    client = ControlClient(server.address, token=read_token(token_path))
+    assert client.request("ping") == "ok"
+    with caplog.at_level(logging.ERROR, logger='asyncio'):
+        server.stop()
+    client.close()
+    assert not [r for r in caplog.records if r.name == 'asyncio']
+
+
+@pytest.fixture
+def unix_server(tmp_path):
+    if not hasattr(socket, 'AF_UNIX'):
+        pytest.skip("no unix sockets")
+    backend = SimulatedBackend.without_latency()
+    backend.add_session(4, "app1.exe", volume=0.5)
+    backend.add_session(8, "Media Player.exe")
+    server = ControlServer(backend, address=str(tmp_path / 'control.sock'))
+    server.start()
+    yield server
+    server.stop()
+
+
+def test_unix_socket_only_for_the_user(unix_server):
+    assert os.stat(unix_server.address).st_mode & 0o077 == 0
+    # nothing is left of the directory it was bound in
+    assert os.listdir(os.path.dirname(unix_server.address)) == ['control.sock']
+
+
+def test_commands(unix_server):
+    with ControlClient(unix_server.address) as client:
+        assert client.request("ping") == "ok"
+        assert client.request("get pid:4") == "ok 4 50 0 app1.exe"
+        assert client.request("step 5 name:APP1.EXE;mute 1 name:media player.exe") == "ok 4 55;ok 8 1"
+        assert client.request("mute toggle pid:8") == "ok 8 0"
+        assert client.request("list") == "ok 4:55:0:app1.exe,8:100:0:Media Player.exe"
+        assert client.request("set 101 pid:4;set 10 pid:99;jump 1 pid:4") == \
+            "err out of range: 101;err no session: pid:99;err unknown command: jump"
+        assert client.request("set 1 active") == "err set: not supported for active"
+
+
+def test_pipelined_requests(unix_server):
+    with ControlClient(unix_server.address) as client:
+        answers = client.pipeline([f"set {i % 101} pid:4" for i in range(1000)])
+    assert answers == [f"ok 4 {i % 101}" for i in range(1000)]
+    assert unix_server._backend.session_by_pid(4).volume == 999 % 101 / 100
+    # the requests that arrived together ran as one batch
+    assert unix_server.batches < len(answers)
+
+
+def test_subscription_events(unix_server):
+    backend = unix_server._backend
+    with ControlClient(unix_server.address) as client, ControlClient(unix_server.address) as other:
+        assert client.request("sub") == "ok"
+        assert other.request("ping") == "ok"
+        backend.change_volume(backend.session_by_pid(8), volume=0.25)
+        assert client.read_event() == "event 8 25 0"
+        # changes made through the server are events too
+        assert other.request("mute 1 pid:4") == "ok 4 1"
+        assert client.read_event() == "event 4 50 1"
+        assert client.request("unsub") == "ok"
+        backend.change_volume(backend.session_by_pid(8), volume=0.75)
+        assert client.request("ping") == "ok"
+    assert other.events == []
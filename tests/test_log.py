@@ -0,0 +1,62 @@
+import gc
+import io
+import logging
+import weakref
+from contextlib import contextmanager
+from utils.log import LogService, get_logger
+
+log = get_logger(__name__)
+
+
+class Wrapper:
+    """Stands for a COM wrapper referenced by the frame of an exception"""
+
+
+def fail(wrapper):
+    raise OSError("session expired")
+
+
+@contextmanager
+def only_service_handlers():
+    # the log capture of pytest keeps the records as they are logged
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    for handler in handlers:
+        root.removeHandler(handler)
+    try:
+        yield
+    finally:
+        for handler in handlers:
+            root.addHandler(handler)
+
+
+def test_ring_buffer_keeps_no_traceback():
+    service = LogService(stream=io.StringIO())
+    wrapper = Wrapper()
+    ref = weakref.ref(wrapper)
+    with only_service_handlers():
+        service.start()
+        try:
+            fail(wrapper)
+        except OSError:
+            log.exception("could not set volume", pid=4)
+        service.stop()
+    del wrapper
+    gc.collect()
+
+    assert ref() is None
+    record, = [r for r in service.recent() if r.msg == "could not set volume"]
+    assert record.exc_info is None
+    assert "OSError: session expired" in record.exc_text
+    text = service._formatter.format(record)
+    assert text.splitlines()[0].endswith("could not set volume pid=4")
+    assert "Traceback" in text
+
+
+def test_message_arguments_formatted():
+    service = LogService(stream=io.StringIO())
+    service.start()
+    log.warning("%d sessions", 3)
+    service.stop()
+    record, = [r for r in service.recent() if r.name == __name__]
+    assert record.msg == "3 sessions" and record.args is None
@@ -0,0 +1,75 @@
+from utils.process_cache import ProcessNameCache
+
+
+class Processes:
+    """Simulated processes: pid -> (creation time, image path), a handle is the pid"""
+
+    def __init__(self) -> None:
+        self.processes = {}
+        self.time = 0
+        self.path_calls = 0
+        self.open_handles = 0
+
+    def start(self, pid: int, name: str) -> None:
+        self.time += 1
+        self.processes[pid] = (self.time, f"C:\\Program Files\\{name}")
+
+    def open(self, pid: int) -> int:
+        if pid not in self.processes:
+            raise OSError(87, "OpenProcess", "The parameter is incorrect.")
+        self.open_handles += 1
+        return pid
+
+    def close(self, handle: int) -> None:
+        self.open_handles -= 1
+
+    def image_path(self, handle: int) -> str:
+        self.path_calls += 1
+        return self.processes[handle][1]
+
+    def cache(self, maxsize: int = 128) -> ProcessNameCache:
+        return ProcessNameCache(self.open, self.close, lambda handle: self.processes[handle][0],
+                                self.image_path, maxsize)
+
+
+def test_hit():
+    processes = Processes()
+    processes.start(4, "firefox.exe")
+    cache = processes.cache()
+    assert cache.get(4) == "firefox.exe"
+    assert cache.get(4) == "firefox.exe"
+    assert processes.path_calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert processes.open_handles == 0
+
+
+def test_lru_eviction():
+    processes = Processes()
+    for pid in (4, 8, 12):
+        processes.start(pid, f"app{pid}.exe")
+    cache = processes.cache(maxsize=2)
+    cache.get(4)
+    cache.get(8)
+    cache.get(4) # 8 is the least recently used now
+    cache.get(12)
+    assert len(cache) == 2
+    processes.path_calls = 0
+    assert cache.get(4) == "app4.exe"
+    assert processes.path_calls == 0
+    assert cache.get(8) == "app8.exe"
+    assert processes.path_calls == 1
+
+
+def test_reused_pid():
+    processes = Processes()
+    processes.start(4, "firefox.exe")
+    cache = processes.cache()
+    assert cache.get(4) == "firefox.exe"
+    del processes.processes[4]
+    assert cache.get(4) is None
+    # a new process with the pid of the exited one
+    processes.start(4, "game.exe")
+    assert cache.get(4) == "game.exe"
+    assert cache.stale == 1
+    assert cache.get(4) == "game.exe"
+    assert processes.open_handles == 0
@@ -0,0 +1,141 @@
+from audio.session_affinity import SessionAffinity
+from audio.simulated_backend import SimulatedBackend
+from process_volume_control import ActiveWindow_VolCtrl
+from utils.process_tree import ProcessTree
+from utils.win_utils import get_process_creation_time
+
+EXPLORER, CHROME = 4, 8
+
+
+class ProcessTable:
+    """Simulated processes: pid -> (parent pid, exe name, creation time)"""
+
+    def __init__(self) -> None:
+        self.processes = {}
+        self.time = 0
+
+    def start(self, pid: int, name: str, parent: int = 0) -> None:
+        self.time += 1
+        self.processes[pid] = (parent, name, self.time)
+
+    def exit(self, pid: int) -> None:
+        del self.processes[pid]
+
+    def list_processes(self):
+        return [(pid, parent, name) for pid, (parent, name, _) in self.processes.items()]
+
+    def creation_time(self, pid: int):
+        entry = self.processes.get(pid)
+        return entry[2] if entry is not None else None
+
+
+def browser_table() -> ProcessTable:
+    table = ProcessTable()
+    table.start(EXPLORER, "explorer.exe")
+    table.start(CHROME, "chrome.exe", EXPLORER)
+    table.start(12, "chrome.exe", CHROME)
+    table.start(16, "chrome.exe", CHROME)
+    return table
+
+
+def test_tree_of_an_application():
+    table = browser_table()
+    tree = ProcessTree(table.list_processes, table.creation_time)
+    assert tree.refresh()
+    assert tree.app_root(16) == CHROME
+    assert list(tree.descendants(CHROME, same_name=True)) == [CHROME, 12, 16]
+    assert tree.parent(CHROME) == EXPLORER
+    assert not tree.refresh()
+
+
+def test_pid_of_an_exited_parent_reused():
+    table = browser_table()
+    tree = ProcessTree(table.list_processes, table.creation_time)
+    tree.refresh()
+    table.exit(CHROME)
+    tree.refresh()
+    table.start(CHROME, "chrome.exe", EXPLORER)
+    tree.refresh()
+    # the parent pid of the children is the pid of the new process, started after them
+    assert tree.parent(12) is None
+    assert tree.app_root(12) == 12
+    assert tree.children(CHROME) == []
+
+
+def test_validate_pid_reused_since_the_refresh():
+    table = browser_table()
+    tree = ProcessTree(table.list_processes, table.creation_time)
+    tree.refresh()
+    assert tree.validate(16)
+    table.exit(16)
+    table.start(16, "chrome.exe", EXPLORER)
+    # same name and parent pid, only the creation time tells
+    assert not tree.validate(16)
+    assert 16 not in tree
+    tree.refresh()
+    assert tree.validate(16)
+    assert tree.app_root(16) == 16
+    assert not tree.validate(12, "game.exe")
+
+
+def test_affinity_forgets_the_application_of_a_reused_pid():
+    table = browser_table()
+    backend = SimulatedBackend.without_latency()
+    audio = backend.add_session(12, "chrome.exe")
+    affinity = SessionAffinity(ProcessTree(table.list_processes, table.creation_time), backend)
+    assert affinity.sessions(16) == (audio,)
+
+    table.exit(16)
+    table.start(16, "game.exe", EXPLORER)
+    assert affinity.sessions(16) == ()
+    assert affinity.sessions(CHROME) == (audio,)
+
+
+def desktop_ctrl(fake_desktop, backend):
+    fake_desktop.add_process(EXPLORER, "explorer.exe")
+    fake_desktop.add_process(CHROME, "chrome.exe", EXPLORER)
+    fake_desktop.add_process(12, "chrome.exe", CHROME)
+    fake_desktop.add_process(16, "chrome.exe", CHROME)
+    tree = ProcessTree(fake_desktop.list_processes, get_process_creation_time)
+    return ActiveWindow_VolCtrl(backend=backend, process_tree=tree)
+
+
+def test_session_of_a_child_process(fake_desktop):
+    backend = SimulatedBackend.without_latency()
+    ctrl = desktop_ctrl(fake_desktop, backend)
+    audio = backend.add_session(16, "chrome.exe")
+    backend.add_session(40, "chrome.exe") # another instance
+    assert ctrl._get_audio_session_active_window(CHROME) is audio
+
+
+def test_window_of_a_reused_child_pid(fake_desktop):
+    backend = SimulatedBackend.without_latency()
+    ctrl = desktop_ctrl(fake_desktop, backend)
+    chrome = backend.add_session(12, "chrome.exe")
+    assert ctrl._get_audio_session_active_window(16) is chrome
+
+    fake_desktop.remove_process(16)
+    fake_desktop.add_process(16, "game.exe", EXPLORER)
+    assert ctrl._get_audio_session_active_window(16) is None
+    fake_desktop.add_process(20, "game.exe", 16)
+    game = backend.add_session(20, "game.exe")
+    assert ctrl._get_audio_session_active_window(16) is game
+
+
+def test_no_session_of_another_instance(fake_desktop):
+    backend = SimulatedBackend.without_latency()
+    ctrl = desktop_ctrl(fake_desktop, backend)
+    # another instance of the app plays audio, the window's instance does not
+    fake_desktop.add_process(40, "chrome.exe", EXPLORER)
+    backend.add_session(40, "chrome.exe")
+    assert ctrl._get_audio_session_active_window(CHROME) is None
+
+
+def test_session_by_name_of_an_unknown_process(fake_desktop, monkeypatch):
+    backend = SimulatedBackend.without_latency()
+    ctrl = desktop_ctrl(fake_desktop, backend)
+    audio = backend.add_session(40, "chrome.exe")
+    # a process the tree cannot resolve, e.g. it could not be listed
+    fake_desktop.add_process(44, "chrome.exe")
+    monkeypatch.setattr(ctrl._affinity.tree, 'refresh', lambda: False)
+    assert ctrl._get_audio_session_active_window(44) is audio
@@ -0,0 +1,136 @@
+import threading
+from audio.command_executor import AudioCommandExecutor
+from audio.simulated_backend import DEFAULT_LATENCIES, LatencyModel, SimulatedBackend
+from process_volume_control import ActiveWindow_VolCtrl
+from utils.foreground import SimulatedForegroundSource
+from utils.rate_limit import Unlimited
+
+
+def unlimited():
+    return {action: Unlimited() for action in ActiveWindow_VolCtrl.default_rate_policies()}
+
+
+class ExpiringBackend(SimulatedBackend):
+    """Removes the session of a pid on another thread while its volume is read"""
+
+    def __init__(self) -> None:
+        super().__init__(latencies={op: LatencyModel(0.0) for op in DEFAULT_LATENCIES})
+        self.expire_pid = None
+        self.expired = threading.Event()
+        self.thread = None
+        self.session_expired_event.append(lambda session: self.expired.set())
+
+    def get_volume(self, session):
+        if self.expire_pid is not None:
+            self.thread = threading.Thread(target=self.remove_session, args=(self.expire_pid,))
+            self.expire_pid = None
+            self.thread.start()
+            # the notification runs up to the executor
+            assert self.expired.wait(1.0)
+        return super().get_volume(session)
+
+
+def test_session_expiring_during_a_command(fake_desktop):
+    backend = ExpiringBackend()
+    session = backend.add_session(8, "app.exe", volume=0.5)
+    fake_desktop.add_process(8, "app.exe")
+    fake_desktop.focus(8)
+    ctrl = ActiveWindow_VolCtrl(volume_step=0.1, backend=backend, rate_policies=unlimited())
+
+    backend.expire_pid = 8
+    ctrl.volume_up()
+    backend.thread.join(1.0)
+
+    # the command finished on the session it looked up, the expiry was applied after it
+    assert abs(session.volume - 0.6) < 1e-9
+    assert ctrl._session is None
+    assert 8 not in ctrl._session_cache
+
+
+def test_commands_use_the_looked_up_session(fake_desktop):
+    backend = SimulatedBackend.without_latency()
+    first = backend.add_session(8, "first.exe", volume=0.5)
+    second = backend.add_session(12, "second.exe", volume=0.5)
+    foreground = SimulatedForegroundSource(8)
+    ctrl = ActiveWindow_VolCtrl(volume_step=0.1, backend=backend, rate_policies=unlimited(),
+                                foreground=foreground)
+
+    ctrl.volume_down()
+    foreground.focus(12)
+    ctrl.mute()
+
+    assert abs(first.volume - 0.4) < 1e-9 and not first.mute
+    assert second.volume == 0.5 and second.mute
+
+
+def test_prefetch_on_focus_change(fake_desktop):
+    backend = SimulatedBackend.without_latency()
+    # the window belongs to another process than the session, like a browser
+    session = backend.add_session(8, "browser.exe", volume=0.5)
+    fake_desktop.add_process(12, "browser.exe")
+    foreground = SimulatedForegroundSource()
+    ctrl = ActiveWindow_VolCtrl(volume_step=0.1, backend=backend, rate_policies=unlimited(),
+                                foreground=foreground)
+
+    foreground.focus(12)
+    assert ctrl.prefetches == 1
+    assert ctrl._session_cache[12][0] is session
+
+    fake_desktop.stats.reset()
+    ctrl.volume_up()
+    # the key press neither looks the session up nor asks for the process name
+    assert fake_desktop.stats.total == 0
+    assert (ctrl.cache_hits, ctrl.cache_misses) == (1, 0)
+    assert abs(session.volume - 0.6) < 1e-9
+
+    # focusing the window again does not look it up again
+    foreground.focus(12)
+    assert ctrl.prefetches == 1
+
+
+def test_prefetched_session_dropped_on_session_change(fake_desktop):
+    backend = SimulatedBackend.without_latency()
+    fake_desktop.add_process(12, "player.exe")
+    foreground = SimulatedForegroundSource()
+    ctrl = ActiveWindow_VolCtrl(volume_step=0.1, backend=backend, rate_policies=unlimited(),
+                                foreground=foreground)
+    foreground.focus(12)
+    assert ctrl._session_cache[12][0] is None
+
+    # the application starts playing after the focus change
+    session = backend.add_session(12, "player.exe", volume=0.5)
+    ctrl.volume_down()
+    assert ctrl.cache_misses == 1
+    assert abs(session.volume - 0.4) < 1e-9
+
+
+def test_merged_steps_per_action(fake_desktop):
+    backend = SimulatedBackend.without_latency()
+    session = backend.add_session(8, "app.exe", volume=0.2)
+    fake_desktop.add_process(8, "app.exe")
+    fake_desktop.focus(8)
+    executor = AudioCommandExecutor()
+    executor.start()
+    ctrl = ActiveWindow_VolCtrl(volume_step=0.01, backend=backend, executor=executor,
+                                rate_policies=unlimited())
+    try:
+        # the executor is busy while the key repeats come in
+        gate = threading.Event()
+        executor.submit(gate.wait, 1.0)
+        for _ in range(10):
+            ctrl.volume_up()
+        ctrl.volume_down()
+        ctrl.set_volume(50)
+        ctrl.set_volume(60)
+        gate.set()
+        done = threading.Event()
+        executor.submit(done.set)
+        assert done.wait(1.0)
+    finally:
+        executor.stop()
+
+    stats = ctrl.rate_limit_stats
+    assert (stats['volume_up']['executed'], stats['volume_up']['merged']) == (10, 9)
+    assert stats['volume_down']['merged'] == 1
+    assert stats['set_volume']['merged'] == 1
+    assert abs(session.volume - 0.6) < 1e-9
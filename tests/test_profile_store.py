@@ -0,0 +1,58 @@
+import os
+import threading
+from utils import profile_store
+from utils.profile_store import ProfileStore
+
+
+def test_log_replayed_and_compacted(tmp_path):
+    path = str(tmp_path / 'volume_profiles.log')
+    store = ProfileStore(path, compact_ratio=2, compact_min_lines=4)
+    for volume in (10, 20, 30):
+        store.record("App.exe", volume)
+        store.flush()
+    store.record("other.exe", 50)
+    store.flush()
+    assert store.compactions == 1
+    assert store.stats()["log_lines"] == 2
+
+    loaded = ProfileStore(path)
+    assert loaded.get("app.exe") == 30
+    assert loaded.get("OTHER.exe") == 50
+    assert len(loaded) == 2
+
+
+def test_record_does_not_read_the_log(tmp_path):
+    path = str(tmp_path / 'volume_profiles.log')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("a.exe\t10\nb.exe\t20\n")
+    store = ProfileStore(path)
+    store.record("a.exe", 40)
+    assert store.stats()["profiles"] is None
+    # the volume recorded before the load wins over the log
+    assert store.get("a.exe") == 40
+    assert store.get("b.exe") == 20
+
+
+def test_record_during_a_compaction(tmp_path, monkeypatch):
+    path = str(tmp_path / 'volume_profiles.log')
+    store = ProfileStore(path, compact_ratio=1, compact_min_lines=1)
+    store.load()
+    syncing, release = threading.Event(), threading.Event()
+    def slow_fsync(fd):
+        syncing.set()
+        release.wait(5.0)
+    monkeypatch.setattr(profile_store.os, 'fsync', slow_fsync)
+
+    store.record("a.exe", 10)
+    writer = threading.Thread(target=store.flush)
+    writer.start()
+    assert syncing.wait(5.0)
+    # neither blocked by the file write
+    store.record("b.exe", 20)
+    assert store.get("a.exe") == 10
+    release.set()
+    writer.join(5.0)
+
+    store.flush()
+    assert ProfileStore(path).get("b.exe") == 20
+    assert store.stats()["pending"] == 0
@@ -0,0 +1,71 @@
+import pytest
+
+kb = pytest.importorskip("pynput.keyboard")
+from hotkey.pyhotkey import HotkeySet
+
+
+def hotkeys(*combo, key_down=None):
+    activations = []
+    hk = HotkeySet(key_down=key_down)
+    hk.register(combo, lambda: activations.append(combo))
+    return hk, activations
+
+
+def press(hk, *keys):
+    for key in keys:
+        hk._on_press(key)
+
+
+def test_exact_match():
+    hk, activations = hotkeys('alt_gr', 'page_up')
+    press(hk, kb.Key.shift, kb.Key.alt_gr, kb.Key.page_up)
+    assert activations == []
+    hk._on_release(kb.Key.shift)
+    press(hk, kb.Key.page_up)
+    assert len(activations) == 1
+
+
+def test_alt_gr_with_synthetic_ctrl():
+    hk, activations = hotkeys('alt_gr', 'page_up')
+    # Windows: AltGr is reported as ctrl_l + alt_gr, repeated while it is held
+    press(hk, kb.Key.ctrl_l, kb.Key.alt_gr, kb.Key.ctrl_l, kb.Key.alt_gr, kb.Key.page_up)
+    assert len(activations) == 1
+    for key in (kb.Key.page_up, kb.Key.ctrl_l, kb.Key.alt_gr):
+        hk._on_release(key)
+    assert hk._pressed == set()
+    # a left ctrl pressed after AltGr was released counts again
+    press(hk, kb.Key.ctrl_l, kb.Key.page_up)
+    assert len(activations) == 1
+
+
+def test_missed_release_dropped():
+    down = {kb.Key.alt_gr, kb.Key.page_up}
+    hk, activations = hotkeys('alt_gr', 'page_up', key_down=lambda key: key in down)
+    # the release of shift was missed, e.g. it was released on the lock screen
+    press(hk, kb.Key.shift, kb.Key.alt_gr, kb.Key.page_up)
+    assert len(activations) == 1
+    assert kb.Key.shift not in hk._pressed
+
+
+def test_held_modifier_kept():
+    hk, activations = hotkeys('alt_gr', 'page_up', key_down=lambda key: True)
+    press(hk, kb.Key.shift, kb.Key.alt_gr, kb.Key.page_up)
+    assert activations == []
+    assert kb.Key.shift in hk._pressed
+
+
+def test_unbound_keys_not_recorded(tmp_path):
+    from hotkey.pyhotkey import UNBOUND_KEY
+    from utils.input_trace import KEY, read_trace, recorder
+    hk, activations = hotkeys('alt_gr', 'page_up')
+    path = str(tmp_path / 'trace.jsonl.gz')
+    recorder.start(path)
+    try:
+        for key in (kb.KeyCode.from_char('p'), kb.Key.shift, kb.Key.alt_gr, kb.Key.page_up):
+            hk._on_press(key)
+            hk._on_release(key)
+    finally:
+        recorder.stop()
+    keys = [event[3] for event in read_trace(path) if event[1] == KEY]
+    assert keys == [UNBOUND_KEY, UNBOUND_KEY, '<shift>', '<shift>',
+                    '<alt_gr>', '<alt_gr>', '<page_up>', '<page_up>']
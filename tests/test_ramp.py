@@ -0,0 +1,47 @@
+import threading
+import time
+from audio.ramp import RampScheduler
+from audio.simulated_backend import SimulatedBackend
+
+
+def test_stop_does_not_wait_for_the_tick_interval():
+    backend = SimulatedBackend.without_latency(1)
+    ramp = RampScheduler(backend, tick_interval=10.0)
+    ramp.start()
+    ramp.start_ramps([(s, 0.0) for s in backend.sessions()], 60.0)
+    time.sleep(0.05)
+    start = time.perf_counter()
+    ramp.stop()
+    assert time.perf_counter() - start < 0.5
+    assert ramp.ticks == 1
+
+
+def test_ramps_started_from_other_threads_during_ticks():
+    backend = SimulatedBackend.without_latency(40)
+    sessions = backend.sessions()
+    ramp = RampScheduler(backend, tick_interval=0.001)
+    ramp.start()
+    errors = []
+
+    def start_and_cancel(part):
+        try:
+            for i in range(200):
+                ramp.start_ramps([(s, (i % 2) * 1.0) for s in part], 0.01)
+                ramp.cancel(part[i % len(part)])
+                ramp.target_of(part[0])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=start_and_cancel, args=(sessions[i::4],)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ramp.start_ramps([(s, 0.5) for s in sessions], 0.0)
+    deadline = time.perf_counter() + 2.0
+    while len(ramp) and time.perf_counter() < deadline:
+        time.sleep(0.005)
+    ramp.stop()
+    assert not errors
+    assert len(ramp) == 0
+    assert all(s.volume == 0.5 for s in sessions)
@@ -0,0 +1,55 @@
+import pytest
+
+QtCore = pytest.importorskip("PySide6.QtCore")
+from audio.simulated_backend import SimulatedBackend
+from gui.session_model import MuteRole, PidRole, SessionListModel, SessionState, VolumeRole
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+
+def states(backend):
+    return [SessionState(s, s.pid, s.name, int(round(s.volume*100)), s.mute) for s in backend.sessions()]
+
+
+def pids(model):
+    return [model.data(model.index(row), PidRole) for row in range(model.rowCount())]
+
+
+@pytest.fixture
+def model(app):
+    model = SessionListModel()
+    model.changes = []
+    model.rowsInserted.connect(lambda parent, first, last: model.changes.append(('inserted', first, last)))
+    model.rowsRemoved.connect(lambda parent, first, last: model.changes.append(('removed', first, last)))
+    model.dataChanged.connect(lambda first, last, roles: model.changes.append(('changed', first.row(), roles)))
+    return model
+
+
+def test_rows_of_created_and_expired_sessions(model):
+    backend = SimulatedBackend.without_latency(3)
+    model.sync(states(backend))
+    assert pids(model) == [4, 8, 12]
+    assert model.changes == [('inserted', 0, 0), ('inserted', 1, 1), ('inserted', 2, 2)]
+
+    model.changes.clear()
+    backend.remove_session(8)
+    backend.add_session(16, "app4.exe")
+    model.sync(states(backend))
+    assert pids(model) == [4, 12, 16]
+    # only the rows that changed, the others are kept
+    assert model.changes == [('removed', 1, 1), ('inserted', 2, 2)]
+    assert model.row_of(12) == 1 and model.row_of(8) is None
+
+
+def test_changed_volume_updates_its_row(model):
+    backend = SimulatedBackend.without_latency(2)
+    model.sync(states(backend))
+    model.changes.clear()
+    backend.set_mute(backend.session_by_pid(8), True)
+    model.sync(states(backend))
+    assert model.changes == [('changed', 1, [MuteRole])]
+    assert model.data(model.index(1), MuteRole) is True
+    assert model.data(model.index(0), VolumeRole) == 100
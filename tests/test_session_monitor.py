@@ -0,0 +1,87 @@
+from audio.session_monitor import SESSION_ACTIVE, SESSION_EXPIRED, SessionMonitor, SimulatedSessionSource
+from audio.simulated_backend import CallStats
+from fakes.audio import FakeAudioSession
+
+stats = CallStats()
+
+
+def session(pid: int, name: str = None) -> FakeAudioSession:
+    return FakeAudioSession(pid, name or f"app{pid}.exe", stats)
+
+
+def released(session) -> bool:
+    return session._volume is None
+
+
+def monitor_with_events(*sessions):
+    source = SimulatedSessionSource(list(sessions))
+    monitor = SessionMonitor(source)
+    events = []
+    # whether the session was still usable when its event was sent
+    monitor.session_created_event.append(lambda s: events.append(('created', s, released(s))))
+    monitor.session_expired_event.append(lambda s: events.append(('expired', s, released(s))))
+    monitor.session_state_changed_event.append(lambda s, state: events.append(('state', s, state)))
+    monitor.start()
+    return source, monitor, events
+
+
+def test_start_registers_existing_sessions():
+    first, second = session(4), session(8)
+    source, monitor, events = monitor_with_events(first, second)
+    assert monitor.registry.get_by_pid(4) is first
+    assert monitor.registry.get_by_pid(8) is second
+    assert events == []
+
+
+def test_created_and_expired():
+    source, monitor, events = monitor_with_events()
+    new = session(4)
+    source.create(new)
+    source.set_state(new, SESSION_ACTIVE)
+    source.expire(new)
+    assert events == [('created', new, False), ('state', new, SESSION_ACTIVE), ('expired', new, False)]
+    assert 4 not in monitor.registry
+    assert released(new) and source.released == 1
+    # a watched session is not watched anymore
+    source.set_state(new, SESSION_ACTIVE)
+    assert len(events) == 3
+
+
+def test_expired_state():
+    old = session(4)
+    source, monitor, events = monitor_with_events(old)
+    source.set_state(old, SESSION_EXPIRED)
+    assert events == [('expired', old, False)]
+    assert released(old)
+
+
+def test_replaced_session_released_after_the_created_event():
+    old, new = session(4), session(4)
+    source, monitor, events = monitor_with_events(old)
+    source.create(new)
+    assert events == [('created', new, False)]
+    assert monitor.registry.get_by_pid(4) is new
+    assert released(old) and not released(new)
+    # the late notification of the replaced session is ignored
+    source.expire(old)
+    assert len(events) == 1 and source.released == 1
+    assert monitor.registry.get_by_pid(4) is new
+
+
+def test_created_twice():
+    source, monitor, events = monitor_with_events()
+    new = session(4)
+    source.create(new)
+    source.create(new)
+    assert events == [('created', new, False)]
+    assert source.released == 0
+
+
+def test_stop_releases_all():
+    sessions = [session(4), session(8)]
+    source, monitor, events = monitor_with_events(*sessions)
+    monitor.stop()
+    assert len(monitor.registry) == 0
+    assert all(released(s) for s in sessions)
+    source.create(session(12))
+    assert events == []
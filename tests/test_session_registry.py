@@ -0,0 +1,47 @@
+from audio.session_registry import SessionRegistry, release_session
+from fakes.audio import FakeAudioSystem
+
+
+def registry_of(system: FakeAudioSystem) -> SessionRegistry:
+    return SessionRegistry(system.GetAllSessions, release=release_session)
+
+
+def test_lookup_after_refresh():
+    system = FakeAudioSystem(session_count=3)
+    registry = registry_of(system)
+    assert registry.refresh()
+    assert registry.get_by_pid(4) is system.session(4)
+    assert registry.get_by_name("APP2.exe") is system.session(8)
+    assert registry.name_of(8) == "app2.exe"
+    # the system sounds session has no process name
+    assert registry.get_by_pid(0) is system.session(0)
+    assert registry.name_of(0) is None
+    assert not registry.refresh()
+
+
+def test_lookup_after_a_session_expired():
+    system = FakeAudioSystem(session_count=3)
+    registry = registry_of(system)
+    registry.refresh()
+    system.add_session(12, "app1.exe") # a second instance
+    system.remove_session(4)
+    assert registry.refresh()
+    assert registry.get_by_pid(4) is None
+    assert registry.get_by_name("app1.exe") is system.session(12)
+    system.remove_session(12)
+    registry.refresh()
+    assert registry.get_by_name("app1.exe") is None
+    assert 12 not in registry and len(registry) == 2
+
+
+def test_new_wrappers_of_registered_sessions_released():
+    system = FakeAudioSystem(session_count=2, fresh_wrappers=True)
+    registry = registry_of(system)
+    registry.refresh()
+    first = registry.get_by_pid(4)
+    open_interfaces = system.open_interfaces
+    assert not registry.refresh()
+    # the registered wrapper stays in use, the new one is released
+    assert registry.get_by_pid(4) is first
+    assert registry.released == 2
+    assert system.open_interfaces == open_interfaces
@@ -0,0 +1,16 @@
+from audio.simulated_backend import SimulatedBackend
+
+
+def test_writes_are_notified():
+    backend = SimulatedBackend.without_latency()
+    session = backend.add_session(4, "app.exe", volume=0.5)
+    changes = []
+    backend.volume_changed_event.append(lambda s, volume, mute: changes.append((s, volume, mute)))
+
+    backend.set_volume(session, 0.25)
+    backend.set_mute(session, True)
+    backend.set_volumes([(session, 0.75)])
+    # by another application
+    backend.change_volume(session, mute=False)
+    assert changes == [(session, 0.25, False), (session, 0.25, True), (session, 0.75, True),
+                       (session, 0.75, False)]
@@ -0,0 +1,62 @@
+import time
+import pytest
+
+QtCore = pytest.importorskip("PySide6.QtCore")
+from gui.throttle import FrameThrottle
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+
+@pytest.fixture
+def throttle(app):
+    throttle = FrameThrottle(interval_ms=10)
+    throttle.values = []
+    throttle.value_ready.connect(throttle.values.append)
+    return throttle
+
+
+def test_first_value_forwarded_immediately(throttle):
+    throttle.push(10)
+    assert throttle.values == [10]
+
+
+def test_latest_value_of_a_frame_wins(throttle):
+    for value in (10, 11, 12, 13):
+        throttle.push(value)
+    assert throttle.values == [10]
+    throttle._on_frame()
+    assert throttle.values == [10, 13]
+    assert (throttle.received, throttle.forwarded) == (4, 2)
+
+
+def test_idle_frame_stops_the_timer(throttle):
+    throttle.push(10)
+    throttle._on_frame()
+    assert not throttle._timer.isActive()
+    # the next frame starts with the next value
+    throttle.push(20)
+    assert throttle.values == [10, 20]
+
+
+def test_flush(throttle):
+    throttle.push(10)
+    throttle.push(11)
+    throttle.flush()
+    assert throttle.values == [10, 11]
+    assert not throttle._timer.isActive()
+    throttle.flush()
+    assert throttle.values == [10, 11]
+
+
+def test_frames_of_the_event_loop(app, throttle):
+    throttle.push(1)
+    throttle.push(2)
+    throttle.push(3)
+    deadline = time.monotonic() + 1.0
+    while throttle.values != [1, 3] and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    assert throttle.values == [1, 3]
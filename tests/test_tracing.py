@@ -0,0 +1,21 @@
+from time import sleep
+from utils.tracing import Tracer
+
+
+def test_since_records_the_time_since_the_mark():
+    tracer = Tracer(enabled=True)
+    tracer.mark('keypress')
+    tracer.since('keypress', 'keypress_to_popup', max_age=10.0)
+    assert tracer.summary()['keypress_to_popup']['count'] == 1
+
+
+def test_abandoned_mark_is_cleared_without_a_sample():
+    tracer = Tracer(enabled=True)
+    # a hotkey without a popup
+    tracer.mark('keypress')
+    sleep(0.02)
+    tracer.since('keypress', 'keypress_to_popup', max_age=0.01)
+    assert 'keypress_to_popup' not in tracer.summary()
+    # a later popup of another application
+    tracer.since('keypress', 'keypress_to_popup', max_age=0.01)
+    assert 'keypress_to_popup' not in tracer.summary()